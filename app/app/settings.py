@@ -20,12 +20,18 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 # See https://docs.djangoproject.com/en/3.2/howto/deployment/checklist/
 
 # SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-0#z=ks*qp+7ims-$l2(rifwbatsju4%5sm=(%oe+)96#*y1zco'
+SECRET_KEY = os.environ.get(
+    'DJANGO_SECRET_KEY',
+    'django-insecure-0#z=ks*qp+7ims-$l2(rifwbatsju4%5sm=(%oe+)96#*y1zco',
+)
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+DEBUG = os.environ.get('DJANGO_DEBUG', '0') == '1'
 
-ALLOWED_HOSTS = []
+ALLOWED_HOSTS = [
+    host for host in os.environ.get('DJANGO_ALLOWED_HOSTS', '').split(',')
+    if host
+]
 
 
 # Application definition
@@ -37,6 +43,7 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework.authtoken',
     'drf_spectacular',
@@ -47,6 +54,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.middleware.PerformanceMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -87,9 +96,142 @@ DATABASES = {
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASSWORD'),
+        # Keep connections open across requests instead of reconnecting
+        # on every one; 0 restores per-request connections.
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
+        # Ping reused connections before each request so one dropped by
+        # the server is replaced rather than failing the request (see
+        # core.db; Django 4.1+ reads this key natively).
+        'CONN_HEALTH_CHECKS': os.environ.get('DB_HEALTH_CHECKS', '1') == '1',
     }
 }
 
+# Read replicas, as comma-separated hosts in DB_REPLICA_HOSTS. Each
+# becomes an alias (replica1, replica2, ...) that safe tour API requests
+# read from, see core.routers; tests mirror them onto default.
+DATABASE_REPLICAS = []
+for number, host in enumerate(
+    filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), 1
+):
+    alias = f'replica{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['core.routers.ReplicaRouter']
+
+# Seconds a user reads from the primary after a write, so replication
+# lag never hides their own changes.
+DATABASE_REPLICA_PIN_SECONDS = 10
+
+
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# LocMemCache is per-process; use the file backend (or a shared backend
+# such as Redis or Memcached) when running more than one worker.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get(
+            'CACHE_BACKEND',
+            'django.core.cache.backends.locmem.LocMemCache',
+        ),
+        'LOCATION': os.environ.get('CACHE_LOCATION', ''),
+    }
+}
+
+TOURS_CACHE_ALIAS = 'default'
+TOURS_CACHE_TIMEOUT = 60 * 60
+
+# Text search configuration used to build and query Tours.search_vector.
+# Changing it requires rebuilding the stored vectors.
+TOURS_SEARCH_CONFIG = 'english'
+
+# Boundaries of the price facet buckets returned by /tours/facets/.
+TOURS_PRICE_BUCKETS = (50, 100, 200, 500)
+
+# Most ids accepted by the ?ids= and ?tags= tour filters.
+TOURS_FILTER_MAX_IDS = 100
+
+# Token -> user lookups are kept in a per-process LRU for TOKEN_CACHE_TTL
+# seconds, backed by the TOKEN_CACHE_ALIAS cache (None to disable).
+TOKEN_CACHE_MAXSIZE = 10000
+TOKEN_CACHE_TTL = 30
+TOKEN_CACHE_ALIAS = 'default'
+TOKEN_CACHE_SHARED_TTL = 5 * 60
+
+# API tokens (core.models.AuthToken) expire TOKEN_TTL seconds after their
+# last use. Using a token pushes its expiry back at most once every
+# TOKEN_REFRESH_INTERVAL seconds, so busy tokens are not written to on
+# every request.
+TOKEN_TTL = int(os.environ.get('TOKEN_TTL', 7 * 24 * 60 * 60))
+TOKEN_REFRESH_INTERVAL = 60 * 60
+
+
+# Per-request timing in Server-Timing headers and /metrics/ histograms.
+# When off, core.middleware.PerformanceMiddleware drops out of the stack.
+PERFORMANCE_METRICS = os.environ.get('PERFORMANCE_METRICS', '1') == '1'
+
+# Networks allowed to scrape /metrics/, e.g. the Prometheus server's,
+# and sent Server-Timing headers. Staff users get both from anywhere.
+METRICS_ALLOWED_NETWORKS = [
+    network for network in os.environ.get(
+        'METRICS_ALLOWED_NETWORKS', '127.0.0.1/32,::1/128'
+    ).split(',') if network
+]
+
+
+# core.middleware.CompressionMiddleware compresses these types when the
+# body is at least COMPRESSION_MIN_SIZE bytes.
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_CONTENT_TYPES = {
+    'application/json',
+    'application/x-ndjson',
+    'application/vnd.oai.openapi',
+    'application/vnd.oai.openapi+json',
+    'text/csv',
+    'text/plain',
+}
+
+
+# Password hashing, see user.hashers. PASSWORD_HASHER_PROFILE picks the
+# hasher for new passwords: 'argon2' (needs argon2-cffi), 'bcrypt'
+# (needs bcrypt) or 'pbkdf2'. Hashes made with another profile or older
+# costs are upgraded on the next login.
+PASSWORD_HASHER_PROFILE = os.environ.get('PASSWORD_HASHER_PROFILE', 'pbkdf2')
+PASSWORD_HASHER_COSTS = {
+    # Memory in KiB; about 20 ms per hash on one core.
+    'argon2': {'time_cost': 2, 'memory_cost': 19456, 'parallelism': 1},
+    'bcrypt': {'rounds': 12},
+    'pbkdf2': {'iterations': 260000},
+}
+TUNED_HASHERS = {
+    'argon2': 'user.hashers.TunedArgon2PasswordHasher',
+    'bcrypt': 'user.hashers.TunedBCryptSHA256PasswordHasher',
+    'pbkdf2': 'user.hashers.TunedPBKDF2PasswordHasher',
+}
+# The preferred hasher first; the others still verify older hashes.
+PASSWORD_HASHERS = [
+    TUNED_HASHERS[PASSWORD_HASHER_PROFILE],
+    *(
+        path for profile, path in TUNED_HASHERS.items()
+        if profile != PASSWORD_HASHER_PROFILE
+    ),
+    'django.contrib.auth.hashers.PBKDF2SHA1PasswordHasher',
+]
+
+# Hashes run on a pool of PASSWORD_HASH_WORKERS threads per process;
+# logins beyond PASSWORD_HASH_BACKLOG waiting ones get a 429.
+PASSWORD_HASH_WORKERS = int(
+    os.environ.get('PASSWORD_HASH_WORKERS', os.cpu_count() or 1)
+)
+PASSWORD_HASH_BACKLOG = int(
+    os.environ.get('PASSWORD_HASH_BACKLOG', 4 * PASSWORD_HASH_WORKERS)
+)
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -144,4 +286,37 @@ CKEDITOR_CONFIGS = {
 
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    # CompactJSONRenderer uses orjson when it is installed; set
+    # JSON_RENDERER=rest_framework.renderers.JSONRenderer to opt out.
+    'DEFAULT_RENDERER_CLASSES': [
+        os.environ.get('JSON_RENDERER', 'core.renderers.CompactJSONRenderer'),
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'core.throttling.AnonReadThrottle',
+        'core.throttling.UserWriteThrottle',
+        'core.throttling.EndpointThrottle',
+    ],
+    # Proxies in front of the app that append to X-Forwarded-For. Throttles
+    # key anonymous clients on the address the last of them saw, or on
+    # REMOTE_ADDR with none; the client-supplied header is never trusted.
+    'NUM_PROXIES': int(os.environ.get('NUM_PROXIES', 0)),
+    # Token buckets: each holds num requests and refills at num/period.
+    'DEFAULT_THROTTLE_RATES': {
+        'anon-read': os.environ.get('THROTTLE_ANON_READ', '300/min'),
+        'user-write': os.environ.get('THROTTLE_USER_WRITE', '120/min'),
+        'login': os.environ.get('THROTTLE_LOGIN', '10/min'),
+    },
 }
+
+# Runs the tests with the throttles off, see app.test_runner.
+TEST_RUNNER = 'app.test_runner.TestRunner'
+
+# Throttle buckets live in each process unless THROTTLE_CACHE_ALIAS
+# names a cache shared by all of them, see core.throttling.
+THROTTLE_CACHE_ALIAS = os.environ.get('THROTTLE_CACHE_ALIAS') or None
+THROTTLE_LOCAL_MAXSIZE = 100000
+
+# Served at /api/schema/; rebuild with `manage.py build_schema` after
+# changing the API, see core.schema.
+OPENAPI_SCHEMA_FILE = BASE_DIR / 'openapi.yaml'
@@ -0,0 +1,29 @@
+"""
+Test runner for the project.
+"""
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import override_settings
+
+
+class TestRunner(DiscoverRunner):
+    """DiscoverRunner with the API throttles off.
+
+    Throttle buckets live for the whole process, so with the production
+    rates a test could be throttled by the requests of earlier ones.
+    Throttling tests set the rates they need with override_settings.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        rest_framework = settings.REST_FRAMEWORK
+        rates = dict.fromkeys(rest_framework['DEFAULT_THROTTLE_RATES'])
+        self.throttles = override_settings(REST_FRAMEWORK={
+            **rest_framework,
+            'DEFAULT_THROTTLE_RATES': rates,
+        })
+        self.throttles.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.throttles.disable()
+        super().teardown_test_environment(**kwargs)
@@ -6,6 +6,8 @@ from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
 from django.utils.translation import gettext_lazy as _
 
+from rest_framework.authtoken.models import TokenProxy
+
 from core import models
 
 
@@ -64,6 +66,20 @@ class ToursAdmin(admin.ModelAdmin):
     inlines = [PricingOptionInline]
 
 
+class AuthTokenAdmin(admin.ModelAdmin):
+    list_display = ['key', 'user', 'created', 'expires']
+    search_fields = ['user__email']
+    raw_id_fields = ['user']
+    ordering = ['-created']
+
+
+# rest_framework.authtoken stays installed for migration 0017, but its
+# tokens no longer authenticate anyone; AuthToken is the one to revoke.
+if admin.site.is_registered(TokenProxy):
+    admin.site.unregister(TokenProxy)
+
 admin.site.register(models.User, UserAdmin)
+admin.site.register(models.AuthToken, AuthTokenAdmin)
 admin.site.register(models.Tours, ToursAdmin)
 admin.site.register(models.Tag)
+admin.site.register(models.TourImport)
@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        """Check persistent connections at the start of each request."""
+        from django.core.signals import request_started
+
+        from core.db import close_unusable_connections
+
+        request_started.connect(close_unusable_connections)
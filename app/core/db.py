@@ -0,0 +1,23 @@
+"""
+Persistent database connection helpers.
+"""
+from django.db import connections
+
+
+def close_unusable_connections(**kwargs):
+    """Close reused connections that no longer answer, so the next
+    query reconnects.
+
+    Backports the CONN_HEALTH_CHECKS database setting of Django 4.1:
+    only connections with the setting enabled are checked, and only
+    when one is already open.
+    """
+    for conn in connections.all():
+        if conn.connection is None:
+            continue
+        if not conn.settings_dict.get('CONN_HEALTH_CHECKS'):
+            continue
+        if conn.in_atomic_block:
+            continue
+        if not conn.is_usable():
+            conn.close()
@@ -0,0 +1,73 @@
+"""
+Django command to measure password hashing cost per login.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+
+class Command(BaseCommand):
+    """Django command to compare the configured password hashers."""
+    help = (
+        'Time password checks with each hasher profile at the costs in '
+        'PASSWORD_HASHER_COSTS and report logins per second on one core '
+        'and on PASSWORD_HASH_WORKERS threads. Profiles whose library is '
+        'not installed are skipped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--logins',
+            type=int,
+            default=20,
+            help='Number of password checks per profile.',
+        )
+        parser.add_argument(
+            '--profile',
+            action='append',
+            choices=sorted(settings.TUNED_HASHERS),
+            help='Profile to measure; may be repeated. Defaults to all.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        logins = options['logins']
+        if logins < 1:
+            raise CommandError('--logins must be at least 1.')
+
+        workers = settings.PASSWORD_HASH_WORKERS
+        for profile in options['profile'] or settings.TUNED_HASHERS:
+            path = settings.TUNED_HASHERS[profile]
+            with override_settings(PASSWORD_HASHERS=[path]):
+                try:
+                    encoded = make_password('benchmark-password')
+                except ValueError as error:
+                    self.stdout.write(f'{profile}: skipped, {error}')
+                    continue
+
+                single = self.measure(encoded, logins, 1)
+                pooled = self.measure(encoded, logins, workers)
+
+            self.stdout.write(
+                f'{profile}: {1000 / single:.1f} ms/login, '
+                f'{single:.1f} logins/s on one core, '
+                f'{pooled:.1f} logins/s on {workers} threads'
+            )
+
+    def measure(self, encoded, logins, workers):
+        """Return the password checks per second against encoded on
+        workers threads."""
+        def login(_):
+            if not check_password('benchmark-password', encoded):
+                raise CommandError('Password check failed.')
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            start = time.perf_counter()
+            list(executor.map(login, range(logins)))
+            elapsed = time.perf_counter() - start
+
+        return logins / elapsed
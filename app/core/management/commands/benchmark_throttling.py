@@ -0,0 +1,129 @@
+"""
+Django command to measure the per-request cost of throttling.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.cache import caches
+from django.core.management.base import BaseCommand, CommandError
+
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.test import APIRequestFactory
+from rest_framework.views import APIView
+
+from core.throttling import CacheBucketStore, LocalBucketStore
+
+
+class PingView(APIView):
+    """Trivial view so the timings are dominated by throttling."""
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request):
+        return Response()
+
+
+class Command(BaseCommand):
+    """Django command to benchmark the token-bucket throttles."""
+    help = (
+        'Time bucket checks against the in-process and cache stores, '
+        'from --threads threads over --keys clients, and the overhead '
+        'the default throttles add to a trivial DRF view.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--checks',
+            type=int,
+            default=100000,
+            help='Number of bucket checks per store.',
+        )
+        parser.add_argument(
+            '--keys',
+            type=int,
+            default=10000,
+            help='Number of distinct clients.',
+        )
+        parser.add_argument(
+            '--threads',
+            type=int,
+            default=4,
+            help='Number of threads checking buckets concurrently.',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=5000,
+            help='Number of view requests per case.',
+        )
+        parser.add_argument(
+            '--cache',
+            default='default',
+            help='Cache alias to measure the shared store with.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if min(options['checks'], options['keys'], options['threads'],
+               options['requests']) < 1:
+            raise CommandError('Counts must be at least 1.')
+
+        stores = {
+            'local': LocalBucketStore(maxsize=options['keys']),
+            f'cache {options["cache"]}': CacheBucketStore(
+                caches[options['cache']]
+            ),
+        }
+        for name, store in stores.items():
+            checks = options['checks']
+            if name != 'local':
+                # Cache round trips are orders of magnitude slower.
+                checks = max(checks // 100, 1)
+            elapsed = self.measure_store(
+                store, checks, options['keys'], options['threads']
+            )
+            self.stdout.write(
+                f'{name} store: {elapsed / checks * 1e6:.2f}us per check'
+            )
+
+        baseline = self.measure_view([], options['requests'])
+        throttled = self.measure_view(
+            api_settings.DEFAULT_THROTTLE_CLASSES, options['requests']
+        )
+        self.stdout.write(
+            f'View: {baseline / options["requests"] * 1e6:.1f}us without '
+            f'throttles, {throttled / options["requests"] * 1e6:.1f}us '
+            f'with the default throttles'
+        )
+
+    def measure_store(self, store, checks, keys, threads):
+        """Return the seconds taken by checks bucket checks."""
+        def work(offset):
+            for i in range(offset, checks, threads):
+                store.consume(f'client:{i % keys}', 1.0, 1000)
+
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            start = time.perf_counter()
+            list(executor.map(work, range(threads)))
+            return time.perf_counter() - start
+
+    def measure_view(self, throttle_classes, requests):
+        """Return the seconds taken to serve requests GETs from distinct
+        client addresses."""
+        view = PingView.as_view(throttle_classes=throttle_classes)
+        factory = APIRequestFactory()
+        batch = [
+            factory.get('/', REMOTE_ADDR=f'10.{i >> 16 & 255}.'
+                        f'{i >> 8 & 255}.{i & 255}')
+            for i in range(requests)
+        ]
+
+        start = time.perf_counter()
+        for request in batch:
+            response = view(request)
+            if response.status_code != 200:
+                raise CommandError(
+                    f'Request failed with {response.status_code}.'
+                )
+        return time.perf_counter() - start
@@ -0,0 +1,125 @@
+"""
+Django command to time token lookups as the token table grows.
+"""
+import random
+import statistics
+import time
+from uuid import uuid4
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from core.models import AuthToken
+
+
+def token_key(number):
+    """Return the key of seeded token number."""
+    return f'{number:040x}'
+
+
+class Command(BaseCommand):
+    """Django command to benchmark token lookups and purges."""
+    help = (
+        'Grow the token table through each of --sizes, half of the rows '
+        'expired, and time token lookups by key at every size plus one '
+        'purge batch at the largest. Fails when a median lookup exceeds '
+        '--max-ms. All rows are rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[10000, 100000, 1000000],
+            help='Table sizes to measure at, in increasing order.',
+        )
+        parser.add_argument(
+            '--lookups',
+            type=int,
+            default=1000,
+            help='Number of lookups timed per size.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows deleted by the timed purge batch.',
+        )
+        parser.add_argument(
+            '--max-ms',
+            type=float,
+            default=5,
+            help='Slowest acceptable median lookup in milliseconds.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if connection.vendor != 'postgresql':
+            raise CommandError('benchmark_tokens requires PostgreSQL.')
+        sizes = options['sizes']
+        if sizes != sorted(sizes) or sizes[0] < 1:
+            raise CommandError('--sizes must be positive and increasing.')
+
+        slow = []
+        with transaction.atomic():
+            user = get_user_model().objects.create_user(
+                email=f'benchmark-{uuid4().hex}@example.com',
+            )
+            seeded = 0
+            for size in sizes:
+                self.seed(user, seeded, size)
+                seeded = size
+                median, p99 = self.time_lookups(size, options['lookups'])
+                self.stdout.write(
+                    f'{size} tokens: {median:.2f}ms median, '
+                    f'{p99:.2f}ms p99 per lookup'
+                )
+                if median > options['max_ms']:
+                    slow.append(size)
+
+            start = time.perf_counter()
+            purged = AuthToken.objects.purge_expired(options['batch_size'])
+            elapsed = (time.perf_counter() - start) * 1000
+            self.stdout.write(
+                f'Purging {len(purged)} expired tokens took {elapsed:.1f}ms'
+            )
+            transaction.set_rollback(True)
+
+        if slow:
+            raise CommandError(
+                f'Lookups slower than {options["max_ms"]}ms at '
+                + ', '.join(str(size) for size in slow) + ' tokens.'
+            )
+        self.stdout.write(self.style.SUCCESS('Token lookups are fast enough.'))
+
+    def seed(self, user, start, stop):
+        """Insert tokens start to stop, every other one expired."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {AuthToken._meta.db_table} '
+                '(key, user_id, created, expires) '
+                "SELECT lpad(to_hex(n), 40, '0'), %s, now(), "
+                "now() + CASE WHEN n %% 2 = 0 THEN interval '1 day' "
+                "ELSE interval '-1 day' END "
+                'FROM generate_series(%s, %s) AS n',
+                [user.pk, start, stop - 1],
+            )
+            cursor.execute(f'ANALYZE {AuthToken._meta.db_table}')
+
+    def time_lookups(self, size, lookups):
+        """Return the median and p99 milliseconds to load a random
+        token with its user, as authentication does on a cache miss."""
+        timings = []
+        for _ in range(lookups):
+            key = token_key(random.randrange(size))
+            start = time.perf_counter()
+            AuthToken.objects.select_related('user').get(key=key)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+
+        return (
+            statistics.median(timings),
+            timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+        )
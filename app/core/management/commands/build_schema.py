@@ -0,0 +1,58 @@
+"""
+Django command to write the OpenAPI schema served at /api/schema/.
+"""
+import difflib
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from core.schema import generate_schema
+
+
+class Command(BaseCommand):
+    """Django command to generate the OpenAPI schema file."""
+    help = (
+        'Generate the OpenAPI schema into OPENAPI_SCHEMA_FILE. With '
+        '--check, write nothing and fail if the file differs from the '
+        'schema of the current code.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Fail if the schema file is missing or out of date.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        path = settings.OPENAPI_SCHEMA_FILE
+        content = generate_schema()
+
+        if not options['check']:
+            with open(path, 'wb') as schema_file:
+                schema_file.write(content)
+            self.stdout.write(self.style.SUCCESS(f'Wrote {path}.'))
+            return
+
+        try:
+            with open(path, 'rb') as schema_file:
+                committed = schema_file.read()
+        except FileNotFoundError:
+            raise CommandError(
+                f'{path} is missing; run build_schema to create it.'
+            )
+
+        if committed != content:
+            diff = difflib.unified_diff(
+                committed.decode().splitlines(),
+                content.decode().splitlines(),
+                'committed',
+                'generated',
+                lineterm='',
+            )
+            self.stdout.write('\n'.join(diff))
+            raise CommandError(
+                f'{path} is out of date; run build_schema to update it.'
+            )
+        self.stdout.write(self.style.SUCCESS(f'{path} is up to date.'))
@@ -0,0 +1,51 @@
+"""
+Django command to delete expired API tokens.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import AuthToken
+
+
+class Command(BaseCommand):
+    """Django command to purge expired tokens in small batches."""
+    help = (
+        'Delete expired API tokens --batch-size rows at a time, each '
+        'batch in its own short transaction, so logins and token lookups '
+        'are never blocked for long. Safe to run from cron while the '
+        'API is serving.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of tokens deleted per statement.',
+        )
+        parser.add_argument(
+            '--pause',
+            type=float,
+            default=0,
+            help='Seconds to wait between batches, e.g. to let '
+                 'replicas catch up.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        batch_size = options['batch_size']
+        if batch_size < 1:
+            raise CommandError('--batch-size must be at least 1.')
+
+        purged = 0
+        while True:
+            keys = AuthToken.objects.purge_expired(batch_size)
+            purged += len(keys)
+            if len(keys) < batch_size:
+                break
+            time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Purged {purged} expired tokens.'
+        ))
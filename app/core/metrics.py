@@ -0,0 +1,160 @@
+"""
+In-process request metrics in the Prometheus text exposition format.
+
+Each worker process keeps its own registry; scrape every worker, or
+run a single one, to see all requests.
+"""
+import bisect
+import ipaddress
+import threading
+
+from django.conf import settings
+
+
+class Histogram:
+    """Cumulative histogram of observed values per label set."""
+
+    def __init__(self, name, documentation, buckets, labels):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self.labels = tuple(labels)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        """Record value under label_values."""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = {
+                    'buckets': [0] * (len(self.buckets) + 1),
+                    'sum': 0,
+                    'count': 0,
+                }
+            series['buckets'][index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    def clear(self):
+        """Forget every observation."""
+        with self._lock:
+            self._series.clear()
+
+    def render(self):
+        """Return the histogram as exposition format lines."""
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} histogram',
+        ]
+        with self._lock:
+            series = sorted(
+                (key, dict(value, buckets=list(value['buckets'])))
+                for key, value in self._series.items()
+            )
+
+        for label_values, value in series:
+            labels = [
+                f'{name}="{escape(label)}"'
+                for name, label in zip(self.labels, label_values)
+            ]
+            cumulative = 0
+            bounds = [*map(format_value, self.buckets), '+Inf']
+            for bound, count in zip(bounds, value['buckets']):
+                cumulative += count
+                bucket_labels = ','.join([*labels, f'le="{bound}"'])
+                lines.append(
+                    f'{self.name}_bucket{{{bucket_labels}}} {cumulative}'
+                )
+            joined = ','.join(labels)
+            lines.append(
+                f'{self.name}_sum{{{joined}}} {format_value(value["sum"])}'
+            )
+            lines.append(f'{self.name}_count{{{joined}}} {value["count"]}')
+
+        return lines
+
+
+def escape(value):
+    """Escape a label value."""
+    return str(value).replace('\\', r'\\').replace('"', r'\"').replace(
+        '\n', r'\n'
+    )
+
+
+def format_value(value):
+    """Format a number without a trailing .0 on integers."""
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+SECONDS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+)
+LABELS = ('endpoint', 'method')
+
+REQUEST_DURATION = Histogram(
+    'http_request_duration_seconds',
+    'Wall time spent handling requests.',
+    SECONDS,
+    LABELS,
+)
+DB_DURATION = Histogram(
+    'http_request_db_duration_seconds',
+    'Time spent in database queries per request.',
+    SECONDS,
+    LABELS,
+)
+DB_QUERIES = Histogram(
+    'http_request_db_queries',
+    'Database queries run per request.',
+    (0, 1, 2, 5, 10, 20, 50, 100),
+    LABELS,
+)
+RENDER_DURATION = Histogram(
+    'http_request_render_duration_seconds',
+    'Time spent rendering response data to bytes.',
+    SECONDS,
+    LABELS,
+)
+RESPONSE_SIZE = Histogram(
+    'http_response_size_bytes',
+    'Size of non-streaming response bodies.',
+    (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304),
+    LABELS,
+)
+
+HISTOGRAMS = (
+    REQUEST_DURATION,
+    DB_DURATION,
+    DB_QUERIES,
+    RENDER_DURATION,
+    RESPONSE_SIZE,
+)
+
+
+def allowed_network(request):
+    """Return True if request comes from settings.METRICS_ALLOWED_NETWORKS."""
+    try:
+        address = ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network)
+        for network in settings.METRICS_ALLOWED_NETWORKS
+    )
+
+
+def render_metrics():
+    """Return every metric in the Prometheus text exposition format."""
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+
+    return '\n'.join(lines) + '\n'
+
+
+def clear_metrics():
+    """Forget every observation, e.g. between tests."""
+    for histogram in HISTOGRAMS:
+        histogram.clear()
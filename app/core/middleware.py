@@ -0,0 +1,276 @@
+"""
+Request performance instrumentation and response compression.
+"""
+import asyncio
+import gzip
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.functional import LazyObject, empty
+from django.utils.text import compress_sequence
+
+from core import metrics
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class QueryTimer:
+    """Database execute wrapper counting queries and their time."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+# The QueryTimer of the request being handled. sync_to_async copies the
+# context into its threads, so queries a view runs off the event loop
+# are counted against its request too.
+current_timer = ContextVar('current_timer', default=None)
+
+
+def time_query(execute, sql, params, many, context):
+    """Execute wrapper passing queries to the current request's timer."""
+    timer = current_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+def instrument_connection(sender, connection, **kwargs):
+    """connection_created receiver installing time_query on every
+    connection, in whichever thread it is opened."""
+    if time_query not in connection.execute_wrappers:
+        # Outermost, so execute_wrapper() blocks still pop their own.
+        connection.execute_wrappers.insert(0, time_query)
+
+
+def server_timing_allowed(request):
+    """Return True if request may see its Server-Timing header: staff
+    users, and clients in settings.METRICS_ALLOWED_NETWORKS.
+
+    Only a user the view already loaded is checked. Loading one here
+    would query the database, from the event loop under ASGI.
+    """
+    if metrics.allowed_network(request):
+        return True
+    user = getattr(request, 'user', None)
+    if isinstance(user, LazyObject) and user._wrapped is empty:
+        return False
+    return bool(user and user.is_staff)
+
+
+# Methods recorded under their own label; the rest are counted as other.
+METHODS = frozenset(
+    ['GET', 'HEAD', 'POST', 'PUT', 'PATCH', 'DELETE', 'OPTIONS']
+)
+
+
+class PerformanceMiddleware(MiddlewareMixin):
+    """Measure wall, database and render time and response size.
+
+    Each request is recorded in the core.metrics histograms under its
+    URL name, e.g. tours:tours-list. Responses to the clients allowed to
+    read the metrics also get a Server-Timing header.
+    Set settings.PERFORMANCE_METRICS to False to remove the middleware
+    from the stack entirely. Under ASGI it runs on the event loop, so
+    async views keep serving requests concurrently.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PERFORMANCE_METRICS:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+        connection_created.connect(
+            instrument_connection, dispatch_uid='instrument_connection'
+        )
+        for conn in connections.all():
+            if conn.connection is not None:
+                instrument_connection(None, conn)
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        timer, token, start = self.start(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        return self.finish(request, response, timer, start)
+
+    async def __acall__(self, request):
+        timer, token, start = self.start(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timer.reset(token)
+        return self.finish(request, response, timer, start)
+
+    def start(self, request):
+        """Start timing request."""
+        timer = QueryTimer()
+        request._render_duration = 0.0
+        return timer, current_timer.set(timer), time.perf_counter()
+
+    def finish(self, request, response, timer, start):
+        """Record the timings of request and add its Server-Timing if
+        allowed."""
+        duration = time.perf_counter() - start
+
+        match = request.resolver_match
+        method = request.method
+        if method not in METHODS:
+            # Clients choose the method; keep the label set bounded.
+            method = 'other'
+        labels = (match.view_name if match else 'unmatched', method)
+        render = request._render_duration
+        metrics.REQUEST_DURATION.observe(duration, *labels)
+        metrics.DB_DURATION.observe(timer.duration, *labels)
+        metrics.DB_QUERIES.observe(timer.count, *labels)
+        metrics.RENDER_DURATION.observe(render, *labels)
+        if not response.streaming:
+            metrics.RESPONSE_SIZE.observe(len(response.content), *labels)
+
+        if not server_timing_allowed(request):
+            return response
+
+        # app is the time left for views and serializers.
+        app = max(duration - timer.duration - render, 0)
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={timer.duration * 1000:.1f};desc="{timer.count} queries"',
+            f'app;dur={app * 1000:.1f}',
+            f'render;dur={render * 1000:.1f}',
+            f'total;dur={duration * 1000:.1f}',
+        ])
+        return response
+
+    def process_template_response(self, request, response):
+        """Time rendering, which runs right after this hook."""
+        start = time.perf_counter()
+
+        def rendered(response):
+            request._render_duration = time.perf_counter() - start
+
+        response.add_post_render_callback(rendered)
+        return response
+
+
+def _compressors():
+    """Return {encoding: compress function} for the installed codecs,
+    most preferred first."""
+    compressors = {}
+    if brotli is not None:
+        compressors['br'] = lambda data: brotli.compress(data, quality=4)
+    if zstandard is not None:
+        compressors['zstd'] = zstandard.ZstdCompressor(level=3).compress
+    compressors['gzip'] = lambda data: gzip.compress(
+        data, compresslevel=6, mtime=0
+    )
+    return compressors
+
+
+COMPRESSORS = _compressors()
+
+
+def negotiate_encoding(accept_encoding, encodings):
+    """Return the encoding in encodings the client prefers by its
+    Accept-Encoding header, or None. Ties go to the earlier one."""
+    weights = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        weight = 1.0
+        params = params.strip()
+        if params.startswith('q='):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                continue
+        weights[name.strip().lower()] = weight
+
+    best, best_weight = None, 0
+    for encoding in encodings:
+        weight = weights.get(encoding, weights.get('*', 0))
+        if weight > best_weight:
+            best, best_weight = encoding, weight
+    return best
+
+
+class CompressionMiddleware(MiddlewareMixin):
+    """Compress API responses with the best encoding both sides support.
+
+    Brotli and zstd are offered when their libraries are installed, and
+    gzip always. Only the types in settings.COMPRESSION_CONTENT_TYPES
+    of at least settings.COMPRESSION_MIN_SIZE bytes are compressed:
+    smaller bodies fit in a packet anyway, and HTML pages are left
+    alone as they may carry CSRF tokens (BREACH). Streaming responses
+    are gzipped on the fly. Works under both WSGI and ASGI.
+    """
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        # Compressing takes microseconds; doing it on the event loop
+        # saves queueing behind sync views for the shared sync thread.
+        response = await self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        """Return response compressed if request accepts it."""
+        if response.has_header('Content-Encoding'):
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0]
+        if content_type not in settings.COMPRESSION_CONTENT_TYPES:
+            return response
+        patch_vary_headers(response, ['Accept-Encoding'])
+
+        accept_encoding = request.headers.get('Accept-Encoding', '')
+        if response.streaming:
+            if negotiate_encoding(accept_encoding, ['gzip']) is None:
+                return response
+            response.streaming_content = compress_sequence(
+                response.streaming_content
+            )
+            del response['Content-Length']
+            encoding = 'gzip'
+        else:
+            if len(response.content) < settings.COMPRESSION_MIN_SIZE:
+                return response
+            encoding = negotiate_encoding(accept_encoding, COMPRESSORS)
+            if encoding is None:
+                return response
+            compressed = COMPRESSORS[encoding](response.content)
+            if len(compressed) >= len(response.content):
+                return response
+            response.content = compressed
+            response['Content-Length'] = str(len(compressed))
+
+        # The compressed bytes differ, so a strong ETag must not match.
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,28 @@
+# Generated by Django 3.2.25 on 2026-10-18 16:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0008_favoritetour'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pricingoption',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='tag',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name='tours',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
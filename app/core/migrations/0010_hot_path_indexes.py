@@ -0,0 +1,57 @@
+# Generated by Django 3.2.25 on 2026-10-18 16:08
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def remove_duplicate_favorites(apps, schema_editor):
+    """Keep the oldest favorite for each (user, tour) pair."""
+    FavoriteTour = apps.get_model('core', 'FavoriteTour')
+    duplicates = FavoriteTour.objects.values('user', 'tour').annotate(
+        keep=Min('id'),
+        count=Count('id'),
+    ).filter(count__gt=1)
+
+    for row in duplicates.iterator():
+        FavoriteTour.objects.filter(
+            user=row['user'],
+            tour=row['tour'],
+        ).exclude(id=row['keep']).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0009_updated_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            remove_duplicate_favorites,
+            migrations.RunPython.noop,
+        ),
+        migrations.AddIndex(
+            model_name='favoritetour',
+            index=models.Index(fields=['user', '-id'], name='favorite_user_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['-name', 'id'], name='tag_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tag',
+            index=models.Index(fields=['updated_at'], name='tag_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tours',
+            index=models.Index(fields=['-id'], include=('title', 'time_minutes', 'link'), name='tours_list_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tours',
+            index=models.Index(fields=['updated_at'], name='tours_updated_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='favoritetour',
+            constraint=models.UniqueConstraint(fields=('user', 'tour'), name='unique_favorite_tour'),
+        ),
+    ]
@@ -0,0 +1,72 @@
+# Generated by Django 3.2.25 on 2026-10-18 16:24
+
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.conf import settings
+from django.db import migrations
+
+
+# pg_trgm ships with the PostgreSQL contrib package, which some servers
+# lack; title typo matching is simply unavailable there.
+CREATE_TRIGRAM_INDEX = """
+DO $$
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'
+    ) THEN
+        CREATE EXTENSION IF NOT EXISTS pg_trgm;
+        CREATE INDEX IF NOT EXISTS tours_title_trgm_idx
+            ON core_tours USING gin (title gin_trgm_ops);
+    END IF;
+END
+$$;
+"""
+DROP_TRIGRAM_INDEX = 'DROP INDEX IF EXISTS tours_title_trgm_idx;'
+
+
+# A copy of core.models.tour_search_vector() as it was when this
+# migration was written.
+POPULATE_SEARCH_VECTOR = """
+UPDATE core_tours SET search_vector =
+    setweight(to_tsvector(%(config)s::regconfig, COALESCE(title, '')), 'A')
+    || setweight(to_tsvector(%(config)s::regconfig, COALESCE((
+        SELECT STRING_AGG(tag.name, ' ')
+        FROM core_tag tag
+        JOIN core_tours_tags link ON link.tag_id = tag.id
+        WHERE link.tours_id = core_tours.id
+    ), '')), 'B')
+    || setweight(to_tsvector(%(config)s::regconfig, COALESCE(
+        REGEXP_REPLACE(description, '<[^>]*>', ' ', 'g'), ''
+    )), 'C');
+"""
+
+
+def populate_search_vector(apps, schema_editor):
+    """Build the search vector of existing tours."""
+    schema_editor.execute(
+        POPULATE_SEARCH_VECTOR, {'config': settings.TOURS_SEARCH_CONFIG}
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_tourimport'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tours',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='tours',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='tours_search_idx'),
+        ),
+        migrations.RunPython(
+            populate_search_vector,
+            migrations.RunPython.noop,
+        ),
+        migrations.RunSQL(CREATE_TRIGRAM_INDEX, DROP_TRIGRAM_INDEX),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 3.2.25 on 2026-10-18 16:30
+
+from django.db import migrations, models
+
+
+# Computes the minimum price of existing tours, a copy of
+# core.models.tour_min_price() as it was when this migration was written.
+POPULATE_MIN_PRICE = """
+UPDATE core_tours SET min_price = (
+    SELECT MIN(LEAST(po.option_price, po.special_price))
+    FROM core_pricingoption po
+    WHERE po.tour_id = core_tours.id
+);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_tour_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tours',
+            name='min_price',
+            field=models.DecimalField(decimal_places=2, editable=False, max_digits=8, null=True),
+        ),
+        migrations.RunSQL(POPULATE_MIN_PRICE, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='tours',
+            index=models.Index(fields=['min_price'], name='tours_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tours',
+            index=models.Index(fields=['time_minutes'], name='tours_minutes_idx'),
+        ),
+    ]
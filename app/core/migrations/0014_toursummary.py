@@ -0,0 +1,84 @@
+# Generated by Django 3.2.25 on 2026-10-18 16:33
+
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+# Builds the summary of every existing tour, a copy of
+# core.models.tour_summary_source() as it was when this migration was
+# written.
+POPULATE_SUMMARIES = """
+INSERT INTO core_toursummary (
+    id, title, time_minutes, link, min_price, tag_ids, tag_names,
+    max_price, favorite_count, updated_at
+)
+SELECT
+    tour.id, tour.title, tour.time_minutes, tour.link, tour.min_price,
+    COALESCE((
+        SELECT ARRAY_AGG(tag.id ORDER BY tag.name, tag.id)
+        FROM core_tag tag
+        JOIN core_tours_tags link ON link.tag_id = tag.id
+        WHERE link.tours_id = tour.id
+    ), '{}'::bigint[]),
+    COALESCE((
+        SELECT ARRAY_AGG(tag.name ORDER BY tag.name, tag.id)
+        FROM core_tag tag
+        JOIN core_tours_tags link ON link.tag_id = tag.id
+        WHERE link.tours_id = tour.id
+    ), '{}'::varchar(255)[]),
+    (
+        SELECT MAX(LEAST(po.option_price, po.special_price))
+        FROM core_pricingoption po
+        WHERE po.tour_id = tour.id
+    ),
+    (
+        SELECT COUNT(*)
+        FROM core_favoritetour favorite
+        WHERE favorite.tour_id = tour.id
+    ),
+    STATEMENT_TIMESTAMP()
+FROM core_tours tour;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_tour_min_price'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TourSummary',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=255)),
+                ('time_minutes', models.IntegerField()),
+                ('link', models.CharField(blank=True, max_length=255)),
+                ('tag_ids', django.contrib.postgres.fields.ArrayField(base_field=models.BigIntegerField(), default=list, size=None)),
+                ('tag_names', django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=255), default=list, size=None)),
+                ('min_price', models.DecimalField(decimal_places=2, max_digits=8, null=True)),
+                ('max_price', models.DecimalField(decimal_places=2, max_digits=8, null=True)),
+                ('favorite_count', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='toursummary',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['tag_ids'], name='summary_tags_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='toursummary',
+            index=models.Index(fields=['min_price'], name='summary_price_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='toursummary',
+            index=models.Index(fields=['time_minutes'], name='summary_minutes_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='toursummary',
+            index=models.Index(fields=['updated_at'], name='summary_updated_idx'),
+        ),
+        migrations.RunSQL(POPULATE_SUMMARIES, migrations.RunSQL.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 3.2.25 on 2026-10-18 18:05
+
+from django.db import migrations, models
+
+
+# Counts the favorites of existing tours, a copy of
+# core.models.tour_favorite_count() as it was when this migration was
+# written.
+POPULATE_FAVORITE_COUNT = """
+UPDATE core_tours SET favorite_count = (
+    SELECT COUNT(*)
+    FROM core_favoritetour favorite
+    WHERE favorite.tour_id = core_tours.id
+);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_toursummary'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tours',
+            name='favorite_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunSQL(POPULATE_FAVORITE_COUNT, migrations.RunSQL.noop),
+        migrations.AddIndex(
+            model_name='tours',
+            index=models.Index(fields=['-favorite_count', '-id'], name='tours_popular_idx'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.25 on 2026-10-18 16:47
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_tour_favorite_count'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='pricingoption',
+            options={'ordering': ['id']},
+        ),
+        migrations.AlterModelOptions(
+            name='tag',
+            options={'ordering': ['id']},
+        ),
+    ]
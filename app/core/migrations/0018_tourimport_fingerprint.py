@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-18 20:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_authtoken'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tourimport',
+            name='fingerprint',
+            field=models.CharField(blank=True, max_length=100),
+        ),
+    ]
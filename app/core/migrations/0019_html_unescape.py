@@ -0,0 +1,104 @@
+# Generated by Django 3.2.25 on 2026-10-18 21:10
+
+import html.entities
+import json
+
+from django.conf import settings
+from django.db import migrations
+
+
+def html_entities():
+    """Return the characters of every named HTML entity, by name."""
+    entities = {
+        name[:-1]: chars
+        for name, chars in html.entities.html5.items()
+        if name.endswith(';')
+    }
+    # A plain space, so the text search parser always splits words there.
+    entities['nbsp'] = ' '
+
+    return json.dumps(entities)
+
+
+# Decodes numeric and named character references; anything that is not
+# a valid reference is kept as written.
+CREATE_HTML_UNESCAPE = """
+CREATE OR REPLACE FUNCTION core_html_unescape(value text) RETURNS text AS $$
+    SELECT COALESCE(STRING_AGG(
+        CASE
+            WHEN part.match[2] IS NOT NULL
+                AND part.match[2]::integer BETWEEN 1 AND 1114111
+                AND part.match[2]::integer NOT BETWEEN 55296 AND 57343
+                THEN CHR(part.match[2]::integer)
+            WHEN part.match[3] IS NOT NULL
+                AND part.code BETWEEN 1 AND 1114111
+                AND part.code NOT BETWEEN 55296 AND 57343
+                THEN CHR(part.code)
+            WHEN part.match[4] IS NOT NULL
+                THEN COALESCE(
+                    %(entities)s::jsonb ->> part.match[4], part.match[1]
+                )
+            ELSE part.match[1]
+        END,
+        '' ORDER BY part.position
+    ), '')
+    FROM (
+        SELECT
+            found.match,
+            found.position,
+            ('x' || LPAD(COALESCE(found.match[3], '0'), 8, '0'))
+                ::bit(32)::integer AS code
+        FROM REGEXP_MATCHES(
+            value,
+            '(&#([0-9]{1,7});|&#[xX]([0-9a-fA-F]{1,6});'
+            '|&([A-Za-z][A-Za-z0-9]*);|[^&]+|&)',
+            'g'
+        ) WITH ORDINALITY AS found(match, position)
+    ) part
+$$ LANGUAGE SQL IMMUTABLE STRICT;
+"""
+DROP_HTML_UNESCAPE = 'DROP FUNCTION IF EXISTS core_html_unescape(text);'
+
+
+# A copy of core.models.tour_search_vector() as it was when this
+# migration was written.
+POPULATE_SEARCH_VECTOR = """
+UPDATE core_tours SET search_vector =
+    setweight(to_tsvector(%(config)s::regconfig, COALESCE(title, '')), 'A')
+    || setweight(to_tsvector(%(config)s::regconfig, COALESCE((
+        SELECT STRING_AGG(tag.name, ' ')
+        FROM core_tag tag
+        JOIN core_tours_tags link ON link.tag_id = tag.id
+        WHERE link.tours_id = core_tours.id
+    ), '')), 'B')
+    || setweight(to_tsvector(%(config)s::regconfig, COALESCE(
+        core_html_unescape(REGEXP_REPLACE(description, '<[^>]*>', ' ', 'g')),
+        ''
+    )), 'C');
+"""
+
+
+def create_html_unescape(apps, schema_editor):
+    """Create core_html_unescape() and reindex existing tours with it."""
+    schema_editor.execute(
+        CREATE_HTML_UNESCAPE, {'entities': html_entities()}
+    )
+    schema_editor.execute(
+        POPULATE_SEARCH_VECTOR, {'config': settings.TOURS_SEARCH_CONFIG}
+    )
+
+
+def drop_html_unescape(apps, schema_editor):
+    """Drop core_html_unescape()."""
+    schema_editor.execute(DROP_HTML_UNESCAPE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_tourimport_fingerprint'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_html_unescape, drop_html_unescape),
+    ]
@@ -1,8 +1,29 @@
 """
 Database models.
 """
+import secrets
+from datetime import timedelta
+from decimal import Decimal, ROUND_HALF_UP
+
 from django.conf import settings
-from django.db import models
+from django.contrib.postgres.aggregates import ArrayAgg, StringAgg
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVector, SearchVectorField
+from django.db import connections, models, router, transaction
+from django.db.models import (
+    Case,
+    Count,
+    F,
+    Max,
+    Min,
+    OuterRef,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce, Greatest, Least, Now
+from django.utils import timezone
 from django.contrib.auth.models import (
     AbstractBaseUser,
     BaseUserManager,
@@ -11,6 +32,57 @@ from django.contrib.auth.models import (
 
 from ckeditor.fields import RichTextField
 
+from core.signals import favorites_changed, pricing_options_updated
+
+
+CENT = Decimal('0.01')
+
+
+def round_money(value):
+    """Round a Decimal to cents, halves away from zero like PostgreSQL."""
+    return value.quantize(CENT, rounding=ROUND_HALF_UP)
+
+
+class RoundMoney(models.Func):
+    """SQL counterpart of round_money()."""
+    function = 'ROUND'
+    template = '%(function)s(%(expressions)s, 2)'
+    output_field = models.DecimalField(max_digits=8, decimal_places=2)
+
+
+def tour_search_vector(tag_model):
+    """Return the expression building Tours.search_vector.
+
+    Titles weigh most, then tag names, then the description with its
+    HTML tags stripped and character references such as &eacute; decoded
+    by core_html_unescape() (created in migration 0019). tag_model is
+    passed in so migrations can use their historical model.
+    """
+    config = settings.TOURS_SEARCH_CONFIG
+    tag_names = tag_model.objects.filter(
+        tours=OuterRef('pk')
+    ).order_by().values('tours').annotate(
+        names=StringAgg('name', ' ')
+    ).values('names')
+    description = models.Func(
+        models.Func(
+            F('description'),
+            Value('<[^>]*>'),
+            Value(' '),
+            Value('g'),
+            function='REGEXP_REPLACE',
+            output_field=models.TextField(),
+        ),
+        function='core_html_unescape',
+        output_field=models.TextField(),
+    )
+
+    return (
+        SearchVector('title', weight='A', config=config)
+        + SearchVector(Subquery(tag_names), weight='B', config=config)
+        + SearchVector(description, weight='C', config=config)
+    )
+
 
 class UserManager(BaseUserManager):
     """Manager for users."""
@@ -47,6 +119,206 @@ class User(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'email'
 
 
+class AuthTokenQuerySet(models.QuerySet):
+    """Queryset for expiring API tokens."""
+
+    def issue(self, user):
+        """Return an active token for user with a fresh expiry,
+        creating one when they have none."""
+        expires = timezone.now() + timedelta(seconds=settings.TOKEN_TTL)
+        token = self.filter(
+            user=user, expires__gt=timezone.now()
+        ).order_by('-expires').first()
+        if token is None:
+            return self.create(user=user, expires=expires)
+
+        self.filter(pk=token.pk).update(expires=expires)
+        token.expires = expires
+        return token
+
+    def refresh(self, key):
+        """Slide the expiry of the token with key and return it, or
+        None if the token no longer exists."""
+        expires = timezone.now() + timedelta(seconds=settings.TOKEN_TTL)
+        if not self.filter(pk=key, expires__gt=timezone.now()).update(
+            expires=expires
+        ):
+            return None
+        return expires
+
+    def purge_expired(self, batch_size):
+        """Delete up to batch_size expired tokens and return their keys.
+
+        Each call is its own short statement, and rows another purge has
+        locked are skipped, so purging never blocks logins for long.
+        """
+        table = self.model._meta.db_table
+        using = self._db or router.db_for_write(self.model)
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {table} WHERE key IN ('
+                f'SELECT key FROM {table} WHERE expires <= %s '
+                'LIMIT %s FOR UPDATE SKIP LOCKED'
+                ') RETURNING key',
+                [timezone.now(), batch_size],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+def generate_token_key():
+    """Return a new random token key."""
+    return secrets.token_hex(20)
+
+
+class AuthToken(models.Model):
+    """API token that expires TOKEN_TTL seconds after it was last used.
+
+    Replaces rest_framework.authtoken's Token, which never expires.
+    Expired rows are removed by the purge_expired_tokens command.
+    """
+    key = models.CharField(
+        max_length=40, primary_key=True, default=generate_token_key
+    )
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='auth_tokens',
+    )
+    created = models.DateTimeField(auto_now_add=True)
+    expires = models.DateTimeField()
+
+    objects = AuthTokenQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['expires'], name='auth_token_expires_idx'),
+        ]
+
+    def __str__(self):
+        return self.key
+
+
+def tour_min_price(pricing_option_model):
+    """Return the expression building Tours.min_price.
+
+    A pricing option costs its special price when one is set, and the
+    tour costs its cheapest option.
+    """
+    prices = pricing_option_model.objects.filter(
+        tour=OuterRef('pk')
+    ).order_by().values('tour').annotate(
+        price=Min(Least('option_price', 'special_price'))
+    ).values('price')
+
+    return Subquery(prices)
+
+
+def tour_favorite_count(favorite_model):
+    """Return the expression counting the favorites of a tour."""
+    favorites = favorite_model.objects.filter(
+        tour=OuterRef('pk')
+    ).order_by().values('tour').annotate(count=Count('*')).values('count')
+
+    return Coalesce(Subquery(favorites), 0)
+
+
+SUMMARY_COLUMNS = (
+    'id', 'title', 'time_minutes', 'link', 'min_price', 'tag_ids',
+    'tag_names', 'max_price', 'favorite_count', 'updated_at',
+)
+
+
+def tour_summary_source(tours, tag_model, pricing_option_model,
+                        favorite_model):
+    """Return tours as rows of SUMMARY_COLUMNS for TourSummary.
+
+    The models are passed in so migrations can use their historical
+    models.
+    """
+    tags = tag_model.objects.filter(
+        tours=OuterRef('pk')
+    ).order_by().values('tours')
+    prices = pricing_option_model.objects.filter(
+        tour=OuterRef('pk')
+    ).order_by().values('tour').annotate(
+        price=Max(Least('option_price', 'special_price'))
+    ).values('price')
+
+    def tag_array(name, field):
+        ordered = ArrayAgg(name, ordering=('name', 'id'))
+        return Coalesce(
+            Subquery(tags.annotate(array=ordered).values('array')),
+            Value([], output_field=ArrayField(field)),
+        )
+
+    # Annotations may not shadow Tours fields, so the computed columns
+    # get prefixed names; the INSERT matches columns by position.
+    computed = {
+        'summary_tag_ids': tag_array('id', models.BigIntegerField()),
+        'summary_tag_names': tag_array(
+            'name', models.CharField(max_length=255)
+        ),
+        'summary_max_price': Subquery(prices),
+        'summary_favorite_count': tour_favorite_count(favorite_model),
+        'summary_updated_at': Now(),
+    }
+    return tours.order_by().annotate(**computed).values(
+        'id', 'title', 'time_minutes', 'link', 'min_price', *computed
+    )
+
+
+def upsert_tour_summaries(source, summary_model):
+    """Insert or update the summary rows produced by source in one
+    statement and return the number of rows written."""
+    select, params = source.query.sql_with_params()
+    table = summary_model._meta.db_table
+    columns = ', '.join(SUMMARY_COLUMNS)
+    updates = ', '.join(
+        f'{column} = EXCLUDED.{column}' for column in SUMMARY_COLUMNS[1:]
+    )
+    # source.db is the read alias, which may be a replica.
+    using = router.db_for_write(summary_model)
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {table} ({columns}) {select} '
+            f'ON CONFLICT (id) DO UPDATE SET {updates}',
+            params,
+        )
+        return cursor.rowcount
+
+
+class TourQuerySet(models.QuerySet):
+    """Queryset for tours."""
+
+    def update_search_vector(self):
+        """Rebuild the stored search vector of every tour in one UPDATE."""
+        return self.update(search_vector=tour_search_vector(Tag))
+
+    def update_min_price(self):
+        """Rebuild the stored minimum price of every tour in one UPDATE."""
+        return self.update(min_price=tour_min_price(PricingOption))
+
+    def update_favorite_count(self):
+        """Recount the favorites of every tour in one UPDATE."""
+        return self.update(favorite_count=tour_favorite_count(FavoriteTour))
+
+    def add_favorites(self, delta):
+        """Atomically add delta to the favorite count of every tour."""
+        return self.update(
+            favorite_count=Greatest(F('favorite_count') + delta, 0)
+        )
+
+    def update_derived_fields(self, **fields):
+        """Rebuild every stored derived column, and set fields, in one
+        UPDATE."""
+        return self.update(
+            search_vector=tour_search_vector(Tag),
+            min_price=tour_min_price(PricingOption),
+            favorite_count=tour_favorite_count(FavoriteTour),
+            **fields,
+        )
+
+
 class Tours(models.Model):
     """Tours object."""
     user = models.ForeignKey(
@@ -59,6 +331,34 @@ class Tours(models.Model):
 
     link = models.CharField(max_length=255, blank=True)
     tags = models.ManyToManyField('Tag')
+    updated_at = models.DateTimeField(auto_now=True)
+    # Maintained by tours.signals and bulk writers, see
+    # TourQuerySet.update_derived_fields().
+    search_vector = SearchVectorField(null=True, editable=False)
+    min_price = models.DecimalField(
+        max_digits=8, decimal_places=2, null=True, editable=False
+    )
+    favorite_count = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = TourQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # Covers the list projection so paging by -id can be served
+            # by an index-only scan.
+            models.Index(
+                fields=['-id'],
+                include=['title', 'time_minutes', 'link'],
+                name='tours_list_idx',
+            ),
+            models.Index(fields=['updated_at'], name='tours_updated_idx'),
+            GinIndex(fields=['search_vector'], name='tours_search_idx'),
+            models.Index(fields=['min_price'], name='tours_price_idx'),
+            models.Index(fields=['time_minutes'], name='tours_minutes_idx'),
+            models.Index(
+                fields=['-favorite_count', '-id'], name='tours_popular_idx'
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -67,11 +367,74 @@ class Tours(models.Model):
 class Tag(models.Model):
     """Tag to be used for a tour."""
     name = models.CharField(max_length=255)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # Nested tags render in a stable order, matching tours.fast.
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['-name', 'id'], name='tag_name_idx'),
+            models.Index(fields=['updated_at'], name='tag_updated_idx'),
+        ]
 
     def __str__(self):
         return self.name
 
 
+class PricingOptionQuerySet(models.QuerySet):
+    """Set-based repricing for pricing options.
+
+    These mirror PricingOption.calculate_prices() as a single UPDATE, so
+    a whole campaign is repriced without loading or saving rows.
+    """
+
+    def _update_prices(self, **fields):
+        """Update fields, then announce the affected tours."""
+        tour_ids = list(
+            self.order_by().values_list('tour_id', flat=True).distinct()
+        )
+        count = self.update(updated_at=timezone.now(), **fields)
+        pricing_options_updated.send(sender=self.model, tour_ids=tour_ids)
+
+        return count
+
+    def apply_discount(self, percentage):
+        """Set discount_percentage and the matching special_price."""
+        percentage = round_money(Decimal(percentage))
+        price = F('option_price')
+        return self._update_prices(
+            discount_percentage=percentage,
+            special_price=RoundMoney(
+                price - price * (Value(percentage) / 100)
+            ),
+        )
+
+    def recompute_prices(self):
+        """Re-derive special_price or discount_percentage on every row."""
+        price = F('option_price')
+        return self._update_prices(
+            special_price=Case(
+                When(
+                    discount_percentage__isnull=False,
+                    then=RoundMoney(
+                        price - price * (F('discount_percentage') / 100)
+                    ),
+                ),
+                default=F('special_price'),
+            ),
+            discount_percentage=Case(
+                When(
+                    discount_percentage__isnull=True,
+                    special_price__isnull=False,
+                    then=RoundMoney(
+                        (price - F('special_price')) / price * 100
+                    ),
+                ),
+                default=F('discount_percentage'),
+            ),
+        )
+
+
 class PricingOption(models.Model):
     tour = models.ForeignKey(
         'Tours',
@@ -87,26 +450,95 @@ class PricingOption(models.Model):
         max_digits=5, decimal_places=2, blank=True, null=True
     )
     includes = models.JSONField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = PricingOptionQuerySet.as_manager()
+
+    class Meta:
+        # Nested options render in a stable order, matching tours.fast.
+        ordering = ['id']
 
     def __str__(self):
         return f"{self.option_name} - {self.option_price}"
 
-    def save(self, *args, **kwargs):
+    def calculate_prices(self):
+        """Derive special_price or discount_percentage from the other."""
+        # Work from the values as they will be stored, so that the
+        # result matches PricingOptionQuerySet.recompute_prices().
+        def to_decimal(name):
+            value = self._meta.get_field(name).to_python(getattr(self, name))
+            return None if value is None else round_money(value)
+
+        price = self.option_price = to_decimal('option_price')
+
         # Calculate and set special_price if discount_percentage is provided
         if self.discount_percentage is not None:
-            self.special_price = self.option_price - (
-                self.option_price * (self.discount_percentage / 100)
+            discount = self.discount_percentage = to_decimal(
+                'discount_percentage'
             )
+            self.special_price = round_money(price - price * (discount / 100))
 
         # Calculate and set discount_percentage if special_price is provided
         elif self.special_price is not None:
-            self.discount_percentage = (
-                (self.option_price - self.special_price) / self.option_price
-            ) * 100
+            special = self.special_price = to_decimal('special_price')
+            self.discount_percentage = round_money(
+                (price - special) / price * 100
+            )
 
+    def save(self, *args, **kwargs):
+        self.calculate_prices()
         super().save(*args, **kwargs)
 
 
+class FavoriteTourQuerySet(models.QuerySet):
+    """Race-safe, set-based favoriting.
+
+    Rows are written with INSERT ... ON CONFLICT DO NOTHING and removed
+    with DELETE ... RETURNING against the unique (user, tour)
+    constraint, so concurrent requests never duplicate a favorite or
+    count it twice.
+    """
+
+    def _write(self, sql, params, delta):
+        """Run sql, announce the tour ids it returned and return them,
+        in one transaction so stored counts move with the rows."""
+        using = self._db or router.db_for_write(self.model)
+        with transaction.atomic(using=using):
+            with connections[using].cursor() as cursor:
+                cursor.execute(sql, params)
+                tour_ids = sorted(row[0] for row in cursor.fetchall())
+            if tour_ids:
+                favorites_changed.send(
+                    sender=self.model, tour_ids=tour_ids, delta=delta
+                )
+
+        return tour_ids
+
+    def favorite(self, user, tour_ids):
+        """Favorite existing tours in tour_ids for user and return the
+        ids that were not favorited yet."""
+        return self._write(
+            f'INSERT INTO {self.model._meta.db_table} (user_id, tour_id) '
+            f'SELECT %s, id FROM {Tours._meta.db_table} '
+            'WHERE id = ANY(%s) ORDER BY id '
+            'ON CONFLICT (user_id, tour_id) DO NOTHING '
+            'RETURNING tour_id',
+            [user.pk, list(tour_ids)],
+            1,
+        )
+
+    def unfavorite(self, user, tour_ids):
+        """Remove the favorites of user on tour_ids and return the ids
+        that were favorited."""
+        return self._write(
+            f'DELETE FROM {self.model._meta.db_table} '
+            'WHERE user_id = %s AND tour_id = ANY(%s) '
+            'RETURNING tour_id',
+            [user.pk, list(tour_ids)],
+            -1,
+        )
+
+
 class FavoriteTour(models.Model):
     user = models.ForeignKey(
         settings.AUTH_USER_MODEL,
@@ -115,5 +547,92 @@ class FavoriteTour(models.Model):
 
     tour = models.ForeignKey('Tours', on_delete=models.CASCADE)
 
+    objects = FavoriteTourQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'tour'],
+                name='unique_favorite_tour',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['user', '-id'], name='favorite_user_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user} - {self.tour}"
+
+
+class TourImport(models.Model):
+    """Checkpoint for a resumable bulk tour import."""
+    name = models.CharField(max_length=255, unique=True)
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+    )
+    # Size and SHA-256 of the feed, so a checkpoint is only ever resumed
+    # with the feed it was started from.
+    fingerprint = models.CharField(max_length=100, blank=True)
+    rows_imported = models.PositiveBigIntegerField(default=0)
+    completed = models.BooleanField(default=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} ({self.rows_imported} rows)"
+
+
+class TourSummaryQuerySet(models.QuerySet):
+    """Queryset for tour summaries."""
+
+    def refresh(self, tour_ids=None):
+        """Rebuild the summaries of tour_ids, or of every tour.
+
+        A full refresh also drops summaries of tours that no longer
+        exist; otherwise that is left to the Tours post_delete handler.
+        """
+        tours = Tours.objects.all()
+        if tour_ids is not None:
+            tours = tours.filter(pk__in=tour_ids)
+        source = tour_summary_source(tours, Tag, PricingOption, FavoriteTour)
+        count = upsert_tour_summaries(source, self.model)
+        if tour_ids is None:
+            self.exclude(id__in=Tours.objects.values('pk')).delete()
+
+        return count
+
+
+class TourSummary(models.Model):
+    """Pre-computed list projection of a tour.
+
+    id mirrors Tours.id. Rows are rebuilt from tours.signals, bulk
+    writers and the refresh_tour_summaries command, so reading the tour
+    list never joins tags, pricing options or favorites.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    title = models.CharField(max_length=255)
+    time_minutes = models.IntegerField()
+    link = models.CharField(max_length=255, blank=True)
+    tag_ids = ArrayField(models.BigIntegerField(), default=list)
+    tag_names = ArrayField(models.CharField(max_length=255), default=list)
+    min_price = models.DecimalField(max_digits=8, decimal_places=2, null=True)
+    max_price = models.DecimalField(max_digits=8, decimal_places=2, null=True)
+    favorite_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField()
+
+    objects = TourSummaryQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['tag_ids'], name='summary_tags_idx'),
+            models.Index(fields=['min_price'], name='summary_price_idx'),
+            models.Index(
+                fields=['time_minutes'], name='summary_minutes_idx'
+            ),
+            models.Index(
+                fields=['updated_at'], name='summary_updated_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return self.title
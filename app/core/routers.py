@@ -0,0 +1,62 @@
+"""
+Database router sending selected reads to read replicas.
+
+Reads go to the primary unless code opts in with reads_from_replica(),
+as tours.replicas.ReplicaReadMixin does for safe API requests. Writes,
+and reads made while writing, always use the primary.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+
+
+_read_alias = ContextVar('read_alias', default=None)
+
+
+def replica_aliases():
+    """Return the database aliases configured as read replicas."""
+    return settings.DATABASE_REPLICAS
+
+
+@contextmanager
+def reads_from_replica():
+    """Route reads in the block to a random replica, if any are
+    configured."""
+    aliases = replica_aliases()
+    token = _read_alias.set(random.choice(aliases) if aliases else None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+@contextmanager
+def reads_from_primary():
+    """Route reads in the block to the primary, even inside
+    reads_from_replica()."""
+    token = _read_alias.set(None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+class ReplicaRouter:
+    """Route opted-in reads to a replica and everything else to the
+    primary."""
+
+    def db_for_read(self, model, **hints):
+        return _read_alias.get() or DEFAULT_DB_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in replica_aliases()
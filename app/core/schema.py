@@ -0,0 +1,56 @@
+"""
+Pre-generated OpenAPI schema.
+
+Introspecting every view and serializer takes long enough that serving
+it per request spikes CPU when clients poll /api/schema/. The schema is
+generated once with the build_schema command into
+settings.OPENAPI_SCHEMA_FILE, committed, and served from memory with
+an ETag and a pre-compressed body.
+"""
+import gzip
+import hashlib
+import json
+from functools import lru_cache
+
+import yaml
+from django.conf import settings
+from drf_spectacular.renderers import OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+
+
+def generate_schema():
+    """Return the schema of the current code as YAML bytes."""
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    schema = generator.get_schema(request=None, public=True)
+    return OpenApiYamlRenderer().render(schema, renderer_context={})
+
+
+class SchemaFile:
+    """One encoding of the schema, ready to send."""
+
+    def __init__(self, content, content_type):
+        self.content = content
+        self.content_type = content_type
+        self.compressed = gzip.compress(content, mtime=0)
+        digest = hashlib.sha256(content).hexdigest()[:32]
+        # Strong ETags name exact bytes, so each encoding needs its own.
+        self.etag = f'"{digest}"'
+        self.compressed_etag = f'"{digest}-gzip"'
+
+
+@lru_cache(maxsize=None)
+def schema_files():
+    """Return the schema as {format: SchemaFile}, read from
+    settings.OPENAPI_SCHEMA_FILE, or generated once when it is
+    missing."""
+    try:
+        with open(settings.OPENAPI_SCHEMA_FILE, 'rb') as schema_file:
+            content = schema_file.read()
+    except FileNotFoundError:
+        content = generate_schema()
+
+    data = json.dumps(yaml.safe_load(content)).encode()
+    return {
+        'yaml': SchemaFile(content, OpenApiYamlRenderer.media_type),
+        'json': SchemaFile(data, 'application/vnd.oai.openapi+json'),
+    }
@@ -0,0 +1,13 @@
+"""
+Custom signals sent by the core models.
+"""
+from django.dispatch import Signal
+
+
+# Sent with the affected tour_ids after pricing options are repriced in
+# bulk, since queryset.update() does not send post_save.
+pricing_options_updated = Signal()
+
+# Sent with the affected tour_ids and the change to each tour's favorite
+# count after favorites are added or removed in bulk.
+favorites_changed = Signal()
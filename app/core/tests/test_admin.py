@@ -3,9 +3,11 @@ Tests for the Django admin modifications.
 """
 from django.test import TestCase
 from django.contrib.auth import get_user_model
-from django.urls import reverse
+from django.urls import NoReverseMatch, reverse
 from django.test import Client
 
+from core.models import AuthToken
+
 
 class AdminSiteTests(TestCase):
     """Tests for Django admin."""
@@ -45,3 +47,13 @@ class AdminSiteTests(TestCase):
         res = self.client.get(url)
 
         self.assertEqual(res.status_code, 200)
+
+    def test_tokens_listed_once(self):
+        """Test issued tokens are managed only through AuthToken."""
+        token = AuthToken.objects.issue(self.user)
+
+        res = self.client.get(reverse('admin:core_authtoken_changelist'))
+
+        self.assertContains(res, token.key)
+        with self.assertRaises(NoReverseMatch):
+            reverse('admin:authtoken_tokenproxy_changelist')
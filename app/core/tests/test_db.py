@@ -0,0 +1,33 @@
+"""
+Tests for the persistent database connection helpers.
+"""
+from django.core.signals import request_started
+from django.db import connection
+from django.test import TransactionTestCase
+
+from core.models import Tag
+
+
+class ConnectionHealthCheckTests(TransactionTestCase):
+    """Test reused connections are checked at the start of requests."""
+
+    def setUp(self):
+        connection.ensure_connection()
+        self.addCleanup(connection.close)
+
+    def test_dropped_connection_is_replaced(self):
+        """Test a connection the server dropped is reopened."""
+        connection.connection.close()
+
+        request_started.send(sender=self.__class__)
+
+        self.assertIsNone(connection.connection)
+        self.assertFalse(Tag.objects.exists())
+
+    def test_healthy_connection_is_kept(self):
+        """Test a working connection is reused."""
+        raw = connection.connection
+
+        request_started.send(sender=self.__class__)
+
+        self.assertIs(connection.connection, raw)
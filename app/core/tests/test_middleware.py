@@ -0,0 +1,274 @@
+"""
+Tests for the request performance instrumentation and compression.
+"""
+import asyncio
+import gzip
+import json
+from unittest.mock import patch
+
+from asgiref.sync import sync_to_async
+
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse, StreamingHttpResponse
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.test import override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core import metrics
+from core.metrics import Histogram, clear_metrics
+from core.middleware import (
+    CompressionMiddleware,
+    PerformanceMiddleware,
+    negotiate_encoding,
+)
+from tours.tests.test_tour_api import (
+    create_superuser,
+    create_tour,
+    detail_url,
+)
+
+
+TOURS_URL = reverse('tours:tours-list')
+METRICS_URL = reverse('metrics')
+
+
+class HistogramTests(TestCase):
+    """Test rendering histograms."""
+
+    def test_render(self):
+        """Test buckets are cumulative and labels escaped."""
+        histogram = Histogram('size', 'Sizes.', (1, 2.5), ('path',))
+        for value in (0.5, 1, 2, 7):
+            histogram.observe(value, 'a"b')
+
+        self.assertEqual(histogram.render(), [
+            '# HELP size Sizes.',
+            '# TYPE size histogram',
+            'size_bucket{path="a\\"b",le="1"} 2',
+            'size_bucket{path="a\\"b",le="2.5"} 3',
+            'size_bucket{path="a\\"b",le="+Inf"} 4',
+            'size_sum{path="a\\"b"} 10.5',
+            'size_count{path="a\\"b"} 4',
+        ])
+
+
+class PerformanceMiddlewareTests(TestCase):
+    """Test requests are timed and aggregated."""
+
+    def setUp(self):
+        cache.clear()
+        clear_metrics()
+        self.addCleanup(clear_metrics)
+        self.client = APIClient()
+
+    def test_server_timing(self):
+        """Test responses carry their timings."""
+        res = self.client.get(TOURS_URL)
+
+        timing = res['Server-Timing']
+        self.assertRegex(timing, r'^db;dur=[\d.]+;desc="\d+ queries", ')
+        for name in ('app', 'render', 'total'):
+            self.assertRegex(timing, rf'{name};dur=[\d.]+')
+
+    def test_server_timing_restricted(self):
+        """Test only allowed networks and staff see their timings."""
+        res = self.client.get(TOURS_URL, REMOTE_ADDR='203.0.113.7')
+        self.assertNotIn('Server-Timing', res)
+
+        with override_settings(METRICS_ALLOWED_NETWORKS=['203.0.113.0/24']):
+            res = self.client.get(TOURS_URL, REMOTE_ADDR='203.0.113.7')
+        self.assertIn('Server-Timing', res)
+
+        self.client.force_authenticate(create_superuser())
+        res = self.client.get(TOURS_URL, REMOTE_ADDR='203.0.113.7')
+        self.assertIn('Server-Timing', res)
+
+    def test_async_stack(self):
+        """Test the middleware awaits async views on the event loop and
+        counts queries they run on worker threads."""
+        @sync_to_async
+        def count_users():
+            try:
+                return get_user_model().objects.count()
+            finally:
+                # The worker thread would keep the test database open.
+                connection.close()
+
+        async def view(request):
+            await count_users()
+            return HttpResponse('ok')
+
+        middleware = PerformanceMiddleware(view)
+        request = RequestFactory().get('/')
+        response = middleware(request)
+
+        self.assertTrue(asyncio.iscoroutine(response))
+        response = asyncio.run(response)
+        self.assertRegex(response['Server-Timing'], r'desc="1 queries"')
+        self.assertIn(
+            'http_request_db_queries_count'
+            '{endpoint="unmatched",method="GET"} 1\n',
+            metrics.render_metrics(),
+        )
+
+    def test_metrics_endpoint(self):
+        """Test requests are aggregated per endpoint."""
+        self.client.get(TOURS_URL)
+        self.client.get(TOURS_URL)
+
+        res = self.client.get(METRICS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        body = res.content.decode()
+        labels = '{endpoint="tours:tours-list",method="GET"}'
+        for name in (
+            'http_request_duration_seconds',
+            'http_request_db_duration_seconds',
+            'http_request_db_queries',
+            'http_request_render_duration_seconds',
+            'http_response_size_bytes',
+        ):
+            self.assertIn(f'{name}_count{labels} 2\n', body)
+
+    def test_unknown_methods_share_a_label(self):
+        """Test client-chosen methods cannot add label sets."""
+        for method in ('BREW', 'PROPFIND'):
+            self.client.generic(method, TOURS_URL)
+
+        body = self.client.get(METRICS_URL).content.decode()
+        self.assertIn('method="other"} 2\n', body)
+        self.assertNotIn('BREW', body)
+
+    def test_metrics_restricted(self):
+        """Test only allowed networks and staff can read the metrics."""
+        res = self.client.get(METRICS_URL, REMOTE_ADDR='203.0.113.7')
+        self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+        with override_settings(METRICS_ALLOWED_NETWORKS=['203.0.113.0/24']):
+            res = self.client.get(METRICS_URL, REMOTE_ADDR='203.0.113.7')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.client.force_login(create_superuser())
+        res = self.client.get(METRICS_URL, REMOTE_ADDR='203.0.113.7')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(PERFORMANCE_METRICS=False)
+    def test_disabled(self):
+        """Test nothing is measured when metrics are off."""
+        res = self.client.get(TOURS_URL)
+
+        self.assertNotIn('Server-Timing', res)
+        self.assertEqual(
+            self.client.get(METRICS_URL).status_code,
+            status.HTTP_404_NOT_FOUND,
+        )
+
+
+BODY = b'{"description": "' + b'<p>Snorkel the reef.</p>' * 100 + b'"}'
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    """Test negotiated response compression."""
+
+    def respond(self, response, accept_encoding='gzip'):
+        """Pass response through the middleware for a request accepting
+        accept_encoding."""
+        request = RequestFactory().get(
+            '/', HTTP_ACCEPT_ENCODING=accept_encoding
+        )
+        return CompressionMiddleware(lambda request: response)(request)
+
+    def test_negotiate_encoding(self):
+        """Test q-values, wildcards and ties pick the right encoding."""
+        encodings = ['br', 'zstd', 'gzip']
+
+        self.assertEqual(negotiate_encoding('gzip, br', encodings), 'br')
+        self.assertEqual(
+            negotiate_encoding('br;q=0.5, gzip', encodings), 'gzip'
+        )
+        self.assertEqual(negotiate_encoding('*', ['gzip']), 'gzip')
+        self.assertIsNone(negotiate_encoding('gzip;q=0', encodings))
+        self.assertIsNone(negotiate_encoding('identity', encodings))
+        self.assertIsNone(negotiate_encoding('', encodings))
+
+    def test_gzip(self):
+        """Test large JSON bodies are compressed and ETags weakened."""
+        response = HttpResponse(BODY, content_type='application/json')
+        response['ETag'] = '"abc"'
+
+        response = self.respond(response)
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.content), BODY)
+        self.assertEqual(
+            response['Content-Length'], str(len(response.content))
+        )
+        self.assertEqual(response['ETag'], 'W/"abc"')
+        self.assertEqual(response['Vary'], 'Accept-Encoding')
+
+    @patch.dict(
+        'core.middleware.COMPRESSORS',
+        {'br': lambda data: b'brotli', 'gzip': gzip.compress},
+        clear=True,
+    )
+    def test_preferred_encoding(self):
+        """Test the most preferred installed encoding is used."""
+        response = self.respond(
+            HttpResponse(BODY, content_type='application/json'),
+            'gzip, deflate, br',
+        )
+
+        self.assertEqual(response['Content-Encoding'], 'br')
+        self.assertEqual(response.content, b'brotli')
+
+    def test_skipped(self):
+        """Test small, HTML and unaccepted responses are left alone."""
+        cases = [
+            (HttpResponse(b'{}', content_type='application/json'), 'gzip'),
+            (HttpResponse(BODY, content_type='text/html'), 'gzip'),
+            (HttpResponse(BODY, content_type='application/json'), ''),
+        ]
+        for response, accept_encoding in cases:
+            response = self.respond(response, accept_encoding)
+
+            self.assertFalse(response.has_header('Content-Encoding'))
+            self.assertIn(response.content, (b'{}', BODY))
+
+    def test_streaming(self):
+        """Test streaming responses are gzipped on the fly."""
+        response = StreamingHttpResponse(
+            iter([BODY, BODY]), content_type='application/x-ndjson'
+        )
+
+        response = self.respond(response, 'br, gzip')
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(
+            gzip.decompress(b''.join(response.streaming_content)),
+            BODY * 2,
+        )
+
+
+class CompressedApiTests(TestCase):
+    """Test API responses are compressed end to end."""
+
+    def test_tour_detail(self):
+        """Test a tour detail with a long description is gzipped."""
+        cache.clear()
+        tour = create_tour(
+            user=create_superuser(), description=BODY.decode()
+        )
+
+        res = APIClient().get(
+            detail_url(tour.id), HTTP_ACCEPT_ENCODING='gzip'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        data = json.loads(gzip.decompress(res.content))
+        self.assertEqual(data['description'], BODY.decode())
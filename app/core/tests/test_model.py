@@ -1,6 +1,9 @@
 """
 Tests for models.
 """
+from decimal import Decimal
+
+from django.db import IntegrityError
 from django.test import TestCase
 from django.contrib.auth import get_user_model
 
@@ -75,3 +78,106 @@ class ModelTests(TestCase):
 
         # Assert that the created tour has the correct title
         self.assertEqual(str(tour), tour.title)
+
+    def test_favorite_tour_unique_per_user(self):
+        """Test a user cannot favorite the same tour twice."""
+        user = create_user()
+        tour = models.Tours.objects.create(
+            user=user,
+            title='Sample Tour name',
+            time_minutes=5,
+            description='Sample Tour description.',
+        )
+        models.FavoriteTour.objects.create(user=user, tour=tour)
+
+        with self.assertRaises(IntegrityError):
+            models.FavoriteTour.objects.create(user=user, tour=tour)
+
+
+class PricingOptionRepricingTests(TestCase):
+    """Test set-based repricing matches the per-row save path."""
+
+    prices = ['10.05', '99.99', '0.01', '123.45', '19.90', '333.33']
+
+    def setUp(self):
+        user = create_user()
+        self.tour = models.Tours.objects.create(
+            user=user,
+            title='Sample Tour name',
+            time_minutes=5,
+            description='Sample Tour description.',
+        )
+
+    def create_options(self, **params):
+        """Create one pricing option per sample price."""
+        return [
+            models.PricingOption.objects.create(
+                tour=self.tour,
+                option_name='Option',
+                option_price=Decimal(price),
+                **params,
+            )
+            for price in self.prices
+        ]
+
+    def snapshot(self):
+        """Return the stored prices of every option."""
+        return list(models.PricingOption.objects.order_by('id').values_list(
+            'option_price', 'special_price', 'discount_percentage'
+        ))
+
+    def test_apply_discount_matches_save(self):
+        """Test apply_discount stores the same Decimals as save()."""
+        for percentage in ['50', '12.5', '33.33', '7.77']:
+            options = self.create_options()
+            for option in options:
+                option.discount_percentage = Decimal(percentage)
+                option.save()
+            expected = self.snapshot()
+
+            models.PricingOption.objects.update(
+                discount_percentage=None, special_price=None
+            )
+            # Tour ids, the repricing, then the tours' min_price and
+            # summary refreshes.
+            with self.assertNumQueries(4):
+                models.PricingOption.objects.apply_discount(percentage)
+
+            self.assertEqual(self.snapshot(), expected)
+            models.PricingOption.objects.all().delete()
+
+    def test_recompute_prices_matches_save(self):
+        """Test recompute_prices derives the same Decimals as save()."""
+        discounted = self.create_options(discount_percentage=Decimal('15.55'))
+        specials = [
+            models.PricingOption.objects.create(
+                tour=self.tour,
+                option_name='Option',
+                option_price=Decimal(price),
+                special_price=Decimal(price) * 2 / 3,
+            )
+            for price in self.prices
+        ]
+        self.create_options()
+        expected = self.snapshot()
+
+        models.PricingOption.objects.filter(
+            pk__in=[option.pk for option in discounted]
+        ).update(special_price=None)
+        models.PricingOption.objects.filter(
+            pk__in=[option.pk for option in specials]
+        ).update(discount_percentage=None)
+        models.PricingOption.objects.recompute_prices()
+
+        self.assertEqual(self.snapshot(), expected)
+
+    def test_half_cent_rounds_up(self):
+        """Test half cents round away from zero."""
+        option = models.PricingOption.objects.create(
+            tour=self.tour,
+            option_name='Option',
+            option_price=Decimal('10.05'),
+            discount_percentage=Decimal('50'),
+        )
+
+        self.assertEqual(option.special_price, Decimal('5.03'))
@@ -0,0 +1,63 @@
+"""
+Tests for the compact JSON renderer.
+"""
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from unittest import skipIf
+from unittest.mock import patch
+from uuid import UUID
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+
+from rest_framework.renderers import JSONRenderer
+
+from core.renderers import CompactJSONRenderer, orjson
+
+
+DATA = {
+    'title': 'Cenote \u2028 tour \u00e9',
+    'price': Decimal('12.50'),
+    'starts': datetime(2024, 5, 1, 9, 30, tzinfo=timezone.utc),
+    'day': date(2024, 5, 1),
+    'id': UUID('12345678123456781234567812345678'),
+    'label': gettext_lazy('Tours'),
+    'counts': {1: 2},
+    'tags': [{'name': 'Food'}, None, True, 1.5],
+}
+
+
+class CompactJSONRendererTests(SimpleTestCase):
+    """Test CompactJSONRenderer renders what JSONRenderer does."""
+
+    @skipIf(orjson is None, 'orjson is not installed.')
+    def test_matches_json_renderer(self):
+        """Test awkward values render byte for byte the same."""
+        self.assertEqual(
+            CompactJSONRenderer().render(DATA), JSONRenderer().render(DATA)
+        )
+
+    @skipIf(orjson is None, 'orjson is not installed.')
+    def test_large_integers_fall_back(self):
+        """Test data orjson rejects is rendered by JSONRenderer."""
+        data = {'includes': [{'item': 'Lunch', 'price': 2 ** 70}]}
+
+        self.assertEqual(
+            CompactJSONRenderer().render(data), JSONRenderer().render(data)
+        )
+
+    def test_indent_falls_back(self):
+        """Test indented output is left to JSONRenderer."""
+        media_type = 'application/json; indent=4'
+
+        self.assertEqual(
+            CompactJSONRenderer().render(DATA, media_type),
+            JSONRenderer().render(DATA, media_type),
+        )
+
+    @patch('core.renderers.orjson', None)
+    def test_without_orjson(self):
+        """Test the renderer works without orjson."""
+        self.assertEqual(
+            CompactJSONRenderer().render(DATA), JSONRenderer().render(DATA)
+        )
@@ -0,0 +1,120 @@
+"""
+Tests for the pre-generated OpenAPI schema.
+"""
+import gzip
+import json
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import SimpleTestCase, override_settings
+from django.urls import reverse
+
+from core.schema import schema_files
+
+
+SCHEMA_URL = reverse('api-schema')
+
+
+class SchemaViewTests(SimpleTestCase):
+    """Test serving the schema file."""
+
+    def setUp(self):
+        schema_files.cache_clear()
+        self.addCleanup(schema_files.cache_clear)
+
+    def test_schema(self):
+        """Test the committed schema is served with an ETag."""
+        res = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res['Content-Type'], 'application/vnd.oai.openapi')
+        self.assertTrue(res.content.startswith(b'openapi: 3.0.3'))
+        self.assertEqual(res['ETag'], schema_files()['yaml'].etag)
+        self.assertIn('Accept-Encoding', res['Vary'])
+
+    def test_not_modified(self):
+        """Test a matching If-None-Match gets an empty 304."""
+        etag = self.client.get(SCHEMA_URL)['ETag']
+
+        res = self.client.get(SCHEMA_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res.content, b'')
+
+    def test_compressed(self):
+        """Test clients accepting gzip get the compressed body."""
+        plain = self.client.get(SCHEMA_URL)
+
+        res = self.client.get(SCHEMA_URL, HTTP_ACCEPT_ENCODING='gzip, br')
+
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+        self.assertLess(len(res.content), len(plain.content))
+        self.assertEqual(gzip.decompress(res.content), plain.content)
+        self.assertNotEqual(res['ETag'], plain['ETag'])
+
+    def test_gzip_refused(self):
+        """Test gzip;q=0 gets the identity body."""
+        res = self.client.get(
+            SCHEMA_URL, HTTP_ACCEPT_ENCODING='gzip;q=0, identity'
+        )
+
+        self.assertNotIn('Content-Encoding', res)
+        self.assertTrue(res.content.startswith(b'openapi: 3.0.3'))
+
+    def test_not_modified_per_encoding(self):
+        """Test an ETag only matches the encoding it was sent with."""
+        etag = self.client.get(SCHEMA_URL)['ETag']
+
+        res = self.client.get(
+            SCHEMA_URL, HTTP_ACCEPT_ENCODING='gzip', HTTP_IF_NONE_MATCH=etag
+        )
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res['Content-Encoding'], 'gzip')
+
+    def test_json(self):
+        """Test ?format=json serves the same schema as JSON."""
+        res = self.client.get(SCHEMA_URL, {'format': 'json'})
+
+        self.assertEqual(res.status_code, 200)
+        self.assertIn('/api/tours/tours/', json.loads(res.content)['paths'])
+        self.assertEqual(
+            self.client.get(SCHEMA_URL, {'format': 'xml'}).status_code, 404
+        )
+
+    def test_generated_when_missing(self):
+        """Test the schema is generated once when there is no file."""
+        with override_settings(OPENAPI_SCHEMA_FILE='/nonexistent.yaml'):
+            res = self.client.get(SCHEMA_URL)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res.content.startswith(b'openapi: 3.0.3'))
+
+
+class BuildSchemaTests(SimpleTestCase):
+    """Test the build_schema command."""
+
+    def test_committed_schema_is_current(self):
+        """Test the committed schema matches the code."""
+        call_command('build_schema', check=True, stdout=StringIO())
+
+    def test_check_fails_on_drift(self):
+        """Test --check fails and writes nothing when the file differs."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'openapi.yaml'
+            with override_settings(OPENAPI_SCHEMA_FILE=path):
+                with self.assertRaises(CommandError):
+                    call_command('build_schema', check=True, stdout=StringIO())
+
+                call_command('build_schema', stdout=StringIO())
+                call_command('build_schema', check=True, stdout=StringIO())
+
+                path.write_text(path.read_text().replace('Tour', 'Trip'))
+                out = StringIO()
+                with self.assertRaises(CommandError):
+                    call_command('build_schema', check=True, stdout=out)
+
+        self.assertIn('+', out.getvalue())
@@ -0,0 +1,218 @@
+"""
+Tests for token-bucket throttling.
+"""
+from io import StringIO
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.throttling import CacheBucketStore, LocalBucketStore, local_buckets
+from tours.tests.test_tour_api import create_superuser, create_tour
+
+
+TAGS_URL = reverse('tours:tag-list')
+TOGGLE_URL = reverse('tours:favorite-tours-toggle')
+TOKEN_URL = reverse('user:token')
+
+
+def throttle_rates(**rates):
+    """Return REST_FRAMEWORK settings with the given rates."""
+    return {
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {
+            **settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'],
+            **rates,
+        },
+    }
+
+
+class BucketStoreTests(SimpleTestCase):
+    """Test the bucket stores."""
+
+    def setUp(self):
+        cache.clear()
+
+    @patch('core.throttling.time.monotonic')
+    def test_local_bucket(self, patched_monotonic):
+        """Test a bucket allows a burst, then refills over time."""
+        patched_monotonic.return_value = 100
+        store = LocalBucketStore(maxsize=10, shards=1)
+
+        for _ in range(3):
+            self.assertEqual(store.consume('a', 2, 3), 0)
+        self.assertEqual(store.consume('a', 2, 3), 2)
+        self.assertEqual(store.consume('b', 2, 3), 0)
+
+        patched_monotonic.return_value = 102
+        self.assertEqual(store.consume('a', 2, 3), 0)
+        self.assertEqual(store.consume('a', 2, 3), 2)
+
+    def test_local_store_is_bounded(self):
+        """Test the least recently used buckets are forgotten."""
+        store = LocalBucketStore(maxsize=2, shards=1)
+        store.consume('a', 60, 1)
+        store.consume('b', 60, 1)
+        store.consume('c', 60, 1)
+
+        self.assertEqual(store.consume('a', 60, 1), 0)
+        self.assertGreater(store.consume('c', 60, 1), 0)
+
+    @patch('core.throttling.time.time')
+    def test_cache_bucket(self, patched_time):
+        """Test the shared store has the same semantics."""
+        patched_time.return_value = 100
+        store = CacheBucketStore(cache)
+
+        for _ in range(3):
+            self.assertEqual(store.consume('a', 2, 3), 0)
+        self.assertEqual(store.consume('a', 2, 3), 2)
+
+        patched_time.return_value = 102
+        self.assertEqual(store.consume('a', 2, 3), 0)
+
+
+class ThrottleTests(TestCase):
+    """Test the default API throttles."""
+
+    def setUp(self):
+        local_buckets.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password='testpass123'
+        )
+
+    def tearDown(self):
+        local_buckets.clear()
+
+    @override_settings(REST_FRAMEWORK=throttle_rates(**{'anon-read': '2/min'}))
+    def test_anonymous_reads_throttled(self):
+        """Test anonymous reads are limited per client address."""
+        for _ in range(2):
+            res = self.client.get(TAGS_URL)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        res = self.client.get(TAGS_URL)
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(res['Retry-After'], '30')
+
+        res = self.client.get(TAGS_URL, REMOTE_ADDR='10.0.0.2')
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+        self.client.force_authenticate(self.user)
+        res = self.client.get(TAGS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(
+        REST_FRAMEWORK=throttle_rates(**{'user-write': '1/min'})
+    )
+    def test_user_writes_throttled(self):
+        """Test writes are limited per user."""
+        tour = create_tour(user=create_superuser())
+        self.client.force_authenticate(self.user)
+
+        res = self.client.post(TOGGLE_URL, {'tour': tour.id})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        res = self.client.post(TOGGLE_URL, {'tour': tour.id})
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        res = self.client.get(TAGS_URL)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    @override_settings(REST_FRAMEWORK=throttle_rates(login='2/min'))
+    def test_token_endpoint_throttled(self):
+        """Test repeated login attempts are turned away."""
+        payload = {'email': 'user@example.com', 'password': 'wrong'}
+        for _ in range(2):
+            res = self.client.post(TOKEN_URL, payload)
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        payload['password'] = 'testpass123'
+        res = self.client.post(TOKEN_URL, payload)
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @override_settings(REST_FRAMEWORK=throttle_rates(login='2/min'))
+    def test_forwarded_for_ignored(self):
+        """Test a client cannot pick its address with X-Forwarded-For."""
+        payload = {'email': 'other@example.com', 'password': 'wrong'}
+        for address in ('10.0.0.1', '10.0.0.2'):
+            res = self.client.post(
+                TOKEN_URL,
+                {**payload, 'email': f'{address}@example.com'},
+                HTTP_X_FORWARDED_FOR=address,
+            )
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(
+            TOKEN_URL, payload, HTTP_X_FORWARDED_FOR='10.0.0.3'
+        )
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @override_settings(REST_FRAMEWORK=throttle_rates(login='2/min'))
+    def test_login_throttled_per_email(self):
+        """Test guessing one account's password from many addresses is
+        turned away."""
+        payload = {'email': 'User@example.com ', 'password': 'wrong'}
+        for i in range(2):
+            res = self.client.post(
+                TOKEN_URL, payload, REMOTE_ADDR=f'10.0.1.{i}'
+            )
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        payload['email'] = 'user@example.com'
+        res = self.client.post(TOKEN_URL, payload, REMOTE_ADDR='10.0.1.9')
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @override_settings(REST_FRAMEWORK=throttle_rates(login='2/min'))
+    def test_login_without_email_object(self):
+        """Test login bodies that are not JSON objects are rejected and
+        limited per client address."""
+        for data in (['user@example.com'], 'user@example.com'):
+            res = self.client.post(TOKEN_URL, data, format='json')
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+        res = self.client.post(TOKEN_URL, [], format='json')
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+    @override_settings(THROTTLE_CACHE_ALIAS='default')
+    @override_settings(REST_FRAMEWORK=throttle_rates(**{'anon-read': '1/min'}))
+    def test_shared_store(self):
+        """Test buckets can be kept in a shared cache."""
+        cache.clear()
+        self.client.get(TAGS_URL)
+
+        res = self.client.get(TAGS_URL)
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+        local_buckets.clear()
+        res = self.client.get(TAGS_URL)
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+
+class BenchmarkThrottlingTests(SimpleTestCase):
+    """Test the benchmark_throttling command."""
+
+    def test_benchmark(self):
+        """Test the command reports both stores and the view overhead."""
+        out = StringIO()
+
+        call_command(
+            'benchmark_throttling',
+            checks=1000,
+            keys=100,
+            threads=2,
+            requests=50,
+            stdout=out,
+        )
+
+        output = out.getvalue()
+        self.assertIn('local store: ', output)
+        self.assertIn('cache default store: ', output)
+        self.assertIn('with the default throttles', output)
@@ -0,0 +1,184 @@
+"""
+Token-bucket request throttling for the APIs.
+
+Each bucket is stored as a single timestamp, the time at which it will
+be full again (GCRA), so checking a request is O(1) in time and memory.
+Rates use DRF's 'num/period' syntax: a bucket holds num requests and
+refills at num per period.
+
+Buckets live in a sharded in-process store, so each worker process
+throttles on its own. Set settings.THROTTLE_CACHE_ALIAS to keep them in
+a shared cache instead, so limits hold across processes.
+"""
+import math
+import threading
+import time
+from collections.abc import Mapping
+
+from django.conf import settings
+from django.core.cache import caches
+
+from rest_framework import permissions
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class LocalBucketStore:
+    """In-process buckets spread over shards with a lock each.
+
+    Each shard keeps up to maxsize / shards buckets and forgets the
+    least recently used one beyond that; a forgotten bucket starts
+    full again.
+    """
+
+    def __init__(self, maxsize, shards=16):
+        self._shards = [({}, threading.Lock()) for _ in range(shards)]
+        self._shard_size = max(maxsize // shards, 1)
+
+    def consume(self, key, interval, burst):
+        """Take one request from the bucket of key and return 0, or the
+        seconds to wait when it is empty."""
+        now = time.monotonic()
+        buckets, lock = self._shards[hash(key) % len(self._shards)]
+        with lock:
+            # Reinserting keeps the dict in least recently used order.
+            full_at = max(buckets.pop(key, now), now)
+            wait = full_at + interval - now - burst * interval
+            if wait <= 0:
+                full_at += interval
+                wait = 0
+            buckets[key] = full_at
+            if len(buckets) > self._shard_size:
+                del buckets[next(iter(buckets))]
+
+        return wait
+
+    def clear(self):
+        """Forget every bucket."""
+        for buckets, lock in self._shards:
+            with lock:
+                buckets.clear()
+
+
+class CacheBucketStore:
+    """Buckets kept in a Django cache shared by every process.
+
+    The read and write are not atomic, so concurrent requests for the
+    same key can occasionally both be let through.
+    """
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def consume(self, key, interval, burst):
+        """Take one request from the bucket of key and return 0, or the
+        seconds to wait when it is empty."""
+        now = time.time()
+        cache_key = f'throttle:{key}'
+        full_at = max(self.cache.get(cache_key, now), now)
+        wait = full_at + interval - now - burst * interval
+        if wait > 0:
+            return wait
+
+        full_at += interval
+        self.cache.set(cache_key, full_at, math.ceil(full_at - now) + 1)
+        return 0
+
+
+local_buckets = LocalBucketStore(maxsize=settings.THROTTLE_LOCAL_MAXSIZE)
+
+
+def bucket_store():
+    """Return the configured bucket store."""
+    if settings.THROTTLE_CACHE_ALIAS is None:
+        return local_buckets
+    return CacheBucketStore(caches[settings.THROTTLE_CACHE_ALIAS])
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """Throttle with a token bucket per scope and get_cache_key()."""
+
+    def get_rate(self):
+        # Read at request time so overridden settings apply.
+        self.THROTTLE_RATES = api_settings.DEFAULT_THROTTLE_RATES
+        return super().get_rate()
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        key = self.get_cache_key(request, view)
+        if key is None:
+            return True
+
+        self._wait = bucket_store().consume(
+            key, self.duration / self.num_requests, self.num_requests
+        )
+        return self._wait == 0
+
+    def wait(self):
+        return self._wait
+
+
+class AnonReadThrottle(TokenBucketThrottle):
+    """Limit safe requests per anonymous client address."""
+    scope = 'anon-read'
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return None
+        if request.method not in permissions.SAFE_METHODS:
+            return None
+        return f'{self.scope}:{self.get_ident(request)}'
+
+
+class UserWriteThrottle(TokenBucketThrottle):
+    """Limit unsafe requests per authenticated user."""
+    scope = 'user-write'
+
+    def get_cache_key(self, request, view):
+        if not (request.user and request.user.is_authenticated):
+            return None
+        if request.method in permissions.SAFE_METHODS:
+            return None
+        return f'{self.scope}:{request.user.pk}'
+
+
+class EndpointThrottle(TokenBucketThrottle):
+    """Limit requests to views with a throttle_scope, per user or
+    client address, like DRF's ScopedRateThrottle."""
+    scope_attr = 'throttle_scope'
+
+    def __init__(self):
+        # The rate depends on the view, so it is set in allow_request.
+        pass
+
+    def allow_request(self, request, view):
+        self.scope = getattr(view, self.scope_attr, None)
+        if not self.scope:
+            return True
+
+        self.rate = self.get_rate()
+        self.num_requests, self.duration = self.parse_rate(self.rate)
+        return super().allow_request(request, view)
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return f'{self.scope}:user:{request.user.pk}'
+        return f'{self.scope}:ip:{self.get_ident(request)}'
+
+
+class LoginThrottle(TokenBucketThrottle):
+    """Limit login attempts per submitted email, on top of the
+    per-client EndpointThrottle, so one account cannot be guessed at
+    from many addresses. Attempts without an email, including bodies
+    that are not JSON objects, are left to the per-client limit."""
+    scope = 'login'
+
+    def get_cache_key(self, request, view):
+        if request.method != 'POST' or not isinstance(request.data, Mapping):
+            return None
+        email = request.data.get('email')
+        if not isinstance(email, str):
+            return None
+        return f'{self.scope}:email:{email.strip().lower()}'
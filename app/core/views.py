@@ -0,0 +1,61 @@
+"""
+Views for the core app.
+"""
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.http import parse_etags
+from django.views.decorators.http import require_GET
+
+from core.metrics import allowed_network, render_metrics
+from core.middleware import negotiate_encoding
+from core.schema import schema_files
+
+
+def metrics_allowed(request):
+    """Return True if request may read the metrics: staff users, and
+    clients in settings.METRICS_ALLOWED_NETWORKS."""
+    return request.user.is_staff or allowed_network(request)
+
+
+@require_GET
+def metrics(request):
+    """Return the request metrics for a Prometheus scraper."""
+    if not settings.PERFORMANCE_METRICS:
+        raise Http404
+    if not metrics_allowed(request):
+        raise PermissionDenied
+
+    return HttpResponse(
+        render_metrics(), content_type='text/plain; version=0.0.4'
+    )
+
+
+@require_GET
+def schema(request):
+    """Return the pre-generated OpenAPI schema, as YAML or, with
+    ?format=json, JSON."""
+    schema_file = schema_files().get(request.GET.get('format', 'yaml'))
+    if schema_file is None:
+        raise Http404
+
+    encoding = negotiate_encoding(
+        request.headers.get('Accept-Encoding', ''), ['gzip']
+    )
+    if encoding:
+        content, etag = schema_file.compressed, schema_file.compressed_etag
+    else:
+        content, etag = schema_file.content, schema_file.etag
+
+    if etag in parse_etags(request.headers.get('If-None-Match', '')):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(content, content_type=schema_file.content_type)
+        if encoding:
+            response['Content-Encoding'] = encoding
+
+    response['ETag'] = etag
+    patch_vary_headers(response, ['Accept-Encoding'])
+    patch_cache_control(response, public=True, no_cache=True)
+    return response
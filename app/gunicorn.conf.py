@@ -0,0 +1,46 @@
+"""
+Gunicorn configuration for serving the app in production.
+
+SERVER_MODE=wsgi (the default) serves app.wsgi with threaded sync
+workers; SERVER_MODE=asgi serves app.asgi with uvicorn workers, one
+event loop per core, for the async views under /api/tours/async/.
+Every value can be overridden from the environment.
+
+Each worker thread holds its own persistent database connection (see
+CONN_MAX_AGE), so PostgreSQL must accept workers * threads connections
+per container.
+"""
+import multiprocessing
+import os
+
+
+cores = multiprocessing.cpu_count()
+asgi = os.environ.get('SERVER_MODE', 'wsgi') == 'asgi'
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+
+if asgi:
+    wsgi_app = 'app.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    workers = int(os.environ.get('WEB_CONCURRENCY', cores))
+    threads = 1
+else:
+    wsgi_app = 'app.wsgi:application'
+    # Threads overlap the time requests spend waiting on PostgreSQL and
+    # the cache, so fewer processes are needed than the classic
+    # 2 * cores + 1 sync workers.
+    worker_class = 'gthread'
+    workers = int(os.environ.get('WEB_CONCURRENCY', cores + 1))
+    threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Recycle workers now and then to bound memory growth, staggered so
+# they do not all restart at once.
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 5000))
+max_requests_jitter = max_requests // 10
+
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = timeout
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+
+accesslog = '-'
+errorlog = '-'
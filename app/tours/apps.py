@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class ToursConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'tours'
+
+    def ready(self):
+        """Connect the catalogue cache signal handlers."""
+        from tours import signals  # noqa: F401
@@ -0,0 +1,63 @@
+"""
+Async entry points for the read-only tour APIs.
+
+Under ASGI, Django runs every sync view on one shared thread per
+process, so a slow request holds up every other one. These views run
+the regular DRF views on the default executor instead, leaving the event
+loop free to multiplex many slow clients while the views themselves,
+their cache, pagination and rendering, stay unchanged. Under WSGI they
+behave like the sync views.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+
+from core.db import close_unusable_connections
+from tours.views import TourViewSet, TagViewSet
+
+
+def _run_view(view, request, *args, **kwargs):
+    """Call view and render its response on a worker thread."""
+    # Worker threads keep their own connections, which request_started
+    # and request_finished never see.
+    close_old_connections()
+    close_unusable_connections()
+    try:
+        response = view(request, *args, **kwargs)
+        if hasattr(response, 'render'):
+            response.render()
+        return response
+    finally:
+        close_old_connections()
+
+
+# Under WSGI every request runs in a new event loop, whose default
+# executor is shut down with it, leaking the connections its threads
+# opened. A long-lived pool keeps them persistent instead.
+executor = ThreadPoolExecutor(thread_name_prefix='tours-async')
+
+
+def async_view(view):
+    """Return an async view running view off the event loop thread."""
+    run = sync_to_async(
+        partial(_run_view, view), thread_sensitive=False, executor=executor
+    )
+
+    async def wrapper(request, *args, **kwargs):
+        return await run(request, *args, **kwargs)
+
+    wrapper.csrf_exempt = getattr(view, 'csrf_exempt', False)
+    return wrapper
+
+
+tour_list = async_view(
+    TourViewSet.as_view({'get': 'list'}, basename='tours', detail=False)
+)
+tour_detail = async_view(
+    TourViewSet.as_view({'get': 'retrieve'}, basename='tours', detail=True)
+)
+tag_list = async_view(
+    TagViewSet.as_view({'get': 'list'}, basename='tag', detail=False)
+)
@@ -0,0 +1,137 @@
+"""
+Helpers for seeding data and settings in benchmark and query-plan
+commands.
+"""
+from contextlib import contextmanager
+from decimal import Decimal
+from uuid import uuid4
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.test.utils import override_settings
+
+from rest_framework.settings import api_settings
+
+from core.models import (
+    Tours,
+    Tag,
+    PricingOption,
+    FavoriteTour,
+    TourSummary,
+)
+from tours.cache import bump_catalogue, bump_popularity, bump_tags
+
+
+BATCH_SIZE = 1000
+# Seeded titles and descriptions draw from these so that search has a
+# realistic spread of selective and common terms.
+WORDS = (
+    'beach', 'reef', 'snorkel', 'jungle', 'cenote', 'ruins', 'mayan',
+    'sunset', 'sailing', 'kayak', 'diving', 'tequila', 'cooking', 'market',
+    'island', 'lagoon', 'turtle', 'dolphin', 'fishing', 'cycling',
+    'history', 'village', 'chocolate', 'temple', 'waterfall', 'cave',
+    'wildlife', 'birdwatching', 'catamaran', 'night',
+)
+
+
+@contextmanager
+def rolled_back():
+    """Run a block in a transaction that is always rolled back.
+
+    Seeded rows are created with bulk_create, which sends no signals, so
+    the catalogue cache is invalidated afterwards as well.
+    """
+    try:
+        with transaction.atomic():
+            yield
+            transaction.set_rollback(True)
+    finally:
+        bump_catalogue()
+        bump_popularity()
+        bump_tags()
+
+
+def unthrottled():
+    """Return an override_settings disabling every throttle rate, for
+    benchmarks replaying many requests from one client."""
+    rates = {scope: None for scope in api_settings.DEFAULT_THROTTLE_RATES}
+    return override_settings(REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': rates,
+    })
+
+
+def seed_catalogue(rows, tags_per_tour=2, options_per_tour=2):
+    """Create a user owning rows tours with pricing options, tags and
+    favorites, and return the user."""
+    user = get_user_model().objects.create_user(
+        email=f'benchmark-{uuid4().hex}@example.com',
+        password='benchmarkpass123',
+        is_staff=True,
+        is_superuser=True,
+    )
+
+    tags = Tag.objects.bulk_create(
+        [Tag(name=f'Tag {i}') for i in range(max(rows // 10, 10))],
+        batch_size=BATCH_SIZE,
+    )
+    tours = Tours.objects.bulk_create(
+        [
+            Tours(
+                user=user,
+                title='{} {} tour {}'.format(
+                    WORDS[i % len(WORDS)].title(),
+                    WORDS[i * 7 % len(WORDS)],
+                    i,
+                ),
+                description='<p>Seeded {} and {} for tour {}.</p>'.format(
+                    WORDS[i * 3 % len(WORDS)],
+                    WORDS[i * 11 % len(WORDS)],
+                    i,
+                ),
+                time_minutes=30 + i % 240,
+                link=f'https://example.com/tours/{i}',
+            )
+            for i in range(rows)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+
+    PricingOption.objects.bulk_create(
+        [
+            PricingOption(
+                tour=tour,
+                option_name=f'Option {n}',
+                option_price=Decimal(50 + (i + n) % 450),
+                discount_percentage=Decimal(n * 5),
+                special_price=Decimal(50 + (i + n) % 450) * (
+                    100 - n * 5
+                ) / 100,
+            )
+            for i, tour in enumerate(tours)
+            for n in range(options_per_tour)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    Tours.tags.through.objects.bulk_create(
+        [
+            Tours.tags.through(
+                tours_id=tour.pk,
+                tag_id=tags[(i + n) % len(tags)].pk,
+            )
+            for i, tour in enumerate(tours)
+            for n in range(tags_per_tour)
+        ],
+        batch_size=BATCH_SIZE,
+    )
+    FavoriteTour.objects.bulk_create(
+        [FavoriteTour(user=user, tour=tour) for tour in tours[::10]],
+        batch_size=BATCH_SIZE,
+    )
+    Tours.objects.filter(user=user).update_derived_fields()
+    TourSummary.objects.refresh(
+        Tours.objects.filter(user=user).values('pk')
+    )
+
+    return user
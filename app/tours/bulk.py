@@ -0,0 +1,330 @@
+"""
+Streaming bulk import and export of tours.
+
+Feeds are JSON Lines or CSV, one tour per row:
+
+    {"title": "...", "description": "...", "time_minutes": 60,
+     "link": "", "tags": ["Beach"],
+     "pricing_options": [{"option_name": "Standard",
+                          "option_price": "100.00"}]}
+
+In CSV, tags are joined with "|" and pricing_options is a JSON array.
+"""
+import csv
+import hashlib
+import io
+import json
+from decimal import Decimal
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import DatabaseError, transaction
+
+from core.models import (
+    Tours,
+    Tag,
+    PricingOption,
+    TourImport,
+    TourSummary,
+)
+from tours.cache import bump_catalogue, bump_tags
+
+
+FORMATS = ('jsonl', 'csv')
+CSV_FIELDS = [
+    'title', 'description', 'time_minutes', 'link', 'tags',
+    'pricing_options',
+]
+TAG_SEPARATOR = '|'
+PRICING_FIELDS = [
+    'option_name', 'option_price', 'special_price', 'discount_percentage',
+    'includes',
+]
+DEFAULT_BATCH_SIZE = 1000
+# Fields checked against their model constraints before inserting; the
+# description may be empty in feeds.
+TOUR_FIELDS = ['title', 'time_minutes', 'link']
+
+
+class TourImportError(ValueError):
+    """Raised when a feed row cannot be imported."""
+
+
+def feed_fingerprint(stream, chunk_size=1 << 16):
+    """Return the size and SHA-256 of a binary feed stream, rewound to
+    the start afterwards."""
+    digest = hashlib.sha256()
+    size = 0
+    for chunk in iter(lambda: stream.read(chunk_size), b''):
+        digest.update(chunk)
+        size += len(chunk)
+    stream.seek(0)
+
+    return f'{size}:{digest.hexdigest()}'
+
+
+def guess_format(filename):
+    """Return the feed format implied by a file name."""
+    return 'csv' if filename.lower().endswith('.csv') else 'jsonl'
+
+
+def _numbered(rows):
+    """Yield (number, row) pairs, failing on undecodable input."""
+    iterator = iter(rows)
+    number = 1
+    while True:
+        try:
+            row = next(iterator)
+        except StopIteration:
+            return
+        except UnicodeDecodeError as exc:
+            raise TourImportError(f'Row {number}: invalid UTF-8 ({exc}).')
+        except csv.Error as exc:
+            raise TourImportError(f'Row {number}: {exc}.')
+        yield number, row
+        number += 1
+
+
+def read_rows(stream, file_format):
+    """Yield tour dicts from a text stream of JSON Lines or CSV."""
+    if file_format == 'csv':
+        rows = csv.DictReader(stream)
+    else:
+        rows = (line for line in stream if line.strip())
+
+    for number, row in _numbered(rows):
+        try:
+            if file_format == 'csv':
+                tags = row.get('tags') or ''
+                row['tags'] = [tag for tag in tags.split(TAG_SEPARATOR) if tag]
+                row['pricing_options'] = json.loads(
+                    row.get('pricing_options') or '[]'
+                )
+            else:
+                row = json.loads(row)
+        except ValueError as exc:
+            raise TourImportError(f'Row {number}: {exc}.')
+        yield row
+
+
+def _batches(iterable, size):
+    """Yield lists of up to size items."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _resolve_tags(names):
+    """Return a name -> id map, creating missing tags in one insert."""
+    tag_ids = dict(
+        Tag.objects.filter(name__in=names).values_list('name', 'id')
+    )
+    missing = [Tag(name=name) for name in names if name not in tag_ids]
+    for tag in Tag.objects.bulk_create(missing):
+        tag_ids[tag.name] = tag.id
+
+    return tag_ids
+
+
+def _decimal(value):
+    """Return value as a Decimal, keeping None."""
+    return None if value in (None, '') else Decimal(str(value))
+
+
+def _validate(instance, fields):
+    """Check fields of instance against their model constraints."""
+    instance.clean_fields(exclude=[
+        field.name for field in instance._meta.fields
+        if field.name not in fields
+    ])
+
+
+def _tag_names(value):
+    """Return the distinct tag names of a feed row's tags, in order."""
+    if not value:
+        return []
+    if not isinstance(value, list) or not all(
+        isinstance(name, (str, int)) and not isinstance(name, bool)
+        for name in value
+    ):
+        raise ValidationError({'tags': ['Must be a list of tag names.']})
+
+    return list(dict.fromkeys(str(name) for name in value))
+
+
+def _build_tour(row, user):
+    """Return an unsaved, validated tour, its pricing options and its tag
+    names for a feed row."""
+    tour = Tours(
+        user=user,
+        title=row['title'],
+        description=row.get('description') or '',
+        time_minutes=int(row['time_minutes']),
+        link=row.get('link') or '',
+    )
+    _validate(tour, TOUR_FIELDS)
+    options = []
+    for data in row.get('pricing_options') or []:
+        option = PricingOption(
+            tour=tour,
+            option_name=data['option_name'],
+            option_price=Decimal(str(data['option_price'])),
+            special_price=_decimal(data.get('special_price')),
+            discount_percentage=_decimal(data.get('discount_percentage')),
+            includes=data.get('includes'),
+        )
+        option.calculate_prices()
+        _validate(option, PRICING_FIELDS)
+        options.append(option)
+
+    return tour, options, _tag_names(row.get('tags'))
+
+
+def _import_batch(rows, user, first_row):
+    """Insert one batch of tours with their pricing options and tags."""
+    tours, options, row_tags = [], [], []
+    for number, row in enumerate(rows, start=first_row):
+        try:
+            tour, tour_options, tags = _build_tour(row, user)
+        except ValidationError as exc:
+            errors = '; '.join(
+                f'{field}: {" ".join(messages)}'
+                for field, messages in exc.message_dict.items()
+            )
+            raise TourImportError(f'Row {number}: invalid tour ({errors}).')
+        except (KeyError, TypeError, ValueError, ArithmeticError) as exc:
+            raise TourImportError(f'Row {number}: invalid tour ({exc!r}).')
+        tours.append(tour)
+        options.extend(tour_options)
+        row_tags.append(tags)
+
+    try:
+        _insert_batch(tours, options, row_tags)
+    except DatabaseError as exc:
+        # Whatever validation missed, e.g. an over-long tag name.
+        last_row = first_row + len(rows) - 1
+        raise TourImportError(
+            f'Rows {first_row}-{last_row}: rejected by the database '
+            f'({exc}).'
+        )
+
+
+def _insert_batch(tours, options, row_tags):
+    """Insert tours, their pricing options and the tags named in
+    row_tags, and rebuild their derived columns and summaries."""
+    Tours.objects.bulk_create(tours)
+    PricingOption.objects.bulk_create(options)
+
+    tag_ids = _resolve_tags({name for names in row_tags for name in names})
+    Tours.tags.through.objects.bulk_create([
+        Tours.tags.through(tours_id=tour.id, tag_id=tag_ids[name])
+        for tour, names in zip(tours, row_tags)
+        for name in names
+    ])
+    tour_ids = [tour.id for tour in tours]
+    Tours.objects.filter(pk__in=tour_ids).update_derived_fields()
+    TourSummary.objects.refresh(tour_ids)
+
+
+def import_tours(rows, user, name, batch_size=DEFAULT_BATCH_SIZE,
+                 fingerprint=''):
+    """Import tours from rows in batches and return the number imported.
+
+    Each batch commits together with the checkpoint named name, so a
+    failed import can be rerun with the same name and resumes after the
+    last committed batch. A checkpoint started with a feed_fingerprint()
+    only resumes the same feed, and a completed one is never rerun.
+    """
+    checkpoint, _ = TourImport.objects.get_or_create(
+        name=name, defaults={'user': user, 'fingerprint': fingerprint}
+    )
+    if (fingerprint and checkpoint.fingerprint
+            and fingerprint != checkpoint.fingerprint):
+        raise TourImportError(
+            f'Import {name!r} was started from a different feed; '
+            'use another name.'
+        )
+    if checkpoint.completed:
+        raise TourImportError(f'Import {name!r} has already completed.')
+
+    start = checkpoint.rows_imported
+    imported = 0
+    rows = islice(rows, start, None)
+    for batch in _batches(rows, batch_size):
+        with transaction.atomic():
+            checkpoint = TourImport.objects.select_for_update().get(
+                pk=checkpoint.pk
+            )
+            if checkpoint.rows_imported != start + imported:
+                raise TourImportError(
+                    f'Import {name!r} is being run concurrently.'
+                )
+            _import_batch(batch, user, start + imported + 1)
+            imported += len(batch)
+            checkpoint.rows_imported = start + imported
+            checkpoint.save(update_fields=['rows_imported', 'updated_at'])
+        # bulk_create sends no signals, so invalidate explicitly.
+        bump_catalogue()
+        bump_tags()
+
+    checkpoint.completed = True
+    checkpoint.save(update_fields=['completed', 'updated_at'])
+
+    return imported
+
+
+def _export_chunk(tours):
+    """Attach pricing options and tag names to a chunk of tour rows."""
+    ids = [tour['id'] for tour in tours]
+    options = {tour_id: [] for tour_id in ids}
+    for option in PricingOption.objects.filter(
+        tour_id__in=ids
+    ).order_by('id').values('tour_id', *PRICING_FIELDS):
+        options[option.pop('tour_id')].append(option)
+    tags = {tour_id: [] for tour_id in ids}
+    for tour_id, tag_name in Tours.tags.through.objects.filter(
+        tours_id__in=ids
+    ).order_by('id').values_list('tours_id', 'tag__name'):
+        tags[tour_id].append(tag_name)
+
+    for tour in tours:
+        tour_id = tour.pop('id')
+        tour['tags'] = tags[tour_id]
+        tour['pricing_options'] = options[tour_id]
+        yield tour
+
+
+def export_tours(file_format='jsonl', chunk_size=DEFAULT_BATCH_SIZE):
+    """Yield the catalogue as lines of JSON Lines or CSV.
+
+    Tours are streamed with .iterator() and their related rows are
+    fetched one chunk at a time, so memory use does not grow with the
+    size of the catalogue.
+    """
+    tours = Tours.objects.order_by('id').values(
+        'id', 'title', 'description', 'time_minutes', 'link'
+    ).iterator(chunk_size=chunk_size)
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS)
+    if file_format == 'csv':
+        writer.writeheader()
+        yield buffer.getvalue()
+
+    for chunk in _batches(tours, chunk_size):
+        for tour in _export_chunk(chunk):
+            if file_format == 'csv':
+                buffer.seek(0)
+                buffer.truncate()
+                tour['tags'] = TAG_SEPARATOR.join(tour['tags'])
+                tour['pricing_options'] = json.dumps(
+                    tour['pricing_options'], cls=DjangoJSONEncoder
+                )
+                writer.writerow(tour)
+                yield buffer.getvalue()
+            else:
+                yield json.dumps(tour, cls=DjangoJSONEncoder) + '\n'
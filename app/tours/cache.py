@@ -0,0 +1,177 @@
+"""
+Versioned response cache for the tour catalogue.
+
+Cached responses are keyed by version counters rather than expired
+explicitly: every write bumps the global catalogue version and the
+version of each affected tour (see tours.signals), so stale entries are
+simply never looked up again and age out of the cache backend.
+
+Favorites, which change far more often than tours, only bump the
+popularity version of the popular ranking, so tour listings keep their
+cached pages and show new favorite counts once they are next rebuilt.
+Tags have a version of their own for the tag list.
+"""
+import hashlib
+import time
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from rest_framework import status
+from rest_framework.response import Response
+
+from core.routers import reads_from_primary
+
+
+CATALOGUE_VERSION_KEY = 'tours:version:catalogue'
+POPULARITY_VERSION_KEY = 'tours:version:popularity'
+TAGS_VERSION_KEY = 'tours:version:tags'
+
+
+def get_cache():
+    """Return the cache backend used for the tour catalogue."""
+    return caches[settings.TOURS_CACHE_ALIAS]
+
+
+def tour_version_key(tour_id):
+    """Return the version counter key for a tour."""
+    return f'tours:version:tour:{tour_id}'
+
+
+def _initial_version():
+    """Return a starting value newer than any evicted counter."""
+    return time.time_ns() // 1000
+
+
+def get_version(key):
+    """Return the current value of a version counter."""
+    cache = get_cache()
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _initial_version(), None)
+        version = cache.get(key, _initial_version())
+
+    return version
+
+
+def bump_version(key):
+    """Invalidate everything cached under a version counter."""
+    cache = get_cache()
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _initial_version(), None)
+
+
+def _bump_versions(keys):
+    for key in keys:
+        bump_version(key)
+
+
+def bump_catalogue(tour_ids=()):
+    """Invalidate the catalogue listings and the given tours once the
+    current transaction commits.
+
+    Bumping earlier would let a concurrent request read the new version
+    with the old rows and cache them under it.
+    """
+    keys = {CATALOGUE_VERSION_KEY, *map(tour_version_key, tour_ids)}
+    transaction.on_commit(partial(_bump_versions, keys))
+
+
+def bump_popularity():
+    """Invalidate the popular ranking once the current transaction
+    commits."""
+    transaction.on_commit(partial(_bump_versions, [POPULARITY_VERSION_KEY]))
+
+
+def bump_tags():
+    """Invalidate the tag list once the current transaction commits."""
+    transaction.on_commit(partial(_bump_versions, [TAGS_VERSION_KEY]))
+
+
+class CatalogueCacheMixin:
+    """Serve list and retrieve responses from the versioned cache."""
+
+    def list(self, request, *args, **kwargs):
+        """Return the cached tour listing."""
+        version = get_version(CATALOGUE_VERSION_KEY)
+        return self.cached_response(
+            request, version, super().list, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        """Return the cached tour detail."""
+        # Writes bump the version of the integer pk, so /tours/01/ must
+        # read the same counter as /tours/1/.
+        try:
+            tour_id = int(kwargs[self.lookup_url_kwarg or self.lookup_field])
+        except (TypeError, ValueError):
+            raise Http404
+        version = get_version(tour_version_key(tour_id))
+        return self.cached_response(
+            request, version, super().retrieve, *args, **kwargs
+        )
+
+    def response_cache_key(self, request, version):
+        """Return the cache key for a response at the given version."""
+        # Cached pages hold absolute next/previous links, so the scheme
+        # and host are part of the key as well as the path.
+        url = hashlib.md5(
+            request.build_absolute_uri().encode('utf-8')
+        ).hexdigest()
+        return 'tours:response:{}:{}:{}:{}:{}'.format(
+            self.basename,
+            self.action,
+            request.accepted_renderer.format,
+            version,
+            url,
+        )
+
+    def cached_response(self, request, version, handler, *args, **kwargs):
+        """Return a 304, a cached response or a freshly built one."""
+        key = self.response_cache_key(request, version)
+        etag = 'W/"{}"'.format(hashlib.md5(key.encode('utf-8')).hexdigest())
+
+        cache = get_cache()
+        entry = cache.get(key)
+        last_modified = None
+        if entry is not None and entry['last_modified']:
+            last_modified = parse_http_date_safe(entry['last_modified'])
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None and entry is not None:
+            response = Response(entry['data'])
+            if entry['last_modified']:
+                response['Last-Modified'] = entry['last_modified']
+        elif response is None:
+            # Entries are shared by every reader until the next bump, so
+            # they are built from the primary: a lagging replica could
+            # still return the rows the bump was for.
+            with reads_from_primary():
+                response = handler(request, *args, **kwargs)
+            if not isinstance(response, Response):
+                # Streamed listings, sent whole under ASGI, carry no data
+                # and are never buffered into the cache.
+                pass
+            elif response.status_code == status.HTTP_200_OK:
+                cache.set(
+                    key,
+                    {
+                        'data': response.data,
+                        'last_modified': response.get('Last-Modified'),
+                    },
+                    settings.TOURS_CACHE_TIMEOUT,
+                )
+            elif response.status_code != status.HTTP_304_NOT_MODIFIED:
+                return response
+
+        response['ETag'] = etag
+        return response
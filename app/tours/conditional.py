@@ -0,0 +1,121 @@
+"""
+Conditional GET support for the tour APIs.
+"""
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from rest_framework import status
+
+from tours.cache import CATALOGUE_VERSION_KEY, get_version
+
+
+class ConditionalGetMixin:
+    """Answer If-None-Match on list, and If-None-Match and
+    If-Modified-Since on retrieve.
+
+    List ETags come from the version counter named by list_version_key,
+    bumped on every write (see tours.signals), so checking one reads the
+    cache, not the table.
+    Lists have no Last-Modified, as deletes leave no timestamp behind.
+    Detail validators come from a single aggregate query over the
+    object's updated_at timestamps. Either way a 304 never loads or
+    serializes rows.
+    """
+    conditional_actions = ('list', 'retrieve')
+    list_version_key = CATALOGUE_VERSION_KEY
+    detail_modified_fields = ('updated_at',)
+
+    def list(self, request, *args, **kwargs):
+        """Return the listing unless the client copy is current."""
+        if 'list' not in self.conditional_actions:
+            return super().list(request, *args, **kwargs)
+
+        source = '{}:{}:{}:{}'.format(
+            self.basename,
+            request.get_full_path(),
+            request.accepted_renderer.format,
+            get_version(self.list_version_key),
+        )
+        etag = 'W/"{}"'.format(hashlib.md5(source.encode('utf-8')).hexdigest())
+
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = super().list(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+
+        response['ETag'] = etag
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        """Return the object unless the client copy is current."""
+        if 'retrieve' not in self.conditional_actions:
+            return super().retrieve(request, *args, **kwargs)
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        # Like get_object_or_404(), a lookup value of the wrong type is
+        # a missing object, not a server error.
+        try:
+            queryset = self.filter_queryset(self.get_queryset()).filter(
+                **{self.lookup_field: kwargs[lookup_url_kwarg]}
+            )
+        except (TypeError, ValueError, ValidationError):
+            raise Http404
+        return self.conditional_response(
+            request,
+            queryset,
+            self.detail_modified_fields,
+            super().retrieve,
+            *args,
+            **kwargs,
+        )
+
+    def get_validators(self, request, queryset, fields):
+        """Return the ETag and Last-Modified datetime for queryset,
+        or (None, None) when it is empty."""
+        aggregates = queryset.order_by().aggregate(
+            count=Count('pk'),
+            **{f'modified_{i}': Max(field) for i, field in enumerate(fields)}
+        )
+        count = aggregates.pop('count')
+        if not count:
+            return None, None
+        last_modified = max(
+            value for value in aggregates.values() if value is not None
+        )
+
+        source = '{}:{}:{}:{}'.format(
+            request.get_full_path(),
+            request.accepted_renderer.format,
+            count,
+            last_modified.isoformat(),
+        )
+        etag = 'W/"{}"'.format(hashlib.md5(source.encode('utf-8')).hexdigest())
+
+        return etag, last_modified
+
+    def conditional_response(self, request, queryset, fields, handler,
+                             *args, **kwargs):
+        """Return a 304 or delegate to handler and add validators."""
+        etag, last_modified = self.get_validators(request, queryset, fields)
+        if etag is None:
+            return handler(request, *args, **kwargs)
+        timestamp = int(last_modified.timestamp())
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if response is None:
+            response = handler(request, *args, **kwargs)
+            if response.status_code != status.HTTP_200_OK:
+                return response
+
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(timestamp)
+
+        return response
@@ -0,0 +1,136 @@
+"""
+Read paths for the tour APIs that bypass ModelSerializer.
+
+Rows are fetched with .values() and nested relations are grouped onto
+them in one pass per relation, producing the same representation as
+TourSummarySerializer, TourSerializer and TourDetailSerializer.
+"""
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.http import Http404
+
+from rest_framework.response import Response
+
+from core.models import (
+    CENT,
+    Tours,
+    PricingOption,
+)
+from tours.serializers import (
+    TourSummarySerializer,
+    TourSerializer,
+    TourDetailSerializer,
+    PricingOptionSerializer,
+    TagSerializer,
+)
+
+
+NESTED_FIELDS = ('pricing_options', 'tags')
+TOUR_FIELDS = tuple(TourSerializer.Meta.fields)
+TOUR_DETAIL_FIELDS = tuple(
+    name for name in TourDetailSerializer.Meta.fields
+    if name not in NESTED_FIELDS
+)
+PRICING_OPTION_FIELDS = tuple(PricingOptionSerializer.Meta.fields)
+DECIMAL_FIELDS = ('option_price', 'special_price', 'discount_percentage')
+SUMMARY_SOURCES = tuple(
+    (name, field.source)
+    for name, field in TourSummarySerializer().fields.items()
+)
+SUMMARY_DECIMAL_FIELDS = ('min_price', 'max_price')
+TAG_FIELDS = tuple(TagSerializer.Meta.fields)
+
+
+def decimal_string(value):
+    """Format a Decimal the way serializers.DecimalField does."""
+    return None if value is None else '{:f}'.format(value.quantize(CENT))
+
+
+def summary_rows(queryset):
+    """Return a .values() queryset of tour summary columns."""
+    return queryset.values(*(source for _, source in SUMMARY_SOURCES))
+
+
+def summary_representation(rows):
+    """Return TourSummarySerializer output for summary_rows() rows."""
+    data = []
+    for row in rows:
+        item = {name: row[source] for name, source in SUMMARY_SOURCES}
+        for name in SUMMARY_DECIMAL_FIELDS:
+            item[name] = decimal_string(item[name])
+        data.append(item)
+
+    return data
+
+
+def summary_chunks(queryset, chunk_size):
+    """Yield summary_representation() lists for queryset, reading
+    chunk_size rows at a time with .iterator()."""
+    rows = summary_rows(queryset).iterator(chunk_size=chunk_size)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield summary_representation(chunk)
+
+
+def tour_rows(queryset):
+    """Return a .values() queryset of TourSerializer output."""
+    return queryset.prefetch_related(None).values(*TOUR_FIELDS)
+
+
+def tour_detail_rows(queryset):
+    """Return a list of TourDetailSerializer output for queryset."""
+    tours = list(
+        queryset.prefetch_related(None).values(*TOUR_DETAIL_FIELDS)
+    )
+    by_id = {}
+    for tour in tours:
+        tour['pricing_options'] = []
+        tour['tags'] = []
+        by_id[tour['id']] = tour
+
+    for option in PricingOption.objects.filter(
+        tour_id__in=by_id
+    ).order_by('id').values('tour_id', *PRICING_OPTION_FIELDS):
+        for name in DECIMAL_FIELDS:
+            option[name] = decimal_string(option[name])
+        by_id[option.pop('tour_id')]['pricing_options'].append(option)
+
+    tag_lookups = ['tag__' + name for name in TAG_FIELDS]
+    for tour_id, *tag in Tours.tags.through.objects.filter(
+        tours_id__in=by_id
+    ).order_by('tag_id').values_list('tours_id', *tag_lookups):
+        by_id[tour_id]['tags'].append(dict(zip(TAG_FIELDS, tag)))
+
+    return tours
+
+
+class FastTourReadMixin:
+    """Serve the tour list from summary rows and retrieve from .values()
+    rows."""
+
+    def list(self, request, *args, **kwargs):
+        """Return the tour listing."""
+        rows = summary_rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is not None:
+            return self.get_paginated_response(summary_representation(page))
+
+        return Response(summary_representation(rows))
+
+    def retrieve(self, request, *args, **kwargs):
+        """Return a tour with its pricing options and tags."""
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            queryset = self.filter_queryset(self.get_queryset()).filter(
+                **{self.lookup_field: kwargs[lookup_url_kwarg]}
+            )
+        except (TypeError, ValueError, ValidationError):
+            raise Http404
+        rows = tour_detail_rows(queryset)
+        if not rows:
+            raise Http404
+
+        return Response(rows[0])
@@ -0,0 +1,162 @@
+"""
+Faceted filtering for the tour APIs.
+"""
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import connections
+
+from rest_framework.exceptions import ValidationError
+from rest_framework.filters import BaseFilterBackend
+
+from core.models import Tours, Tag, TourSummary
+from tours.fast import decimal_string
+
+
+def _parse(request, name, parse):
+    """Return query parameter name converted with parse, or None."""
+    value = request.query_params.get(name, '').strip()
+    if not value:
+        return None
+    try:
+        return parse(value)
+    except (ValueError, InvalidOperation):
+        raise ValidationError({name: [f'Invalid value: {value!r}.']})
+
+
+# Ids are bigint primary keys.
+MAX_ID = 2 ** 63 - 1
+
+
+def _id(value):
+    """Parse a positive id that fits in a bigint."""
+    pk = int(value)
+    if not 0 < pk <= MAX_ID:
+        raise ValueError(value)
+    return pk
+
+
+def _id_list(value):
+    """Parse a comma-separated list of ids."""
+    return sorted({_id(pk) for pk in value.split(',') if pk})
+
+
+def _parse_ids(request, name):
+    """Return query parameter name as a list of ids, or None."""
+    ids = _parse(request, name, _id_list)
+    if ids and len(ids) > settings.TOURS_FILTER_MAX_IDS:
+        raise ValidationError({name: [
+            f'At most {settings.TOURS_FILTER_MAX_IDS} ids are allowed.'
+        ]})
+    return ids
+
+
+class TourFilterBackend(BaseFilterBackend):
+    """Filter tours by id, tags, duration and price.
+
+    ?ids=1,2 keeps only the listed tours, ?tags=1,2 keeps tours having
+    every listed tag, min_minutes and max_minutes bound time_minutes,
+    and min_price and max_price bound the cheapest pricing option
+    (Tours.min_price). All bounds are inclusive. Id lists take at most
+    settings.TOURS_FILTER_MAX_IDS ids. Works on Tours and TourSummary
+    querysets.
+    """
+    parameters = (
+        ('ids', 'Comma-separated tour ids to fetch in one request.'),
+        ('tags', 'Comma-separated tag ids; tours must have all of them.'),
+        ('min_minutes', 'Minimum duration in minutes.'),
+        ('max_minutes', 'Maximum duration in minutes.'),
+        ('min_price', 'Minimum price of the cheapest pricing option.'),
+        ('max_price', 'Maximum price of the cheapest pricing option.'),
+    )
+
+    def filter_queryset(self, request, queryset, view):
+        tour_ids = _parse_ids(request, 'ids')
+        if tour_ids is not None:
+            queryset = queryset.filter(id__in=tour_ids)
+
+        tag_ids = _parse_ids(request, 'tags')
+        if tag_ids and queryset.model is TourSummary:
+            queryset = queryset.filter(tag_ids__contains=tag_ids)
+        else:
+            for tag_id in tag_ids or ():
+                queryset = queryset.filter(tags=tag_id)
+
+        bounds = {
+            'time_minutes__gte': _parse(request, 'min_minutes', int),
+            'time_minutes__lte': _parse(request, 'max_minutes', int),
+            'min_price__gte': _parse(request, 'min_price', Decimal),
+            'min_price__lte': _parse(request, 'max_price', Decimal),
+        }
+        return queryset.filter(**{
+            lookup: value for lookup, value in bounds.items()
+            if value is not None
+        })
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': name,
+                'required': False,
+                'in': 'query',
+                'description': description,
+                'schema': {'type': 'string'},
+            }
+            for name, description in self.parameters
+        ]
+
+
+FACETS_SQL = """
+WITH matched AS ({matched})
+SELECT 'tag', tag.id, tag.name, COUNT(*)
+FROM matched
+JOIN {through} link ON link.tours_id = matched.id
+JOIN {tag} tag ON tag.id = link.tag_id
+GROUP BY tag.id, tag.name
+UNION ALL
+SELECT 'price', WIDTH_BUCKET(matched.min_price, %s::numeric[]), NULL,
+       COUNT(*)
+FROM matched
+WHERE matched.min_price IS NOT NULL
+GROUP BY 2
+UNION ALL
+SELECT 'total', NULL, NULL, COUNT(*) FROM matched
+"""
+
+
+def facet_counts(queryset):
+    """Return the number of tours in queryset per tag and per price
+    bucket, computed in one query.
+
+    Price buckets are bounded by settings.TOURS_PRICE_BUCKETS; the
+    first has no minimum and the last no maximum.
+    """
+    matched, params = queryset.order_by().values(
+        'id', 'min_price'
+    ).query.sql_with_params()
+    sql = FACETS_SQL.format(
+        matched=matched,
+        through=Tours.tags.through._meta.db_table,
+        tag=Tag._meta.db_table,
+    )
+    boundaries = [Decimal(bound) for bound in settings.TOURS_PRICE_BUCKETS]
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, [*params, boundaries])
+        rows = cursor.fetchall()
+
+    limits = [None, *boundaries, None]
+    prices = [
+        {'min': decimal_string(low), 'max': decimal_string(high), 'count': 0}
+        for low, high in zip(limits, limits[1:])
+    ]
+    tags, total = [], 0
+    for facet, key, name, count in rows:
+        if facet == 'tag':
+            tags.append({'id': key, 'name': name, 'count': count})
+        elif facet == 'price':
+            prices[key]['count'] = count
+        else:
+            total = count
+    tags.sort(key=lambda tag: (-tag['count'], tag['name'], tag['id']))
+
+    return {'count': total, 'tags': tags, 'prices': prices}
@@ -0,0 +1,127 @@
+"""
+Django command to measure the cost of per-request database connections.
+"""
+import io
+import time
+
+from django.conf import settings
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from tours.benchmark import unthrottled
+
+
+def wsgi_environ(path):
+    """Return a minimal WSGI environ for GET path."""
+    return {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': 'testserver',
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_ACCEPT': 'application/json',
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': io.StringIO(),
+        'wsgi.multithread': False,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+
+
+class Command(BaseCommand):
+    """Django command to compare per-request and persistent
+    connections."""
+    help = (
+        'Serve the same GET repeatedly through the WSGI handler, once '
+        'with CONN_MAX_AGE=0 and once with the configured CONN_MAX_AGE, '
+        'and report the connections opened and the time per request. '
+        'Throttling is disabled for the run. Fails if persistent '
+        'connections are reopened per request.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=500,
+            help='Number of requests per case.',
+        )
+        parser.add_argument(
+            '--path',
+            default=reverse('tours:tag-list'),
+            help='Path to request.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        max_age = settings.DATABASES['default']['CONN_MAX_AGE']
+        if max_age == 0:
+            raise CommandError(
+                'CONN_MAX_AGE is 0; set DB_CONN_MAX_AGE to compare.'
+            )
+
+        results = {}
+        original = connection.settings_dict['CONN_MAX_AGE']
+        try:
+            for case_max_age in (0, max_age):
+                opened, elapsed = self.measure(
+                    options['path'], options['requests'], case_max_age
+                )
+                results[case_max_age] = opened
+                self.stdout.write(
+                    f'CONN_MAX_AGE={case_max_age}: '
+                    f'{opened} connections, '
+                    f'{elapsed / options["requests"] * 1000:.2f} ms/request'
+                )
+        finally:
+            connection.close()
+            connection.settings_dict['CONN_MAX_AGE'] = original
+
+        if results[max_age] > 1:
+            raise CommandError(
+                f'Persistent connections were reopened '
+                f'{results[max_age]} times.'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            'Connection setup is off the per-request path.'
+        ))
+
+    def measure(self, path, requests, max_age):
+        """Serve path requests times with CONN_MAX_AGE=max_age and
+        return the connections opened and the elapsed time."""
+        # CONN_MAX_AGE is read when a connection opens, so start afresh.
+        connection.close()
+        connection.settings_dict['CONN_MAX_AGE'] = max_age
+        opened = 0
+
+        def count(**kwargs):
+            nonlocal opened
+            opened += 1
+
+        handler = WSGIHandler()
+        connection_created.connect(count)
+        try:
+            # Every request comes from one anonymous client.
+            with override_settings(ALLOWED_HOSTS=['testserver']), \
+                    unthrottled():
+                start = time.perf_counter()
+                for _ in range(requests):
+                    response = handler(wsgi_environ(path), self.start_response)
+                    response.close()
+                elapsed = time.perf_counter() - start
+        finally:
+            connection_created.disconnect(count)
+
+        return opened, elapsed
+
+    def start_response(self, status, headers, exc_info=None):
+        """Fail on anything but a successful response."""
+        if not status.startswith('200'):
+            raise CommandError(f'Request failed: {status}.')
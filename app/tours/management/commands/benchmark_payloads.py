@@ -0,0 +1,127 @@
+"""
+Django command to compare JSON renderers and response compression.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rest_framework.renderers import JSONRenderer
+
+from core.middleware import COMPRESSORS
+from core.models import PricingOption, Tours
+from core.renderers import CompactJSONRenderer, orjson
+from tours.benchmark import WORDS, rolled_back, seed_catalogue
+from tours.querysets import eager_load
+from tours.serializers import TourDetailSerializer, TourSerializer
+
+
+# A CKEditor description of about 2 KB, like the real ones.
+DESCRIPTION = ''.join(
+    f'<h2>{word.title()}</h2><p>Enjoy the <strong>{word}</strong> with '
+    f'a local guide, lunch and <a href="https://example.com/{word}">'
+    f'transport</a> included.</p>'
+    for word in WORDS[:15]
+)
+INCLUDES = [
+    {'item': word, 'included': i % 3 != 0}
+    for i, word in enumerate(WORDS[:8])
+]
+
+
+class Command(BaseCommand):
+    """Django command to benchmark response payloads."""
+    help = (
+        'Seed a throwaway catalogue with full descriptions and render '
+        'tour detail and list payloads with JSONRenderer and '
+        'CompactJSONRenderer, then compress them with every installed '
+        'encoding, reporting CPU time per response and bytes on the '
+        'wire. All rows are rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=100,
+            help='Number of tours to seed, and size of the list page.',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Runs per case; the fastest is reported.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if options['rows'] < 1 or options['repeat'] < 1:
+            raise CommandError('--rows and --repeat must be at least 1.')
+
+        with rolled_back():
+            user = seed_catalogue(options['rows'])
+            tours = Tours.objects.filter(user=user).order_by('-id')
+            tours.update(description=DESCRIPTION)
+            PricingOption.objects.filter(tour__in=tours).update(
+                includes=INCLUDES
+            )
+            payloads = {
+                'detail': [
+                    TourDetailSerializer(tour).data
+                    for tour in eager_load(tours, TourDetailSerializer)
+                ],
+                'list': [
+                    TourSerializer(
+                        eager_load(tours, TourSerializer), many=True
+                    ).data
+                ],
+            }
+
+        if orjson is None:
+            self.stdout.write(
+                'orjson is not installed; both renderers use json.'
+            )
+        renderers = {
+            'JSONRenderer': JSONRenderer(),
+            'CompactJSONRenderer': CompactJSONRenderer(),
+        }
+        for name, responses in payloads.items():
+            bodies = {}
+            for renderer_name, renderer in renderers.items():
+                elapsed, bodies[renderer_name] = self.measure(
+                    lambda: [renderer.render(data) for data in responses],
+                    options['repeat'],
+                )
+                self.report(
+                    name, renderer_name, elapsed, bodies[renderer_name]
+                )
+            rendered = bodies['JSONRenderer']
+            if rendered != bodies['CompactJSONRenderer']:
+                raise CommandError(f'Rendered {name} JSON differs.')
+
+            for encoding, compress in COMPRESSORS.items():
+                elapsed, compressed = self.measure(
+                    lambda: [compress(body) for body in rendered],
+                    options['repeat'],
+                )
+                self.report(name, encoding, elapsed, compressed)
+
+        self.stdout.write(self.style.SUCCESS('Renderers agree.'))
+
+    def measure(self, build, repeat):
+        """Return the fastest time to run build, and its result."""
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = build()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        return best, result
+
+    def report(self, name, case, elapsed, bodies):
+        """Write the time and mean size per response of case."""
+        size = sum(len(body) for body in bodies) / len(bodies)
+        self.stdout.write(
+            f'{name} {case}: {elapsed / len(bodies) * 1e6:,.0f}us, '
+            f'{size:,.0f} bytes per response'
+        )
@@ -0,0 +1,72 @@
+"""
+Django command to compare per-row and set-based pricing updates.
+"""
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import PricingOption
+from tours.benchmark import rolled_back, seed_catalogue
+
+
+class Command(BaseCommand):
+    """Django command to benchmark repricing pricing options."""
+    help = (
+        'Seed a throwaway catalogue and apply the same discount with a '
+        'save() loop and with PricingOption.objects.apply_discount(), '
+        'checking both store identical prices. All rows are rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=2000,
+            help='Number of tours to seed (two pricing options each).',
+        )
+        parser.add_argument(
+            '--discount',
+            default='12.5',
+            help='Discount percentage to apply.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        discount = Decimal(options['discount'])
+        with rolled_back():
+            user = seed_catalogue(options['rows'])
+            queryset = PricingOption.objects.filter(tour__user=user)
+            count = queryset.count()
+
+            start = time.perf_counter()
+            for option in queryset.iterator():
+                option.discount_percentage = discount
+                option.save()
+            per_row = time.perf_counter() - start
+            expected = self.snapshot(queryset)
+
+            queryset.update(discount_percentage=None, special_price=None)
+            start = time.perf_counter()
+            queryset.apply_discount(discount)
+            bulk = time.perf_counter() - start
+            identical = self.snapshot(queryset) == expected
+
+        self.stdout.write(
+            f'{count} pricing options, {discount}% discount\n'
+            f'  save() loop:      {per_row:.3f}s '
+            f'({count / per_row:,.0f} rows/s)\n'
+            f'  apply_discount(): {bulk:.3f}s '
+            f'({count / bulk:,.0f} rows/s, {per_row / bulk:.1f}x faster)'
+        )
+        if not identical:
+            raise CommandError('Per-row and bulk prices differ.')
+        self.stdout.write(self.style.SUCCESS('Results are identical.'))
+
+    def snapshot(self, queryset):
+        """Return the stored prices keyed by pricing option id."""
+        return {
+            pk: prices for pk, *prices in queryset.values_list(
+                'id', 'special_price', 'discount_percentage'
+            )
+        }
@@ -0,0 +1,100 @@
+"""
+Django command to time tour searches against a large catalogue.
+"""
+import statistics
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from core.models import Tours
+from tours.benchmark import rolled_back, seed_catalogue
+from tours.search import search_tours, trigram_available
+
+
+QUERIES = (
+    'cenote',
+    'reef sunset',
+    'snorkel island mayan',
+    '"reef sunset"',
+    'dolphin -night',
+    'tag 7',
+)
+TYPO_QUERIES = (
+    'cenotte',
+    'snorkle',
+)
+
+
+class Command(BaseCommand):
+    """Django command to benchmark tour search."""
+    help = (
+        'Seed a throwaway catalogue and time full-text searches, plus '
+        'typo searches when pg_trgm is installed, failing when a median '
+        'exceeds --max-ms. All rows are rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=100000,
+            help='Number of tours to seed.',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=5,
+            help='Runs per query; the median is reported.',
+        )
+        parser.add_argument(
+            '--limit',
+            type=int,
+            default=20,
+            help='Number of results per search.',
+        )
+        parser.add_argument(
+            '--max-ms',
+            type=float,
+            default=50,
+            help='Slowest acceptable median in milliseconds.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if connection.vendor != 'postgresql':
+            raise CommandError('benchmark_search requires PostgreSQL.')
+
+        with rolled_back():
+            self.stdout.write(f'Seeding {options["rows"]} tours...')
+            user = seed_catalogue(options['rows'])
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE core_tours')
+
+            queries = QUERIES
+            if trigram_available():
+                queries += TYPO_QUERIES
+            else:
+                self.stdout.write('pg_trgm is not installed, skipping typos.')
+
+            tours = Tours.objects.filter(user=user)
+            slow = []
+            for terms in queries:
+                timings = []
+                for _ in range(options['repeat']):
+                    start = time.perf_counter()
+                    rows = search_tours(tours, terms, options['limit'])
+                    timings.append((time.perf_counter() - start) * 1000)
+                median = statistics.median(timings)
+                self.stdout.write(
+                    f'  {terms!r}: {median:.1f}ms, {len(rows)} results'
+                )
+                if median > options['max_ms']:
+                    slow.append(terms)
+
+        if slow:
+            raise CommandError(
+                f'Searches slower than {options["max_ms"]}ms: '
+                + ', '.join(repr(terms) for terms in slow)
+            )
+        self.stdout.write(self.style.SUCCESS('All searches are fast enough.'))
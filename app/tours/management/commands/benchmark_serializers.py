@@ -0,0 +1,110 @@
+"""
+Django command to compare model serializers with the .values() read paths.
+"""
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Tours, TourSummary
+from tours.benchmark import rolled_back, seed_catalogue
+from tours.fast import (
+    summary_representation,
+    summary_rows,
+    tour_detail_rows,
+    tour_rows,
+)
+from tours.querysets import eager_load
+from tours.serializers import (
+    TourSerializer,
+    TourDetailSerializer,
+    TourSummarySerializer,
+)
+
+
+class Command(BaseCommand):
+    """Django command to benchmark tour serialization."""
+    help = (
+        'Seed a throwaway catalogue and render it with '
+        'TourSummarySerializer, TourSerializer, TourDetailSerializer and '
+        'their .values() counterparts, '
+        'reporting rows per second and checking the JSON is '
+        'byte-identical. All rows are rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=5000,
+            help='Number of tours to seed.',
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Runs per case; the fastest is reported.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        with rolled_back():
+            user = seed_catalogue(options['rows'])
+            tours = Tours.objects.filter(user=user).order_by('-id')
+            summaries = TourSummary.objects.filter(
+                id__in=tours.values('pk')
+            ).order_by('-id')
+            cases = [
+                (
+                    'summary',
+                    lambda: TourSummarySerializer(summaries, many=True).data,
+                    lambda: summary_representation(summary_rows(summaries)),
+                ),
+                (
+                    'list',
+                    lambda: TourSerializer(
+                        eager_load(tours, TourSerializer), many=True
+                    ).data,
+                    lambda: list(tour_rows(tours)),
+                ),
+                (
+                    'detail',
+                    lambda: TourDetailSerializer(
+                        eager_load(tours, TourDetailSerializer), many=True
+                    ).data,
+                    lambda: tour_detail_rows(tours),
+                ),
+            ]
+
+            mismatches = []
+            for name, serializer, fast in cases:
+                slow_time, slow_body = self.measure(
+                    serializer, options['repeat']
+                )
+                fast_time, fast_body = self.measure(fast, options['repeat'])
+                rows = options['rows']
+                self.stdout.write(
+                    f'{name}: serializer {rows / slow_time:,.0f} rows/s, '
+                    f'values {rows / fast_time:,.0f} rows/s '
+                    f'({slow_time / fast_time:.1f}x faster)'
+                )
+                if slow_body != fast_body:
+                    mismatches.append(name)
+
+        if mismatches:
+            raise CommandError(
+                'Rendered JSON differs: ' + ', '.join(mismatches)
+            )
+        self.stdout.write(self.style.SUCCESS('Results are identical.'))
+
+    def measure(self, build, repeat):
+        """Return the fastest time to build and render, and the body."""
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            body = JSONRenderer().render(build())
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        return best, body
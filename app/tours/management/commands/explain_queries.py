@@ -0,0 +1,138 @@
+"""
+Django command to capture query plans for the hot API endpoints.
+"""
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+
+from rest_framework.test import APIClient
+
+from core.models import (
+    AuthToken,
+    Tours,
+    Tag,
+    PricingOption,
+    FavoriteTour,
+    TourSummary,
+)
+from tours.benchmark import rolled_back, seed_catalogue
+
+
+HOT_TABLES = {
+    model._meta.db_table
+    for model in (Tours, Tag, PricingOption, FavoriteTour, TourSummary)
+} | {Tours.tags.through._meta.db_table}
+
+SEQ_SCAN_RE = re.compile(r'Seq Scan on (\w+)')
+
+
+def is_row_lookup(sql):
+    """Return True for queries that fetch rows rather than aggregate
+    the whole table, which are the ones that must use an index."""
+    return ' WHERE ' in sql or ' LIMIT ' in sql
+
+
+class Command(BaseCommand):
+    """Django command to EXPLAIN ANALYZE the hot endpoint queries."""
+    help = (
+        'Seed a throwaway catalogue, request each hot endpoint and print '
+        'EXPLAIN ANALYZE for its queries. Fails if a row lookup uses a '
+        'sequential scan on a large table. All seeded rows are rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--rows',
+            type=int,
+            default=10000,
+            help='Number of tours to seed.',
+        )
+        parser.add_argument(
+            '--min-table-rows',
+            type=int,
+            default=1000,
+            help=(
+                'Ignore sequential scans on tables smaller than this, '
+                'where the planner rightly prefers them.'
+            ),
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        if connection.vendor != 'postgresql':
+            raise CommandError('explain_queries requires PostgreSQL.')
+
+        with rolled_back():
+            failures = self.explain_endpoints(
+                options['rows'], options['min_table_rows']
+            )
+
+        if failures:
+            raise CommandError(
+                'Sequential scans on hot paths: ' + ', '.join(failures)
+            )
+        self.stdout.write(self.style.SUCCESS('No sequential scans found.'))
+
+    def explain_endpoints(self, rows, min_table_rows):
+        """Seed rows, capture each endpoint's queries and explain them."""
+        self.stdout.write(f'Seeding {rows} tours...')
+        user = seed_catalogue(rows)
+        token = AuthToken.objects.issue(user)
+        with connection.cursor() as cursor:
+            for table in sorted(HOT_TABLES):
+                cursor.execute(f'ANALYZE {table}')
+            cursor.execute(
+                'SELECT relname FROM pg_class '
+                'WHERE relname = ANY(%s) AND reltuples >= %s',
+                [sorted(HOT_TABLES), min_table_rows],
+            )
+            checked_tables = {row[0] for row in cursor.fetchall()}
+
+        tour = Tours.objects.order_by('-id').first()
+        tag = Tag.objects.order_by('-id').first()
+        endpoints = [
+            ('tours-list', reverse('tours:tours-list')),
+            ('tours-popular', reverse('tours:tours-popular')),
+            ('tours-detail', reverse('tours:tours-detail', args=[tour.id])),
+            ('tag-list', reverse('tours:tag-list')),
+            ('tag-detail', reverse('tours:tag-detail', args=[tag.id])),
+            ('favorite-tours-list', reverse('tours:favorite-tours-list')),
+        ]
+
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+        failures = []
+        for name, url in endpoints:
+            with override_settings(ALLOWED_HOSTS=['testserver']), \
+                    CaptureQueriesContext(connection) as queries:
+                res = client.get(url)
+            if res.status_code != 200:
+                raise CommandError(f'{name} returned {res.status_code}.')
+
+            self.stdout.write(self.style.MIGRATE_HEADING(f'== {name}'))
+            for query in queries.captured_queries:
+                if not query['sql'].startswith('SELECT'):
+                    continue
+                failures.extend(
+                    f'{name} ({table})'
+                    for table in self.explain(query['sql'])
+                    if table in checked_tables
+                )
+
+        return failures
+
+    def explain(self, sql):
+        """Print the plan for sql and return the tables a row lookup
+        scans sequentially."""
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN ANALYZE ' + sql)
+            plan = '\n'.join(row[0] for row in cursor.fetchall())
+        self.stdout.write(sql)
+        self.stdout.write(plan + '\n')
+
+        if not is_row_lookup(sql):
+            return []
+        return SEQ_SCAN_RE.findall(plan)
@@ -0,0 +1,49 @@
+"""
+Django command to stream the tour catalogue to JSON Lines or CSV.
+"""
+from django.core.management.base import BaseCommand
+
+from tours.bulk import (
+    DEFAULT_BATCH_SIZE,
+    FORMATS,
+    export_tours,
+)
+
+
+class Command(BaseCommand):
+    """Django command to export tours."""
+    help = (
+        'Write every tour with its pricing options and tag names to '
+        'stdout or --output, without loading the catalogue into memory.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            default='jsonl',
+            help='Output format.',
+        )
+        parser.add_argument(
+            '--output',
+            help='File to write, stdout by default.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Number of tours fetched per query.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        lines = export_tours(options['format'], options['chunk_size'])
+        if not options['output']:
+            for line in lines:
+                self.stdout.write(line, ending='')
+            return
+
+        with open(
+            options['output'], 'w', newline='', encoding='utf-8'
+        ) as stream:
+            stream.writelines(lines)
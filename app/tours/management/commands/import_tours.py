@@ -0,0 +1,78 @@
+"""
+Django command to bulk import tours from a JSON Lines or CSV feed.
+"""
+import os
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from tours.bulk import (
+    DEFAULT_BATCH_SIZE,
+    FORMATS,
+    TourImportError,
+    feed_fingerprint,
+    guess_format,
+    import_tours,
+    read_rows,
+)
+
+
+class Command(BaseCommand):
+    """Django command to bulk import tours."""
+    help = (
+        'Stream tours with pricing options and tag names from a JSON Lines '
+        'or CSV file. Progress is checkpointed per batch, so rerunning a '
+        'failed import of the same file with the same --name resumes where '
+        'it stopped.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Feed file to import.')
+        parser.add_argument(
+            '--user',
+            required=True,
+            help='Email of the user who will own the imported tours.',
+        )
+        parser.add_argument(
+            '--format',
+            choices=FORMATS,
+            help='Feed format, guessed from the file name by default.',
+        )
+        parser.add_argument(
+            '--name',
+            help='Checkpoint name, the file name by default.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Number of tours inserted per transaction.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        path = options['path']
+        file_format = options['format'] or guess_format(path)
+        name = options['name'] or os.path.basename(path)
+        try:
+            user = get_user_model().objects.get(email=options['user'])
+        except get_user_model().DoesNotExist:
+            raise CommandError(f"User {options['user']} does not exist.")
+
+        try:
+            with open(path, 'rb') as stream:
+                fingerprint = feed_fingerprint(stream)
+            with open(path, newline='', encoding='utf-8') as stream:
+                imported = import_tours(
+                    read_rows(stream, file_format),
+                    user,
+                    name,
+                    batch_size=options['batch_size'],
+                    fingerprint=fingerprint,
+                )
+        except (OSError, TourImportError) as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {imported} tours for {name!r}.'
+        ))
@@ -0,0 +1,138 @@
+"""
+Django command to load test running API servers.
+"""
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+
+def percentile(values, fraction):
+    """Return the value below which fraction of sorted values fall."""
+    index = min(len(values) - 1, int(len(values) * fraction))
+    return values[index]
+
+
+async def fetch(url, timeout):
+    """GET url over a fresh connection and return its status code."""
+    parts = urlsplit(url)
+    port = parts.port or (443 if parts.scheme == 'https' else 80)
+    reader, writer = await asyncio.wait_for(
+        asyncio.open_connection(
+            parts.hostname, port, ssl=parts.scheme == 'https'
+        ),
+        timeout,
+    )
+    try:
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        writer.write(
+            f'GET {path} HTTP/1.1\r\n'
+            f'Host: {parts.netloc}\r\n'
+            'Accept: application/json\r\n'
+            'Connection: close\r\n\r\n'.encode('latin-1')
+        )
+        await writer.drain()
+        status_line = await asyncio.wait_for(reader.readline(), timeout)
+        await asyncio.wait_for(reader.read(), timeout)
+    finally:
+        writer.close()
+
+    return int(status_line.split()[1])
+
+
+async def run_level(url, concurrency, requests, timeout):
+    """Send requests GETs to url from concurrency clients and return the
+    wall time, the sorted latencies, the number of errors and the number
+    of throttled requests."""
+    remaining = iter(range(requests))
+    latencies = []
+    errors = throttled = 0
+
+    async def client():
+        nonlocal errors, throttled
+        for _ in remaining:
+            start = time.perf_counter()
+            try:
+                status = await fetch(url, timeout)
+            except (OSError, ValueError, IndexError, asyncio.TimeoutError):
+                status = None
+            latencies.append(time.perf_counter() - start)
+            if status == 429:
+                throttled += 1
+            elif status is None or status >= 400:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    return elapsed, sorted(latencies), errors, throttled
+
+
+class Command(BaseCommand):
+    """Django command to compare servers under concurrent load."""
+    help = (
+        'GET each URL from increasing numbers of concurrent clients and '
+        'report requests per second and p50/p99 latency, e.g. to compare '
+        'the sync views under WSGI with the async views under ASGI. The '
+        'servers must already be running. Every request comes from one '
+        'anonymous client, so start them with THROTTLE_ANON_READ raised, '
+        'e.g. to 1000000/s; throttled requests are reported apart from '
+        'errors.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'targets',
+            nargs='+',
+            metavar='LABEL=URL',
+            help='Servers to test, e.g. wsgi=http://127.0.0.1:8000/...',
+        )
+        parser.add_argument(
+            '--concurrency',
+            default='1,10,50',
+            help='Comma-separated numbers of concurrent clients.',
+        )
+        parser.add_argument(
+            '--requests',
+            type=int,
+            default=1000,
+            help='Requests sent per URL and concurrency level.',
+        )
+        parser.add_argument(
+            '--timeout',
+            type=float,
+            default=30,
+            help='Seconds before a request counts as an error.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        targets = []
+        for target in options['targets']:
+            label, sep, url = target.partition('=')
+            if not sep or not urlsplit(url).hostname:
+                raise CommandError(f'Expected LABEL=URL, got {target!r}.')
+            targets.append((label, url))
+        try:
+            levels = [
+                int(level) for level in options['concurrency'].split(',')
+            ]
+        except ValueError:
+            raise CommandError('--concurrency must list integers.')
+
+        for label, url in targets:
+            for concurrency in levels:
+                elapsed, latencies, errors, throttled = asyncio.run(run_level(
+                    url, concurrency, options['requests'], options['timeout']
+                ))
+                self.stdout.write(
+                    f'{label} c={concurrency}: '
+                    f'{len(latencies) / elapsed:,.0f} req/s, '
+                    f'p50 {percentile(latencies, 0.5) * 1000:.1f} ms, '
+                    f'p99 {percentile(latencies, 0.99) * 1000:.1f} ms, '
+                    f'{errors} errors, {throttled} throttled'
+                )
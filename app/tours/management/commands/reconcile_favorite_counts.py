@@ -0,0 +1,66 @@
+"""
+Django command to repair drifted tour favorite counts.
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.models import (
+    Tours,
+    FavoriteTour,
+    TourSummary,
+    tour_favorite_count,
+)
+from tours.cache import bump_catalogue
+
+
+class Command(BaseCommand):
+    """Django command to recount tour favorites in batches."""
+    help = (
+        'Recount the favorites of every tour in batches of ids, fixing '
+        'stored counts that drifted from writes that bypassed signals.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of tours recounted per transaction.',
+        )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        checked = repaired = 0
+        last_id = 0
+        while True:
+            tour_ids = list(Tours.objects.filter(
+                pk__gt=last_id
+            ).order_by('pk').values_list('pk', flat=True)[
+                :options['batch_size']
+            ])
+            if not tour_ids:
+                break
+
+            checked += len(tour_ids)
+            last_id = tour_ids[-1]
+            repaired += self.reconcile(tour_ids)
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Repaired {repaired} of {checked} tours.'
+        ))
+
+    def reconcile(self, tour_ids):
+        """Recount the drifted tours among tour_ids and return how many
+        were fixed."""
+        with transaction.atomic():
+            drifted = list(Tours.objects.filter(pk__in=tour_ids).exclude(
+                favorite_count=tour_favorite_count(FavoriteTour)
+            ).select_for_update().values_list('pk', flat=True))
+            if not drifted:
+                return 0
+
+            Tours.objects.filter(pk__in=drifted).update_favorite_count()
+            TourSummary.objects.refresh(drifted)
+        bump_catalogue(drifted)
+
+        return len(drifted)
@@ -0,0 +1,21 @@
+"""
+Django command to rebuild the tour summaries.
+"""
+from django.core.management.base import BaseCommand
+
+from core.models import TourSummary
+from tours.cache import bump_catalogue
+
+
+class Command(BaseCommand):
+    """Django command to rebuild every tour summary."""
+    help = (
+        'Rebuild the summary of every tour and drop summaries of deleted '
+        'tours, repairing any drift from writes that bypassed signals.'
+    )
+
+    def handle(self, *args, **options):
+        """Entrypoint for command."""
+        count = TourSummary.objects.refresh()
+        bump_catalogue()
+        self.stdout.write(self.style.SUCCESS(f'Refreshed {count} tours.'))
@@ -0,0 +1,122 @@
+"""
+Pagination classes for the tour APIs.
+"""
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """Cursor pagination that never runs OFFSET scans or COUNT(*)."""
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+class TourPagination(KeysetPagination):
+    """Paginate tours newest first."""
+    ordering = '-id'
+
+
+class RowKeysetPagination(KeysetPagination):
+    """Cursor pagination keyed on every ordering field at once.
+
+    CursorPagination keys on the first ordering field only and skips
+    rows tied on it by offset, which it caps at offset_cutoff. Here the
+    ordering fields are integers sorted the same way, the cursor holds
+    the values of all of them, and pages filter with one row comparison, e.g.
+    (favorite_count, id) < (%s, %s), which an index on the same fields
+    answers however many rows are tied.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+
+        descending = self.ordering[0].startswith('-')
+        fields = [name.lstrip('-') for name in self.ordering]
+        ordering = [
+            ('-' if descending != reverse else '') + name for name in fields
+        ]
+        queryset = queryset.order_by(*ordering)
+        if self.cursor is not None:
+            queryset = queryset.filter(self.after_position(
+                queryset.model, fields, '<' if ordering[0][0] == '-' else '>'
+            ))
+
+        results = list(queryset[:self.page_size + 1])
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+
+        return self.page
+
+    def after_position(self, model, fields, operator):
+        """Return a condition selecting the rows past the cursor."""
+        try:
+            values = [int(value) for value in self.cursor.position.split(',')]
+        except (AttributeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if len(values) != len(fields):
+            raise NotFound(self.invalid_cursor_message)
+
+        table = model._meta.db_table
+        columns = ', '.join(
+            f'"{table}"."{model._meta.get_field(name).column}"'
+            for name in fields
+        )
+        placeholders = ', '.join(['%s'] * len(values))
+        return RawSQL(
+            f'({columns}) {operator} ({placeholders})',
+            values,
+            output_field=BooleanField(),
+        )
+
+    def get_next_link(self):
+        if not (self.has_next and self.page):
+            return None
+        return self.encode_cursor(Cursor(
+            offset=0, reverse=False, position=self.row_position(self.page[-1])
+        ))
+
+    def get_previous_link(self):
+        if not (self.has_previous and self.page):
+            return None
+        return self.encode_cursor(Cursor(
+            offset=0, reverse=True, position=self.row_position(self.page[0])
+        ))
+
+    def row_position(self, row):
+        """Return the cursor position of a row, its ordering values."""
+        fields = [name.lstrip('-') for name in self.ordering]
+        if isinstance(row, dict):
+            return ','.join(str(row[name]) for name in fields)
+        return ','.join(str(getattr(row, name)) for name in fields)
+
+
+class PopularTourPagination(RowKeysetPagination):
+    """Paginate tours most favorited first, newest first on ties."""
+    ordering = ('-favorite_count', '-id')
+
+
+class TagPagination(KeysetPagination):
+    """Paginate tags by name, falling back to id for equal names."""
+    ordering = ('-name', 'id')
+
+
+class FavoriteTourPagination(KeysetPagination):
+    """Paginate favorite tours newest first."""
+    ordering = '-id'
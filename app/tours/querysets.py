@@ -0,0 +1,75 @@
+"""
+Queryset helpers for the tour APIs.
+"""
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import relations, serializers
+
+
+def _collect_lookups(serializer, model, prefix, in_prefetch, select, prefetch):
+    """Walk serializer fields and record the relations they read."""
+    for field in serializer.fields.values():
+        if field.write_only or field.source == '*':
+            continue
+
+        if isinstance(field, serializers.ListSerializer):
+            nested = field.child
+        elif isinstance(field, serializers.BaseSerializer):
+            nested = field
+        elif isinstance(field, relations.ManyRelatedField):
+            nested = None
+        elif isinstance(field, relations.RelatedField) and \
+                not field.use_pk_only_optimization():
+            nested = None
+        else:
+            continue
+
+        try:
+            model_field = model._meta.get_field(field.source_attrs[0])
+        except FieldDoesNotExist:
+            continue
+        if not model_field.is_relation:
+            continue
+
+        lookup = prefix + model_field.name
+        many = model_field.many_to_many or model_field.one_to_many
+        if many or in_prefetch:
+            prefetch.append(lookup)
+        else:
+            select.append(lookup)
+
+        if nested is not None:
+            _collect_lookups(
+                nested,
+                model_field.related_model,
+                lookup + '__',
+                many or in_prefetch,
+                select,
+                prefetch,
+            )
+
+
+@lru_cache(maxsize=None)
+def related_lookups(serializer_class):
+    """Return the select_related and prefetch_related lookups needed
+    to render serializer_class without per-row queries."""
+    select, prefetch = [], []
+    model = getattr(getattr(serializer_class, 'Meta', None), 'model', None)
+    if model is not None:
+        _collect_lookups(
+            serializer_class(), model, '', False, select, prefetch
+        )
+
+    return tuple(select), tuple(prefetch)
+
+
+def eager_load(queryset, serializer_class):
+    """Apply the joins and prefetches required by serializer_class."""
+    select, prefetch = related_lookups(serializer_class)
+    if select:
+        queryset = queryset.select_related(*select)
+    if prefetch:
+        queryset = queryset.prefetch_related(*prefetch)
+
+    return queryset
@@ -0,0 +1,67 @@
+"""
+Read replica routing for the tour APIs.
+
+Safe requests for the views' replica_actions read from a replica (see
+core.routers). A user who just wrote something is pinned to the primary
+for settings.DATABASE_REPLICA_PIN_SECONDS, long enough for replicas to
+catch up, so they always read their own writes. Responses the catalogue
+cache shares between readers are built on the primary regardless, see
+tours.cache.
+"""
+from contextlib import ExitStack
+
+from django.conf import settings
+
+from rest_framework import permissions
+
+from core.routers import reads_from_replica
+from tours.cache import get_cache
+
+
+def pin_key(user):
+    """Return the cache key marking user as pinned to the primary."""
+    return f'tours:primary-pin:{user.pk}'
+
+
+class ReplicaReadMixin:
+    """Serve reads for replica_actions from a replica."""
+    replica_actions = ('list', 'retrieve')
+
+    def dispatch(self, request, *args, **kwargs):
+        # initial() opens the replica scope on this stack. Closing it here
+        # rather than only in finalize_response() ends the scope even when
+        # an exception escapes the view and DRF never finalizes a response.
+        with ExitStack() as self._replica_reads:
+            return super().dispatch(request, *args, **kwargs)
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        if self.reads_from_replica(request):
+            self._replica_reads.enter_context(reads_from_replica())
+            self._reading_replica = True
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if self.__dict__.pop('_reading_replica', False):
+            self._replica_reads.close()
+        elif (response.status_code < 400
+                and request.method not in permissions.SAFE_METHODS
+                and request.user.is_authenticated):
+            get_cache().set(
+                pin_key(request.user),
+                True,
+                settings.DATABASE_REPLICA_PIN_SECONDS,
+            )
+
+        return super().finalize_response(request, response, *args, **kwargs)
+
+    def reads_from_replica(self, request):
+        """Return True if request may be served from a replica."""
+        if request.method not in permissions.SAFE_METHODS:
+            return False
+        if self.action not in self.replica_actions:
+            return False
+
+        user = request.user
+        return not (
+            user.is_authenticated and get_cache().get(pin_key(user))
+        )
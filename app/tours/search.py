@@ -0,0 +1,43 @@
+"""
+Full-text search over the tour catalogue.
+"""
+from django.conf import settings
+from django.contrib.postgres.search import (
+    SearchQuery,
+    SearchRank,
+    TrigramSimilarity,
+)
+from django.db import connections
+from django.db.models import F
+
+from tours.fast import tour_rows
+
+
+def trigram_available(using='default'):
+    """Return whether the pg_trgm extension is installed."""
+    with connections[using].cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm'")
+        return cursor.fetchone() is not None
+
+
+def search_tours(queryset, terms, limit):
+    """Return up to limit tour rows matching terms, best first.
+
+    Matches against Tours.search_vector are ranked with ts_rank. When
+    nothing matches and pg_trgm is installed, tours with a similar title
+    are returned instead, so that misspelt searches still find tours.
+    """
+    query = SearchQuery(
+        terms, config=settings.TOURS_SEARCH_CONFIG, search_type='websearch'
+    )
+    matches = queryset.filter(search_vector=query).annotate(
+        rank=SearchRank(F('search_vector'), query)
+    ).order_by('-rank', '-id')
+    rows = list(tour_rows(matches)[:limit])
+    if rows or not trigram_available(queryset.db):
+        return rows
+
+    similar = queryset.filter(title__trigram_similar=terms).annotate(
+        similarity=TrigramSimilarity('title', terms)
+    ).order_by('-similarity', '-id')
+    return list(tour_rows(similar)[:limit])
@@ -7,8 +7,10 @@ from core.models import (
     Tours,
     Tag,
     PricingOption,
-    FavoriteTour
+    FavoriteTour,
+    TourSummary,
 )
+from tours.bulk import FORMATS
 
 
 class TourSerializer(serializers.ModelSerializer):
@@ -20,6 +22,31 @@ class TourSerializer(serializers.ModelSerializer):
         read_only_fields = ['id']
 
 
+class PopularTourSerializer(TourSerializer):
+    """Serializer for tours ranked by popularity."""
+
+    class Meta(TourSerializer.Meta):
+        fields = TourSerializer.Meta.fields + ['favorite_count']
+        read_only_fields = fields
+
+
+class TourSummarySerializer(serializers.ModelSerializer):
+    """Serializer for the tour list, read from tour summaries."""
+    tags = serializers.ListField(
+        source='tag_names',
+        child=serializers.CharField(),
+        read_only=True,
+    )
+
+    class Meta:
+        model = TourSummary
+        fields = [
+            'id', 'title', 'time_minutes', 'link', 'tags',
+            'min_price', 'max_price', 'favorite_count',
+        ]
+        read_only_fields = fields
+
+
 class TagSerializer(serializers.ModelSerializer):
     """Serializer for tags."""
 
@@ -57,3 +84,50 @@ class FavoriteTourSerializer(serializers.ModelSerializer):
         model = FavoriteTour
         fields = ['id', 'user', 'tour']
         read_only_fields = ['id']
+
+
+class FavoriteTourExpandedSerializer(FavoriteTourSerializer):
+    """Serializer for favorite tours with the tour embedded."""
+    tour = TourDetailSerializer(read_only=True)
+
+
+class FavoriteToggleSerializer(serializers.Serializer):
+    """Serializer for toggling a favorite tour.
+
+    favorite sets the state explicitly, making retries idempotent;
+    without it the current state is flipped.
+    """
+    tour = serializers.PrimaryKeyRelatedField(queryset=Tours.objects.all())
+    favorite = serializers.BooleanField(allow_null=True, default=None)
+
+
+class FavoriteSyncSerializer(serializers.Serializer):
+    """Serializer for adding and removing favorite tours in bulk."""
+    add = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        max_length=1000,
+        default=list,
+    )
+    remove = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        max_length=1000,
+        default=list,
+    )
+
+    def validate(self, attrs):
+        """Reject tours that are both added and removed."""
+        both = set(attrs['add']) & set(attrs['remove'])
+        if both:
+            raise serializers.ValidationError(
+                'Tours cannot be both added and removed: '
+                + ', '.join(str(tour_id) for tour_id in sorted(both))
+            )
+
+        return attrs
+
+
+class TourImportSerializer(serializers.Serializer):
+    """Serializer for bulk tour import uploads."""
+    file = serializers.FileField()
+    file_format = serializers.ChoiceField(choices=FORMATS, required=False)
+    name = serializers.CharField(max_length=255, required=False)
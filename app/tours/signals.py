@@ -0,0 +1,174 @@
+"""
+Signal handlers keeping the tour catalogue cache, timestamps, derived
+columns and summaries in sync.
+"""
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.models import (
+    Tours,
+    Tag,
+    PricingOption,
+    FavoriteTour,
+    TourSummary,
+)
+from core.signals import favorites_changed, pricing_options_updated
+from tours.cache import bump_catalogue, bump_popularity, bump_tags
+
+
+def _tour_ids_for_tag(tag):
+    """Return the ids of the tours using a tag."""
+    return list(Tours.tags.through.objects.filter(
+        tag_id=tag.pk
+    ).values_list('tours_id', flat=True))
+
+
+def _tours_changed(tour_ids):
+    """Rebuild the summaries of tours and invalidate their cache."""
+    tour_ids = list(tour_ids)
+    if tour_ids:
+        TourSummary.objects.refresh(tour_ids)
+    bump_catalogue(tour_ids)
+
+
+def _favorites_changed(tour_ids):
+    """Rebuild the summaries of tours whose favorite count changed and
+    invalidate the popular ranking.
+
+    The count is only shown in listings, so the cached pages of the
+    other listings and of the tours themselves are kept.
+    """
+    tour_ids = list(tour_ids)
+    if tour_ids:
+        TourSummary.objects.refresh(tour_ids)
+    bump_popularity()
+
+
+def _touch_tours(tour_ids):
+    """Mark tours as modified after related rows were removed, and
+    rebuild their derived columns."""
+    tour_ids = list(tour_ids)
+    if tour_ids:
+        Tours.objects.filter(pk__in=tour_ids).update_derived_fields(
+            updated_at=timezone.now()
+        )
+    _tours_changed(tour_ids)
+
+
+@receiver(post_save, sender=Tours)
+def tour_saved(sender, instance, **kwargs):
+    """Reindex and invalidate a saved tour."""
+    Tours.objects.filter(pk=instance.pk).update_search_vector()
+    _tours_changed([instance.pk])
+
+
+@receiver(post_delete, sender=Tours)
+def tour_deleted(sender, instance, **kwargs):
+    """Drop the summary of a deleted tour and invalidate it."""
+    TourSummary.objects.filter(pk=instance.pk).delete()
+    bump_catalogue([instance.pk])
+
+
+@receiver(post_save, sender=PricingOption)
+def pricing_option_saved(sender, instance, **kwargs):
+    """Reprice and invalidate the tour owning a pricing option."""
+    Tours.objects.filter(pk=instance.tour_id).update_min_price()
+    _tours_changed([instance.tour_id])
+
+
+@receiver(pricing_options_updated, sender=PricingOption)
+def pricing_options_repriced(sender, tour_ids, **kwargs):
+    """Reprice and invalidate the tours of pricing options repriced in
+    bulk."""
+    Tours.objects.filter(pk__in=tour_ids).update_min_price()
+    _tours_changed(tour_ids)
+
+
+@receiver(post_delete, sender=PricingOption)
+def pricing_option_deleted(sender, instance, **kwargs):
+    """Touch the tour that lost a pricing option."""
+    _touch_tours([instance.tour_id])
+
+
+@receiver(post_save, sender=Tag)
+def tag_saved(sender, instance, **kwargs):
+    """Invalidate the tag list, and invalidate and reindex every tour
+    using a tag."""
+    bump_tags()
+    tour_ids = _tour_ids_for_tag(instance)
+    if tour_ids:
+        Tours.objects.filter(pk__in=tour_ids).update_search_vector()
+    _tours_changed(tour_ids)
+
+
+@receiver(pre_delete, sender=Tag)
+def tag_deleting(sender, instance, **kwargs):
+    """Remember the tours using a tag before its links are removed."""
+    instance._tour_ids = _tour_ids_for_tag(instance)
+
+
+@receiver(post_delete, sender=Tag)
+def tag_deleted(sender, instance, **kwargs):
+    """Invalidate the tag list and touch every tour that used a deleted
+    tag."""
+    bump_tags()
+    _touch_tours(instance.__dict__.pop('_tour_ids', ()))
+
+
+@receiver(m2m_changed, sender=Tours.tags.through)
+def tour_tags_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    """Touch tours whose tags were added, removed or cleared."""
+    if action == 'pre_clear' and reverse:
+        instance._tour_ids = _tour_ids_for_tag(instance)
+    elif action in ('post_add', 'post_remove'):
+        _touch_tours(pk_set if reverse else [instance.pk])
+    elif action == 'post_clear':
+        if reverse:
+            _touch_tours(instance.__dict__.pop('_tour_ids', ()))
+        else:
+            _touch_tours([instance.pk])
+
+
+@receiver(pre_save, sender=FavoriteTour)
+def favorite_saving(sender, instance, **kwargs):
+    """Remember the tour a favorite pointed at before it is updated."""
+    if instance.pk is not None:
+        instance._old_tour_id = FavoriteTour.objects.filter(
+            pk=instance.pk
+        ).values_list('tour_id', flat=True).first()
+
+
+@receiver(post_save, sender=FavoriteTour)
+def favorite_saved(sender, instance, created, **kwargs):
+    """Count a new favorite, or move it to the tour it now points at."""
+    old_tour_id = instance.__dict__.pop('_old_tour_id', None)
+    if not created and old_tour_id in (None, instance.tour_id):
+        return
+
+    Tours.objects.filter(pk=instance.tour_id).add_favorites(1)
+    tour_ids = [instance.tour_id]
+    if old_tour_id is not None:
+        Tours.objects.filter(pk=old_tour_id).add_favorites(-1)
+        tour_ids.append(old_tour_id)
+    _favorites_changed(tour_ids)
+
+
+@receiver(post_delete, sender=FavoriteTour)
+def favorite_deleted(sender, instance, **kwargs):
+    """Uncount a removed favorite."""
+    Tours.objects.filter(pk=instance.tour_id).add_favorites(-1)
+    _favorites_changed([instance.tour_id])
+
+
+@receiver(favorites_changed, sender=FavoriteTour)
+def favorites_written(sender, tour_ids, delta, **kwargs):
+    """Recount tours whose favorites were added or removed in bulk."""
+    Tours.objects.filter(pk__in=tour_ids).add_favorites(delta)
+    _favorites_changed(tour_ids)
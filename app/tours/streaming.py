@@ -0,0 +1,93 @@
+"""
+Streaming JSON list responses for the tour APIs.
+"""
+import json
+from itertools import islice
+
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import prefetch_related_objects
+from django.http import HttpResponse, StreamingHttpResponse
+
+from rest_framework.utils import encoders
+
+from tours.querysets import related_lookups
+
+
+def streaming_response(request, content, **kwargs):
+    """Return a response with the body produced by the content iterator.
+
+    Under WSGI the body is streamed. Django 3.2 iterates streaming bodies
+    on the event loop under ASGI, where the queries content runs would
+    raise SynchronousOnlyOperation, so there content is consumed in the
+    view, on its worker thread, and sent as a regular response.
+    """
+    if isinstance(request._request, ASGIRequest):
+        return HttpResponse(content, **kwargs)
+    return StreamingHttpResponse(content, **kwargs)
+
+
+class StreamingListMixin:
+    """Return the whole listing as one JSON array when ?stream=true.
+
+    Rows are read with .iterator() and serialized a chunk at a time, so
+    under WSGI memory use stays flat however large the result is. Under
+    ASGI the array is built in full before it is sent, see
+    streaming_response(). Pagination does not apply to streamed
+    listings.
+    """
+    stream_query_param = 'stream'
+    stream_chunk_size = 500
+
+    def list(self, request, *args, **kwargs):
+        """Return a streamed or a regular listing."""
+        value = request.query_params.get(self.stream_query_param, '')
+        if value.lower() not in ('1', 'true'):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.filter_queryset(self.get_queryset())
+        return streaming_response(
+            request,
+            self.stream_json(queryset),
+            content_type='application/json',
+        )
+
+    def stream_chunks(self, queryset):
+        """Yield lists of model instances with their prefetches applied.
+
+        prefetch_related() is ignored by .iterator(), so the lookups the
+        serializer needs are applied to each chunk instead.
+        """
+        _, prefetch = related_lookups(self.get_serializer_class())
+        rows = queryset.iterator(chunk_size=self.stream_chunk_size)
+        while True:
+            chunk = list(islice(rows, self.stream_chunk_size))
+            if not chunk:
+                return
+            prefetch_related_objects(chunk, *prefetch)
+            yield chunk
+
+    def stream_data(self, queryset):
+        """Yield the serialized representation of queryset one chunk at
+        a time."""
+        # One serializer renders every chunk. Calling to_representation()
+        # rather than reading .data keeps the chunk off the serializer,
+        # whose reference cycles would otherwise hold each chunk in memory
+        # until the garbage collector next ran.
+        serializer = self.get_serializer(many=True)
+        for chunk in self.stream_chunks(queryset):
+            yield serializer.to_representation(chunk)
+
+    def stream_json(self, queryset):
+        """Yield the JSON array for queryset one chunk at a time."""
+        # The opening bracket goes out with the first chunk, so the first
+        # byte reflects when the query has actually produced data.
+        prefix = '['
+        for data in self.stream_data(queryset):
+            yield prefix + json.dumps(
+                data,
+                cls=encoders.JSONEncoder,
+                ensure_ascii=False,
+                separators=(',', ':'),
+            )[1:-1]
+            prefix = ','
+        yield '[]' if prefix == '[' else ']'
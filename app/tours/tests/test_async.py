@@ -0,0 +1,179 @@
+"""
+Tests for the async read views and the load test command.
+"""
+import asyncio
+import time
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import (
+    AsyncClient,
+    LiveServerTestCase,
+    TransactionTestCase,
+)
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag
+from tours.views import TagViewSet
+from tours.tests.test_tour_api import (
+    TOURS_URL,
+    create_full_tour,
+    create_superuser,
+    detail_url,
+)
+
+
+ASYNC_TOURS_URL = reverse('tours:async-tours-list')
+ASYNC_TAGS_URL = reverse('tours:async-tag-list')
+TAGS_URL = reverse('tours:tag-list')
+
+
+def async_detail_url(tour_id):
+    """Create and return an async tour detail URL."""
+    return reverse('tours:async-tours-detail', args=[tour_id])
+
+
+class WorkerConnectionsMixin:
+    """Close the worker threads' connections after each request.
+
+    They are persistent otherwise and would keep the test database open
+    after the run.
+    """
+
+    def setUp(self):
+        super().setUp()
+        # Every thread's connection shares this settings dict.
+        max_age = connection.settings_dict['CONN_MAX_AGE']
+        connection.settings_dict['CONN_MAX_AGE'] = 0
+        self.addCleanup(
+            connection.settings_dict.__setitem__, 'CONN_MAX_AGE', max_age
+        )
+
+
+class AsyncViewTests(WorkerConnectionsMixin, TransactionTestCase):
+    """Test the async views serve what the sync views serve.
+
+    The views query from worker threads with their own connections, so
+    rows must be committed for them to see.
+    """
+
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.client = APIClient()
+        user = create_superuser()
+        self.tours = [create_full_tour(user=user) for _ in range(3)]
+        Tag.objects.create(name='Food')
+
+    def test_responses_match_sync_views(self):
+        """Test list, detail and tags match their sync counterparts."""
+        pairs = [
+            (TOURS_URL, ASYNC_TOURS_URL),
+            (detail_url(self.tours[0].id), async_detail_url(self.tours[0].id)),
+            (TAGS_URL, ASYNC_TAGS_URL),
+        ]
+        for sync_url, async_url in pairs:
+            cache.clear()
+            expected = self.client.get(sync_url)
+            cache.clear()
+            res = self.client.get(async_url)
+
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertEqual(res.content, expected.content)
+
+    def test_stream_list(self):
+        """Test a streamed async listing is sent whole, as the event loop
+        cannot run its queries."""
+        async def fetch():
+            return await AsyncClient().get(f'{ASYNC_TOURS_URL}?stream=true')
+
+        res = asyncio.run(fetch())
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(res.streaming)
+        self.assertEqual(len(res.json()), len(self.tours))
+
+    def test_missing_tour(self):
+        """Test the async detail view returns 404 for unknown tours."""
+        res = self.client.get(async_detail_url(self.tours[-1].id + 1))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_concurrent_requests(self):
+        """Test concurrent requests are served from one event loop."""
+        async def fetch_all():
+            client = AsyncClient()
+            return await asyncio.gather(*(
+                client.get(async_detail_url(tour.id)) for tour in self.tours
+            ))
+
+        responses = asyncio.run(fetch_all())
+
+        self.assertEqual(
+            [res.json()['id'] for res in responses],
+            [tour.id for tour in self.tours],
+        )
+
+    def test_slow_requests_overlap(self):
+        """Test the middleware lets slow async views run concurrently."""
+        list_tags = TagViewSet.list
+
+        def slow_list(view, request, *args, **kwargs):
+            time.sleep(0.5)
+            return list_tags(view, request, *args, **kwargs)
+
+        async def fetch_all():
+            client = AsyncClient()
+            return await asyncio.gather(*(
+                client.get(ASYNC_TAGS_URL, {'page_size': n})
+                for n in range(1, 5)
+            ))
+
+        with patch.object(TagViewSet, 'list', slow_list):
+            start = time.perf_counter()
+            responses = asyncio.run(fetch_all())
+            elapsed = time.perf_counter() - start
+
+        self.assertLess(elapsed, 1.5)
+        for res in responses:
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            # Queries run on the worker threads still count.
+            self.assertRegex(res['Server-Timing'], r'desc="[1-9]\d* queries"')
+
+
+class LoadTestCommandTests(WorkerConnectionsMixin, LiveServerTestCase):
+    """Test the loadtest command."""
+
+    def test_loadtest(self):
+        """Test every target and concurrency level is reported."""
+        create_full_tour(user=create_superuser())
+        out = StringIO()
+
+        call_command(
+            'loadtest',
+            f'sync={self.live_server_url}{TOURS_URL}',
+            f'async={self.live_server_url}{ASYNC_TOURS_URL}',
+            concurrency='1,4',
+            requests=8,
+            stdout=out,
+        )
+
+        lines = out.getvalue().splitlines()
+        self.assertEqual(
+            [line.split(':')[0] for line in lines],
+            ['sync c=1', 'sync c=4', 'async c=1', 'async c=4'],
+        )
+        for line in lines:
+            self.assertTrue(line.endswith(' 0 errors, 0 throttled'), line)
+
+    def test_loadtest_invalid_target(self):
+        """Test targets must be labelled URLs."""
+        with self.assertRaises(CommandError):
+            call_command('loadtest', self.live_server_url, stdout=StringIO())
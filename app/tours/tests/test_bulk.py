@@ -0,0 +1,375 @@
+"""
+Tests for bulk tour import and export.
+"""
+import codecs
+import json
+import os
+import tempfile
+from decimal import Decimal
+from io import BytesIO, StringIO
+
+from asgiref.sync import sync_to_async
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    AuthToken,
+    Tours,
+    Tag,
+    PricingOption,
+    TourImport,
+)
+from tours.bulk import (
+    TourImportError,
+    export_tours,
+    feed_fingerprint,
+    import_tours,
+    read_rows,
+)
+from tours.tests.test_tour_api import create_superuser
+
+
+IMPORT_URL = reverse('tours:tours-bulk-import')
+EXPORT_URL = reverse('tours:tours-bulk-export')
+
+
+def sample_rows(count):
+    """Return count feed rows."""
+    return [
+        {
+            'title': f'Tour {i}',
+            'description': '<p>Description</p>',
+            'time_minutes': 60 + i,
+            'link': '',
+            'tags': ['Beach', f'Tag {i % 2}'],
+            'pricing_options': [
+                {
+                    'option_name': 'Standard',
+                    'option_price': '100.00',
+                    'discount_percentage': '10.00',
+                    'includes': ['Lunch'],
+                },
+            ],
+        }
+        for i in range(count)
+    ]
+
+
+def failing_rows(rows, fail_at):
+    """Yield rows, raising before row number fail_at."""
+    for number, row in enumerate(rows):
+        if number == fail_at:
+            raise RuntimeError('Feed interrupted.')
+        yield row
+
+
+class TourImportTests(TestCase):
+    """Test importing tours in batches."""
+
+    def setUp(self):
+        self.user = create_superuser()
+
+    def test_import_creates_related_rows(self):
+        """Test tours are imported with pricing options and tags."""
+        Tag.objects.create(name='Beach')
+
+        imported = import_tours(sample_rows(3), self.user, 'feed')
+
+        self.assertEqual(imported, 3)
+        self.assertEqual(Tours.objects.count(), 3)
+        self.assertEqual(Tag.objects.filter(name='Beach').count(), 1)
+        self.assertEqual(Tag.objects.count(), 3)
+        tour = Tours.objects.get(title='Tour 1')
+        self.assertEqual(
+            sorted(tour.tags.values_list('name', flat=True)),
+            ['Beach', 'Tag 1'],
+        )
+        option = PricingOption.objects.get(tour=tour)
+        self.assertEqual(option.special_price, Decimal('90.00'))
+        self.assertTrue(
+            Tours.objects.filter(pk=tour.pk, search_vector='beach').exists()
+        )
+
+    def test_import_queries_per_batch(self):
+        """Test a batch costs the same number of queries at any size."""
+        import_tours(sample_rows(2), self.user, 'tags')
+
+        with CaptureQueriesContext(connection) as small:
+            import_tours(sample_rows(2), self.user, 'small', batch_size=10)
+        with CaptureQueriesContext(connection) as large:
+            import_tours(sample_rows(10), self.user, 'large', batch_size=10)
+
+        self.assertEqual(
+            len(small.captured_queries), len(large.captured_queries)
+        )
+
+    def test_import_resumes_from_checkpoint(self):
+        """Test a failed import resumes after the last committed batch."""
+        rows = sample_rows(5)
+
+        with self.assertRaises(RuntimeError):
+            import_tours(failing_rows(rows, 3), self.user, 'feed', 2)
+
+        checkpoint = TourImport.objects.get(name='feed')
+        self.assertEqual(checkpoint.rows_imported, 2)
+        self.assertFalse(checkpoint.completed)
+        self.assertEqual(Tours.objects.count(), 2)
+
+        imported = import_tours(iter(rows), self.user, 'feed', 2)
+
+        self.assertEqual(imported, 3)
+        self.assertEqual(
+            sorted(Tours.objects.values_list('title', flat=True)),
+            [row['title'] for row in rows],
+        )
+        with self.assertRaisesRegex(TourImportError, 'already completed'):
+            import_tours(iter(rows), self.user, 'feed')
+
+    def test_resume_rejects_different_feed(self):
+        """Test a checkpoint is not resumed with a different feed."""
+        rows = sample_rows(5)
+        first = feed_fingerprint(BytesIO(b'first feed'))
+        second = feed_fingerprint(BytesIO(b'second feed'))
+
+        with self.assertRaises(RuntimeError):
+            import_tours(
+                failing_rows(rows, 3), self.user, 'feed', 2, first
+            )
+
+        with self.assertRaisesRegex(TourImportError, 'different feed'):
+            import_tours(iter(rows), self.user, 'feed', 2, second)
+        self.assertEqual(Tours.objects.count(), 2)
+
+        self.assertEqual(
+            import_tours(iter(rows), self.user, 'feed', 2, first), 3
+        )
+
+    def test_invalid_row_rolls_back_batch(self):
+        """Test an invalid row aborts its batch with the row number."""
+        rows = sample_rows(3)
+        del rows[2]['time_minutes']
+
+        with self.assertRaisesRegex(TourImportError, 'Row 3'):
+            import_tours(rows, self.user, 'feed', batch_size=2)
+
+        self.assertEqual(Tours.objects.count(), 2)
+        self.assertEqual(
+            TourImport.objects.get(name='feed').rows_imported, 2
+        )
+
+    def test_rows_violating_constraints_rejected(self):
+        """Test rows the database would reject fail with their number."""
+        long_title = 'x' * 256
+        cases = [
+            ({'title': ''}, 'title'),
+            ({'title': None}, 'title'),
+            ({'title': long_title}, 'title'),
+            ({'pricing_options': [
+                {'option_name': 'VIP', 'option_price': '1000000.00'},
+            ]}, 'option_price'),
+            ({'tags': 'Beach'}, 'tags'),
+            ({'tags': [['Beach']]}, 'tags'),
+            ({'tags': [{'name': 'Beach'}]}, 'tags'),
+        ]
+        for changes, field in cases:
+            rows = sample_rows(2)
+            rows[1].update(changes)
+
+            with self.assertRaisesRegex(TourImportError, f'Row 2: .*{field}'):
+                import_tours(rows, self.user, f'feed-{field}')
+
+        self.assertFalse(Tours.objects.exists())
+
+    def test_numeric_tags(self):
+        """Test numeric tag names import as their string form."""
+        rows = sample_rows(1)
+        rows[0]['tags'] = [2024, '2024', 'Beach']
+
+        import_tours(rows, self.user, 'feed')
+
+        self.assertEqual(
+            sorted(Tours.objects.get().tags.values_list('name', flat=True)),
+            ['2024', 'Beach'],
+        )
+
+    def test_database_errors_reported(self):
+        """Test rows rejected by the database fail with their range."""
+        rows = sample_rows(2)
+        rows[1]['tags'] = ['x' * 300]
+
+        with self.assertRaisesRegex(TourImportError, 'Rows 1-2'):
+            import_tours(rows, self.user, 'feed')
+
+        self.assertFalse(Tours.objects.exists())
+
+    def test_undecodable_feed(self):
+        """Test a feed that is not UTF-8 fails with the row number."""
+        content = b'title,time_minutes\nReef,60\nR\xe9cif,60\n'
+        stream = codecs.iterdecode(iter(content.splitlines(True)), 'utf-8')
+
+        with self.assertRaisesRegex(TourImportError, 'Row 2: invalid UTF-8'):
+            list(read_rows(stream, 'csv'))
+
+    def test_export_round_trip(self):
+        """Test exported feeds import back to the same catalogue."""
+        import_tours(sample_rows(3), self.user, 'feed')
+
+        exports = {
+            file_format: ''.join(export_tours(file_format, chunk_size=2))
+            for file_format in ('jsonl', 'csv')
+        }
+
+        for file_format, exported in exports.items():
+            stream = StringIO(exported, newline='')
+            rows = list(read_rows(stream, file_format))
+            self.assertEqual(
+                [row['title'] for row in rows],
+                ['Tour 0', 'Tour 1', 'Tour 2'],
+            )
+            self.assertEqual(rows[0]['tags'], ['Beach', 'Tag 0'])
+            self.assertEqual(
+                rows[0]['pricing_options'][0]['special_price'], '90.00'
+            )
+
+            import_tours(rows, self.user, f'copy.{file_format}')
+
+        self.assertEqual(Tours.objects.count(), 9)
+
+
+class TourBulkApiTests(TestCase):
+    """Test the bulk import and export endpoints."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.superuser = create_superuser()
+
+    def upload(self, rows, name='feed.jsonl'):
+        content = ''.join(json.dumps(row) + '\n' for row in rows)
+        return SimpleUploadedFile(name, content.encode('utf-8'))
+
+    def test_admin_required(self):
+        """Test anonymous users cannot import or export."""
+        res = self.client.post(
+            IMPORT_URL, {'file': self.upload(sample_rows(1))}
+        )
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        res = self.client.get(EXPORT_URL)
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_import_upload(self):
+        """Test uploading a feed imports its tours."""
+        self.client.force_authenticate(self.superuser)
+
+        res = self.client.post(
+            IMPORT_URL,
+            {'file': self.upload(sample_rows(2))},
+            format='multipart',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {'name': 'feed.jsonl', 'imported': 2})
+        self.assertEqual(Tours.objects.count(), 2)
+
+    def test_import_completed_upload(self):
+        """Test uploading under the name of a completed import returns
+        400."""
+        self.client.force_authenticate(self.superuser)
+        rows = sample_rows(2)
+        self.client.post(
+            IMPORT_URL, {'file': self.upload(rows)}, format='multipart'
+        )
+
+        res = self.client.post(
+            IMPORT_URL, {'file': self.upload(rows)}, format='multipart'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('already completed', res.data['file'][0])
+        self.assertEqual(Tours.objects.count(), 2)
+
+    def test_import_invalid_upload(self):
+        """Test an invalid feed returns 400."""
+        self.client.force_authenticate(self.superuser)
+
+        res = self.client.post(
+            IMPORT_URL,
+            {'file': SimpleUploadedFile('feed.jsonl', b'{not json}\n')},
+            format='multipart',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('Row 1', res.data['file'][0])
+
+    def test_import_undecodable_upload(self):
+        """Test a feed that is not UTF-8 returns 400."""
+        self.client.force_authenticate(self.superuser)
+
+        res = self.client.post(
+            IMPORT_URL,
+            {'file': SimpleUploadedFile('feed.csv', b'title\n\xff\n')},
+            format='multipart',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('invalid UTF-8', res.data['file'][0])
+
+    def test_export_streams_csv(self):
+        """Test the export endpoint streams CSV."""
+        self.client.force_authenticate(self.superuser)
+        import_tours(sample_rows(2), self.superuser, 'feed')
+
+        res = self.client.get(EXPORT_URL, {'file_format': 'csv'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res.streaming)
+        self.assertEqual(res['Content-Type'], 'text/csv')
+        lines = b''.join(res.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].startswith('title,description'))
+
+    async def test_export_under_asgi(self):
+        """Test ASGI requests get the export as a regular response,
+        built off the event loop."""
+        token = await sync_to_async(AuthToken.objects.issue)(self.superuser)
+        await sync_to_async(import_tours)(
+            sample_rows(2), self.superuser, 'feed'
+        )
+
+        # Django 3.2's AsyncClient takes extra headers by their raw names.
+        res = await self.async_client.get(
+            EXPORT_URL, authorization=f'Token {token.key}'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(res.streaming)
+        self.assertEqual(len(res.content.decode().splitlines()), 2)
+
+
+class TourBulkCommandTests(TestCase):
+    """Test the import_tours and export_tours commands."""
+
+    def test_import_then_export(self):
+        """Test importing a file and exporting it to stdout."""
+        user = create_superuser()
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'feed.jsonl')
+            with open(path, 'w') as feed:
+                for row in sample_rows(3):
+                    feed.write(json.dumps(row) + '\n')
+
+            call_command(
+                'import_tours', path, user=user.email, stdout=StringIO()
+            )
+
+        self.assertTrue(TourImport.objects.get(name='feed.jsonl').completed)
+        out = StringIO()
+        call_command('export_tours', stdout=out)
+        self.assertEqual(len(out.getvalue().splitlines()), 3)
@@ -0,0 +1,189 @@
+"""
+Tests for the tour catalogue response cache.
+"""
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Tag,
+    PricingOption,
+)
+from tours.cache import (
+    CATALOGUE_VERSION_KEY,
+    get_version,
+    tour_version_key,
+)
+from tours.tests.test_tour_api import (
+    TOURS_URL,
+    create_superuser,
+    create_tour,
+    detail_url,
+)
+
+
+class CatalogueCacheTests(TestCase):
+    """Test caching of tour list and detail responses."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.superuser = create_superuser()
+        self.tour = create_tour(user=self.superuser)
+
+    def test_list_served_from_cache(self):
+        """Test a repeated list request does not touch the database."""
+        res = self.client.get(TOURS_URL)
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(TOURS_URL)
+
+        self.assertEqual(cached.status_code, status.HTTP_200_OK)
+        self.assertEqual(cached.data, res.data)
+        self.assertEqual(cached['ETag'], res['ETag'])
+
+    def test_if_none_match_returns_not_modified(self):
+        """Test a matching If-None-Match header returns 304."""
+        url = detail_url(self.tour.id)
+        etag = self.client.get(url)['ETag']
+
+        with self.assertNumQueries(0):
+            res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res['ETag'], etag)
+        self.assertEqual(res.content, b'')
+
+    def test_tour_update_invalidates_list_and_detail(self):
+        """Test saving a tour refreshes the cached responses."""
+        url = detail_url(self.tour.id)
+        list_etag = self.client.get(TOURS_URL)['ETag']
+        detail_etag = self.client.get(url)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tour.title = 'New title'
+            self.tour.save()
+
+        res = self.client.get(TOURS_URL, HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['results'][0]['title'], 'New title')
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=detail_etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['title'], 'New title')
+
+    def test_pricing_option_change_invalidates_detail(self):
+        """Test adding a pricing option refreshes the tour detail."""
+        url = detail_url(self.tour.id)
+        self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            PricingOption.objects.create(
+                tour=self.tour,
+                option_name='Standard',
+                option_price=Decimal('50.00'),
+            )
+
+        res = self.client.get(url)
+        self.assertEqual(len(res.data['pricing_options']), 1)
+
+    def test_tag_changes_invalidate_detail(self):
+        """Test tag links, renames and deletes refresh the detail."""
+        url = detail_url(self.tour.id)
+        tag = Tag.objects.create(name='Beach')
+        self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tour.tags.add(tag)
+        res = self.client.get(url)
+        self.assertEqual(res.data['tags'][0]['name'], 'Beach')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tag.name = 'Jungle'
+            tag.save()
+        res = self.client.get(url)
+        self.assertEqual(res.data['tags'][0]['name'], 'Jungle')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tag.tours_set.clear()
+        res = self.client.get(url)
+        self.assertEqual(res.data['tags'], [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tour.tags.add(tag)
+        self.client.get(url)
+        with self.captureOnCommitCallbacks(execute=True):
+            tag.delete()
+        res = self.client.get(url)
+        self.assertEqual(res.data['tags'], [])
+
+    def test_versions_bumped_on_commit(self):
+        """Test versions change only once the write commits, so no
+        request can cache the old rows under the new version."""
+        key = tour_version_key(self.tour.id)
+        catalogue = get_version(CATALOGUE_VERSION_KEY)
+        version = get_version(key)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.tour.title = 'New title'
+                self.tour.save()
+                self.assertEqual(get_version(key), version)
+            self.assertEqual(
+                get_version(CATALOGUE_VERSION_KEY), catalogue
+            )
+
+        self.assertGreater(get_version(key), version)
+        self.assertGreater(get_version(CATALOGUE_VERSION_KEY), catalogue)
+
+    def test_other_tours_stay_cached(self):
+        """Test changing one tour keeps other tour details cached."""
+        other = create_tour(user=self.superuser)
+        url = detail_url(other.id)
+        etag = self.client.get(url)['ETag']
+
+        self.tour.title = 'New title'
+        self.tour.save()
+
+        res = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @override_settings(ALLOWED_HOSTS=['a.example.com', 'b.example.com'])
+    def test_links_follow_request_host(self):
+        """Test cached pages link to the host and scheme requested."""
+        create_tour(user=self.superuser)
+        params = {'page_size': 1}
+
+        self.client.get(TOURS_URL, params, HTTP_HOST='a.example.com')
+        res = self.client.get(TOURS_URL, params, HTTP_HOST='b.example.com')
+        self.assertTrue(res.data['next'].startswith('http://b.example.com/'))
+
+        res = self.client.get(
+            TOURS_URL, params, HTTP_HOST='b.example.com', secure=True
+        )
+        self.assertTrue(res.data['next'].startswith('https://b.example.com/'))
+
+    def test_non_canonical_id_invalidated(self):
+        """Test a detail URL with a zero-padded id is invalidated by
+        writes to the tour."""
+        url = reverse('tours:tours-detail', args=[f'0{self.tour.id}'])
+        self.client.get(url)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tour.title = 'New title'
+            self.tour.save()
+
+        res = self.client.get(url)
+        self.assertEqual(res.data['title'], 'New title')
+
+    def test_missing_tour_not_cached(self):
+        """Test a 404 response is not cached."""
+        res = self.client.get(reverse('tours:tours-detail', args=[0]))
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+        self.assertNotIn('ETag', res)
@@ -0,0 +1,127 @@
+"""
+Test tour management commands.
+"""
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from core.models import (
+    Tours,
+    PricingOption,
+)
+
+
+class ExplainQueriesTests(TestCase):
+    """Test the explain_queries command."""
+
+    def test_explain_queries_rolls_back(self):
+        """Test plans are printed and seeded rows are discarded."""
+        out = StringIO()
+
+        call_command('explain_queries', rows=5000, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('== tours-list', output)
+        self.assertIn('== favorite-tours-list', output)
+        self.assertIn('No sequential scans found.', output)
+        self.assertFalse(Tours.objects.exists())
+
+
+class BenchmarkRepricingTests(TestCase):
+    """Test the benchmark_repricing command."""
+
+    def test_benchmark_repricing(self):
+        """Test both repricing paths agree and rows are discarded."""
+        out = StringIO()
+
+        call_command('benchmark_repricing', rows=20, stdout=out)
+
+        self.assertIn('Results are identical.', out.getvalue())
+        self.assertFalse(PricingOption.objects.exists())
+
+
+class BenchmarkStreamingTests(TestCase):
+    """Test the benchmark_streaming command."""
+
+    def test_benchmark_streaming(self):
+        """Test both listings render the same body and rows are
+        discarded."""
+        out = StringIO()
+
+        call_command('benchmark_streaming', rows=20, stdout=out)
+
+        self.assertIn('Bodies are identical.', out.getvalue())
+        self.assertFalse(Tours.objects.exists())
+
+
+class BenchmarkSerializersTests(TestCase):
+    """Test the benchmark_serializers command."""
+
+    def test_benchmark_serializers(self):
+        """Test both read paths render the same JSON and rows are
+        discarded."""
+        out = StringIO()
+
+        call_command('benchmark_serializers', rows=20, repeat=1, stdout=out)
+
+        self.assertIn('Results are identical.', out.getvalue())
+        self.assertFalse(Tours.objects.exists())
+
+
+class BenchmarkSearchTests(TestCase):
+    """Test the benchmark_search command."""
+
+    def test_benchmark_search(self):
+        """Test searches are timed and rows are discarded."""
+        out = StringIO()
+
+        call_command(
+            'benchmark_search', rows=50, repeat=1, max_ms=10000, stdout=out
+        )
+
+        self.assertIn('All searches are fast enough.', out.getvalue())
+        self.assertFalse(Tours.objects.exists())
+
+
+class BenchmarkConnectionsTests(TransactionTestCase):
+    """Test the benchmark_connections command."""
+
+    def test_benchmark_connections(self):
+        """Test persistent connections are opened once."""
+        out = StringIO()
+
+        call_command('benchmark_connections', requests=5, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('CONN_MAX_AGE=0: 5 connections', output)
+        self.assertIn('Connection setup is off the per-request path.', output)
+
+    def test_not_throttled(self):
+        """Test the requests are not throttled as one anonymous client."""
+        rates = {'anon-read': '2/min', 'user-write': None, 'login': None}
+        rest_framework = {
+            **settings.REST_FRAMEWORK, 'DEFAULT_THROTTLE_RATES': rates,
+        }
+
+        with override_settings(REST_FRAMEWORK=rest_framework):
+            call_command(
+                'benchmark_connections', requests=5, stdout=StringIO()
+            )
+
+
+class BenchmarkPayloadsTests(TestCase):
+    """Test the benchmark_payloads command."""
+
+    def test_benchmark_payloads(self):
+        """Test both renderers agree, gzip is reported and rows are
+        discarded."""
+        out = StringIO()
+
+        call_command('benchmark_payloads', rows=5, repeat=1, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('detail gzip: ', output)
+        self.assertIn('Renderers agree.', output)
+        self.assertFalse(Tours.objects.exists())
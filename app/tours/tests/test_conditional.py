@@ -0,0 +1,176 @@
+"""
+Tests for conditional GET on the tour APIs.
+"""
+from datetime import timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Tours,
+    Tag,
+    PricingOption,
+)
+from tours.tests.test_tour_api import (
+    create_superuser,
+    create_tour,
+    detail_url,
+)
+
+
+TAGS_URL = reverse('tours:tag-list')
+
+
+def tag_detail_url(tag_id):
+    """Create and return a tag detail URL."""
+    return reverse('tours:tag-detail', args=[tag_id])
+
+
+class TagConditionalGetTests(TestCase):
+    """Test conditional requests on the tag endpoints."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.tag = Tag.objects.create(name='Beach')
+
+    def test_list_has_etag(self):
+        """Test listing tags returns an ETag but no Last-Modified."""
+        res = self.client.get(TAGS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertTrue(res['ETag'].startswith('W/"'))
+        self.assertNotIn('Last-Modified', res)
+
+    def test_if_none_match_skips_database(self):
+        """Test a matching list ETag returns 304 without a query."""
+        etag = self.client.get(TAGS_URL)['ETag']
+
+        with self.assertNumQueries(0):
+            res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(res.content, b'')
+
+    def test_if_modified_since(self):
+        """Test If-Modified-Since returns 304 until the tag changes."""
+        url = tag_detail_url(self.tag.id)
+        last_modified = self.client.get(url)['Last-Modified']
+
+        res = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Tag.objects.filter(pk=self.tag.pk).update(
+            updated_at=timezone.now() + timedelta(seconds=5)
+        )
+        res = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_list_etag_changes_on_delete(self):
+        """Test deleting a tag changes the list ETag."""
+        Tag.objects.create(name='Jungle')
+        etag = self.client.get(TAGS_URL)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.delete()
+        res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(res['ETag'], etag)
+        self.assertEqual(len(res.data['results']), 1)
+
+    def test_list_etag_ignores_tour_writes(self):
+        """Test writes to tours and favorites keep the tag list ETag."""
+        etag = self.client.get(TAGS_URL)['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tour = create_tour(user=create_superuser())
+            tour.tags.add(self.tag)
+        res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.tag.name = 'Jungle'
+            self.tag.save()
+        res = self.client.get(TAGS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_list_ignores_if_modified_since(self):
+        """Test If-Modified-Since alone never gets a stale list."""
+        since = http_date(
+            (timezone.now() + timedelta(days=1)).timestamp()
+        )
+
+        res = self.client.get(TAGS_URL, HTTP_IF_MODIFIED_SINCE=since)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+    def test_missing_tag(self):
+        """Test a missing tag still returns 404."""
+        res = self.client.get(tag_detail_url(0), HTTP_IF_NONE_MATCH='*')
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_non_integer_id(self):
+        """Test a non-integer id returns 404 on tags and tours."""
+        for url in (tag_detail_url('abc'), detail_url('abc')):
+            res = self.client.get(url)
+
+            self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
+
+
+class TourConditionalGetTests(TestCase):
+    """Test conditional requests on the tour endpoints."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.tour = create_tour(user=create_superuser())
+
+    def test_detail_if_modified_since(self):
+        """Test tour detail honours If-Modified-Since with and without
+        a cached copy."""
+        url = detail_url(self.tour.id)
+        last_modified = self.client.get(url)['Last-Modified']
+
+        cache.clear()
+        res = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertIn('ETag', res)
+
+        self.client.get(url)
+        with self.assertNumQueries(0):
+            res = self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_cached_response_keeps_last_modified(self):
+        """Test responses served from cache carry Last-Modified."""
+        url = detail_url(self.tour.id)
+        res = self.client.get(url)
+
+        with self.assertNumQueries(0):
+            cached = self.client.get(url)
+
+        self.assertEqual(cached['Last-Modified'], res['Last-Modified'])
+
+    def test_related_removals_touch_tour(self):
+        """Test removing pricing options or tags touches the tour."""
+        option = PricingOption.objects.create(
+            tour=self.tour,
+            option_name='Standard',
+            option_price=Decimal('50.00'),
+        )
+        tag = Tag.objects.create(name='Beach')
+        self.tour.tags.add(tag)
+
+        for remove in (option.delete, tag.delete):
+            before = Tours.objects.get(pk=self.tour.pk).updated_at
+            remove()
+            after = Tours.objects.get(pk=self.tour.pk).updated_at
+            self.assertGreater(after, before)
@@ -0,0 +1,120 @@
+"""
+Tests for the .values() read paths of the tour APIs.
+"""
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.core.cache import cache
+from django.test import TestCase
+
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from core.models import (
+    Tours,
+    Tag,
+    PricingOption,
+    TourSummary,
+)
+from tours.fast import (
+    decimal_string,
+    tour_detail_rows,
+    tour_rows,
+)
+from tours.serializers import (
+    TourSerializer,
+    TourDetailSerializer,
+    TourSummarySerializer,
+)
+from tours.tests.test_tour_api import (
+    TOURS_URL,
+    assert_constant_queries,
+    create_full_tour,
+    create_superuser,
+    create_tour,
+    detail_url,
+)
+
+
+def render(data):
+    """Return data rendered as the API renders it."""
+    return JSONRenderer().render(data)
+
+
+class FastReadTests(TestCase):
+    """Test the fast read paths match the model serializers."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = create_superuser()
+        self.tour = create_full_tour(user=self.user, link='http://x.com')
+        PricingOption.objects.create(
+            tour=self.tour,
+            option_name='Family',
+            option_price=Decimal('80'),
+            includes={'lunch': True, 'guide': ['en', 'es']},
+        )
+        self.tour.tags.add(Tag.objects.create(name='Ñandú'))
+        create_tour(user=self.user, title='No options', description='')
+
+    def test_list_is_byte_identical(self):
+        """Test tour_rows renders exactly like TourSerializer."""
+        tours = Tours.objects.order_by('-id')
+
+        self.assertEqual(
+            render(list(tour_rows(tours))),
+            render(TourSerializer(tours, many=True).data),
+        )
+
+    def test_detail_is_byte_identical(self):
+        """Test tour_detail_rows renders exactly like
+        TourDetailSerializer."""
+        tours = Tours.objects.order_by('-id')
+
+        self.assertEqual(
+            render(tour_detail_rows(tours)),
+            render(TourDetailSerializer(tours, many=True).data),
+        )
+
+    def test_endpoints_use_fast_rows(self):
+        """Test list and retrieve responses match the serializers."""
+        res = self.client.get(detail_url(self.tour.id))
+        self.assertEqual(
+            res.content,
+            render(TourDetailSerializer(self.tour).data),
+        )
+
+        res = self.client.get(TOURS_URL)
+        summaries = TourSummary.objects.order_by('-id')
+        self.assertEqual(
+            render(res.data['results']),
+            render(TourSummarySerializer(summaries, many=True).data),
+        )
+
+    def test_retrieve_missing_tour(self):
+        """Test retrieving an unknown tour returns 404."""
+        res = self.client.get(detail_url(self.tour.id + 100))
+
+        self.assertEqual(res.status_code, 404)
+
+    @patch('tours.views.TourViewSet.conditional_actions', ())
+    def test_retrieve_non_integer_id(self):
+        """Test retrieving a non-integer id returns 404."""
+        res = self.client.get(detail_url('abc'))
+
+        self.assertEqual(res.status_code, 404)
+
+    def test_detail_rows_constant_queries(self):
+        """Test nested rows are fetched in one query per relation."""
+        assert_constant_queries(
+            self,
+            lambda: tour_detail_rows(Tours.objects.all()),
+            lambda: [create_full_tour(user=self.user) for _ in range(3)],
+        )
+
+    def test_decimal_string(self):
+        """Test decimals are formatted with two places."""
+        self.assertEqual(decimal_string(Decimal('5')), '5.00')
+        self.assertEqual(decimal_string(Decimal('1E+1')), '10.00')
+        self.assertIsNone(decimal_string(None))
@@ -0,0 +1,240 @@
+"""
+Tests for the favorite tours API.
+"""
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Tours,
+    FavoriteTour,
+)
+from tours.querysets import related_lookups
+from tours.serializers import (
+    FavoriteTourExpandedSerializer,
+    TourDetailSerializer,
+)
+from tours.tests.test_tour_api import (
+    TOURS_URL,
+    assert_constant_queries,
+    create_full_tour,
+    create_superuser,
+    create_tour,
+)
+
+
+FAVORITES_URL = reverse('tours:favorite-tours-list')
+TOGGLE_URL = reverse('tours:favorite-tours-toggle')
+SYNC_URL = reverse('tours:favorite-tours-sync')
+
+
+def create_user(email='user@example.com'):
+    """Create and return a regular user."""
+    return get_user_model().objects.create_user(
+        email=email, password='testpass123'
+    )
+
+
+class FavoriteTourApiTests(TestCase):
+    """Test favoriting tours through the API."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = create_user()
+        self.client.force_authenticate(self.user)
+        admin = create_superuser()
+        self.tours = [create_tour(user=admin) for _ in range(4)]
+
+    def favorite_ids(self):
+        """Return the ids of the tours the user favorited."""
+        return sorted(FavoriteTour.objects.filter(
+            user=self.user
+        ).values_list('tour_id', flat=True))
+
+    def test_create_favorite_twice(self):
+        """Test favoriting a tour again returns the existing favorite."""
+        payload = {'user': self.user.id, 'tour': self.tours[0].id}
+
+        first = self.client.post(FAVORITES_URL, payload)
+        second = self.client.post(FAVORITES_URL, payload)
+
+        self.assertEqual(second.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(first.data['id'], second.data['id'])
+        self.assertEqual(self.favorite_ids(), [self.tours[0].id])
+
+    def test_update_to_favorited_tour(self):
+        """Test moving a favorite onto a tour already favorited returns
+        400 and keeps both favorites."""
+        first = FavoriteTour.objects.create(user=self.user, tour=self.tours[0])
+        FavoriteTour.objects.create(user=self.user, tour=self.tours[1])
+        url = reverse('tours:favorite-tours-detail', args=[first.id])
+
+        res = self.client.patch(url, {'tour': self.tours[1].id})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('tour', res.data)
+        self.assertEqual(
+            self.favorite_ids(), [self.tours[0].id, self.tours[1].id]
+        )
+
+        res = self.client.patch(url, {'tour': self.tours[2].id})
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            self.favorite_ids(), [self.tours[1].id, self.tours[2].id]
+        )
+
+    def test_list_expanded(self):
+        """Test ?expand=tour embeds tours with constant queries."""
+        tour = create_full_tour(user=create_superuser())
+        FavoriteTour.objects.create(user=self.user, tour=tour)
+
+        res = self.client.get(FAVORITES_URL, {'expand': 'tour'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            res.data['results'][0]['tour'], TourDetailSerializer(tour).data
+        )
+        self.assertEqual(
+            related_lookups(FavoriteTourExpandedSerializer),
+            (('tour',), ('tour__pricing_options', 'tour__tags')),
+        )
+
+        def grow():
+            for _ in range(3):
+                FavoriteTour.objects.create(
+                    user=self.user,
+                    tour=create_full_tour(user=create_superuser()),
+                )
+
+        assert_constant_queries(
+            self,
+            lambda: self.client.get(FAVORITES_URL, {'expand': 'tour'}),
+            grow,
+        )
+
+    def test_tours_by_ids(self):
+        """Test ?ids= fetches several tours in one request."""
+        wanted = [self.tours[0].id, self.tours[2].id]
+
+        res = self.client.get(
+            TOURS_URL, {'ids': ','.join(str(pk) for pk in wanted)}
+        )
+
+        self.assertEqual(
+            sorted(tour['id'] for tour in res.data['results']), wanted
+        )
+
+    def test_toggle(self):
+        """Test toggling flips a favorite and an explicit state is
+        idempotent."""
+        tour = self.tours[0]
+
+        res = self.client.post(TOGGLE_URL, {'tour': tour.id})
+        self.assertEqual(res.data, {'tour': tour.id, 'favorite': True})
+        res = self.client.post(TOGGLE_URL, {'tour': tour.id})
+        self.assertEqual(res.data, {'tour': tour.id, 'favorite': False})
+
+        for _ in range(2):
+            res = self.client.post(
+                TOGGLE_URL,
+                {'tour': tour.id, 'favorite': True},
+                format='json',
+            )
+            self.assertEqual(res.data['favorite'], True)
+        self.assertEqual(self.favorite_ids(), [tour.id])
+
+        tour.refresh_from_db()
+        self.assertEqual(tour.favorite_count, 1)
+
+    def test_toggle_unknown_tour(self):
+        """Test toggling a missing tour is rejected."""
+        res = self.client.post(TOGGLE_URL, {'tour': self.tours[-1].id + 1})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_sync(self):
+        """Test adding and removing favorites in one request."""
+        first, second, third, fourth = (tour.id for tour in self.tours)
+        FavoriteTour.objects.create(user=self.user, tour=self.tours[0])
+
+        res = self.client.post(
+            SYNC_URL,
+            {'add': [first, second, third, fourth + 1], 'remove': [fourth]},
+            format='json',
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data, {'added': [second, third], 'removed': []})
+        self.assertEqual(self.favorite_ids(), [first, second, third])
+        self.assertEqual(
+            list(Tours.objects.order_by('id').values_list(
+                'favorite_count', flat=True
+            )),
+            [1, 1, 1, 0],
+        )
+
+        res = self.client.post(
+            SYNC_URL, {'remove': [first, second]}, format='json'
+        )
+        self.assertEqual(res.data, {'added': [], 'removed': [first, second]})
+        self.assertEqual(self.favorite_ids(), [third])
+
+    def test_sync_conflicting_tours(self):
+        """Test a tour cannot be both added and removed."""
+        tour_id = self.tours[0].id
+
+        res = self.client.post(
+            SYNC_URL, {'add': [tour_id], 'remove': [tour_id]}, format='json'
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.favorite_ids(), [])
+
+
+class FavoriteTourConcurrencyTests(TransactionTestCase):
+    """Test concurrent favorite requests neither duplicate nor
+    miscount favorites."""
+
+    workers = 8
+
+    def setUp(self):
+        cache.clear()
+        self.user = create_user()
+        admin = create_superuser()
+        self.tour_ids = [create_tour(user=admin).id for _ in range(3)]
+
+    def hammer(self, url, payload):
+        """POST payload to url from every worker at once and return the
+        status codes."""
+        def post(_):
+            client = APIClient()
+            client.force_authenticate(self.user)
+            try:
+                return client.post(url, payload, format='json').status_code
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return list(pool.map(post, range(self.workers)))
+
+    def test_concurrent_favorites(self):
+        """Test racing requests leave one favorite per tour."""
+        statuses = self.hammer(
+            TOGGLE_URL, {'tour': self.tour_ids[0], 'favorite': True}
+        )
+        statuses += self.hammer(SYNC_URL, {'add': self.tour_ids})
+
+        self.assertEqual(set(statuses), {status.HTTP_200_OK})
+        self.assertEqual(FavoriteTour.objects.count(), len(self.tour_ids))
+        self.assertEqual(
+            set(Tours.objects.values_list('favorite_count', flat=True)),
+            {1},
+        )
@@ -0,0 +1,152 @@
+"""
+Tests for filtering and faceting tours.
+"""
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Tag,
+    PricingOption,
+)
+from tours.tests.test_tour_api import (
+    TOURS_URL,
+    create_superuser,
+    create_tour,
+)
+
+
+FACETS_URL = reverse('tours:tours-facets')
+
+
+def create_option(tour, price, special_price=None):
+    """Create and return a pricing option for tour."""
+    return PricingOption.objects.create(
+        tour=tour,
+        option_name='Standard',
+        option_price=Decimal(price),
+        special_price=special_price and Decimal(special_price),
+    )
+
+
+class TourFilterTests(TestCase):
+    """Test filtering the tour list."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        user = create_superuser()
+        self.beach = Tag.objects.create(name='Beach')
+        self.food = Tag.objects.create(name='Food')
+
+        self.short = create_tour(user=user, title='Short', time_minutes=30)
+        self.short.tags.add(self.beach, self.food)
+        create_option(self.short, '40.00')
+
+        self.long = create_tour(user=user, title='Long', time_minutes=240)
+        self.long.tags.add(self.beach)
+        create_option(self.long, '300.00', special_price='150.00')
+        create_option(self.long, '250.00')
+
+        self.free = create_tour(user=user, title='Free', time_minutes=60)
+
+    def titles(self, **params):
+        """List tours with params and return their titles."""
+        res = self.client.get(TOURS_URL, params)
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        return [tour['title'] for tour in res.data['results']]
+
+    def test_filter_by_tags(self):
+        """Test tours must carry every requested tag."""
+        self.assertEqual(self.titles(tags=self.beach.id), ['Long', 'Short'])
+        self.assertEqual(
+            self.titles(tags=f'{self.beach.id},{self.food.id}'),
+            ['Short'],
+        )
+
+    def test_filter_by_minutes(self):
+        """Test duration bounds are inclusive."""
+        self.assertEqual(
+            self.titles(min_minutes=60, max_minutes=240),
+            ['Free', 'Long'],
+        )
+
+    def test_filter_by_price(self):
+        """Test price bounds apply to the cheapest option."""
+        self.assertEqual(self.titles(max_price='150'), ['Long', 'Short'])
+        self.assertEqual(self.titles(min_price='100.00'), ['Long'])
+
+    def test_invalid_filter(self):
+        """Test malformed filters are rejected."""
+        res = self.client.get(TOURS_URL, {'min_price': 'cheap'})
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('min_price', res.data)
+
+    def test_invalid_ids(self):
+        """Test ids outside the bigint range are rejected."""
+        for url in (TOURS_URL, FACETS_URL):
+            for value in ('99999999999999999999', '0', '-1', '1,x'):
+                for name in ('ids', 'tags'):
+                    res = self.client.get(url, {name: value})
+
+                    self.assertEqual(
+                        res.status_code, status.HTTP_400_BAD_REQUEST
+                    )
+                    self.assertIn(name, res.data)
+
+    @override_settings(TOURS_FILTER_MAX_IDS=2)
+    def test_too_many_ids(self):
+        """Test long id lists are rejected."""
+        self.titles(ids='1,2,2')
+
+        for name in ('ids', 'tags'):
+            res = self.client.get(TOURS_URL, {name: '1,2,3'})
+
+            self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+            self.assertIn(name, res.data)
+
+    def test_min_price_follows_pricing_options(self):
+        """Test min_price is kept in sync with pricing options."""
+        self.long.refresh_from_db()
+        self.assertEqual(self.long.min_price, Decimal('150.00'))
+
+        PricingOption.objects.filter(tour=self.long).apply_discount(50)
+        self.long.refresh_from_db()
+        self.assertEqual(self.long.min_price, Decimal('125.00'))
+
+        PricingOption.objects.filter(tour=self.long).delete()
+        self.long.refresh_from_db()
+        self.assertIsNone(self.long.min_price)
+
+    @override_settings(TOURS_PRICE_BUCKETS=(50, 200))
+    def test_facets(self):
+        """Test tag and price counts come from a single query."""
+        with self.assertNumQueries(1):
+            res = self.client.get(FACETS_URL, {'min_minutes': 30})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res.data['count'], 3)
+        self.assertEqual(res.data['tags'], [
+            {'id': self.beach.id, 'name': 'Beach', 'count': 2},
+            {'id': self.food.id, 'name': 'Food', 'count': 1},
+        ])
+        self.assertEqual(res.data['prices'], [
+            {'min': None, 'max': '50.00', 'count': 1},
+            {'min': '50.00', 'max': '200.00', 'count': 1},
+            {'min': '200.00', 'max': None, 'count': 0},
+        ])
+
+    def test_facets_follow_filters(self):
+        """Test facets only count tours matching the filters."""
+        res = self.client.get(FACETS_URL, {'tags': self.food.id})
+
+        self.assertEqual(res.data['count'], 1)
+        self.assertEqual(
+            [tag['name'] for tag in res.data['tags']], ['Beach', 'Food']
+        )
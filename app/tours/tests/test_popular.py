@@ -0,0 +1,186 @@
+"""
+Tests for tour favorite counts and the popular tours API.
+"""
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Tours,
+    FavoriteTour,
+    TourSummary,
+)
+from tours.tests.test_tour_api import (
+    TOURS_URL,
+    create_superuser,
+    create_tour,
+)
+
+
+POPULAR_URL = reverse('tours:tours-popular')
+
+
+def create_user(email):
+    """Create and return a regular user."""
+    return get_user_model().objects.create_user(
+        email=email, password='testpass123'
+    )
+
+
+class FavoriteCountTests(TestCase):
+    """Test the stored favorite count of tours."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        admin = create_superuser()
+        self.users = [create_user(f'user{n}@example.com') for n in range(3)]
+        self.reef = create_tour(user=admin, title='Reef')
+        self.ruins = create_tour(user=admin, title='Ruins')
+        self.jungle = create_tour(user=admin, title='Jungle')
+
+    def favorite_counts(self):
+        """Return the stored favorite count of each tour by title."""
+        return dict(Tours.objects.values_list('title', 'favorite_count'))
+
+    def test_count_follows_favorites(self):
+        """Test creating, moving and deleting favorites keeps counts."""
+        first = FavoriteTour.objects.create(user=self.users[0], tour=self.reef)
+        FavoriteTour.objects.create(user=self.users[1], tour=self.reef)
+        self.assertEqual(self.favorite_counts()['Reef'], 2)
+
+        first.tour = self.ruins
+        first.save()
+        self.assertEqual(
+            self.favorite_counts(), {'Reef': 1, 'Ruins': 1, 'Jungle': 0}
+        )
+
+        first.delete()
+        self.assertEqual(self.favorite_counts()['Ruins'], 0)
+        self.assertEqual(
+            TourSummary.objects.get(pk=self.reef.pk).favorite_count, 1
+        )
+
+    def test_popular_tours(self):
+        """Test popular tours are ranked by favorite count without
+        counting favorites."""
+        for user in self.users:
+            FavoriteTour.objects.create(user=user, tour=self.ruins)
+        FavoriteTour.objects.create(user=self.users[0], tour=self.jungle)
+
+        res = self.client.get(POPULAR_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [(tour['title'], tour['favorite_count'])
+             for tour in res.data['results']],
+            [('Ruins', 3), ('Jungle', 1), ('Reef', 0)],
+        )
+
+        FavoriteTour.objects.filter(tour=self.ruins).delete()
+        res = self.client.get(POPULAR_URL, {'page_size': 1})
+        self.assertEqual(res.data['results'][0]['title'], 'Jungle')
+
+    def test_favorites_keep_listings_cached(self):
+        """Test a favorite refreshes the popular ranking but keeps the
+        cached tour list."""
+        etag = self.client.get(TOURS_URL)['ETag']
+        self.client.get(POPULAR_URL)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            FavoriteTour.objects.create(user=self.users[0], tour=self.reef)
+
+        res = self.client.get(TOURS_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+        res = self.client.get(POPULAR_URL)
+        self.assertEqual(
+            res.data['results'][0],
+            {
+                'id': self.reef.id,
+                'title': 'Reef',
+                'time_minutes': self.reef.time_minutes,
+                'link': self.reef.link,
+                'favorite_count': 1,
+            },
+        )
+
+        self.reef.refresh_from_db()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.reef.title = 'Coral reef'
+            self.reef.save()
+        res = self.client.get(POPULAR_URL)
+        self.assertEqual(res.data['results'][0]['title'], 'Coral reef')
+
+    def test_reconcile_command_repairs_drift(self):
+        """Test reconcile_favorite_counts fixes counts in batches."""
+        FavoriteTour.objects.create(user=self.users[0], tour=self.reef)
+        FavoriteTour.objects.bulk_create([
+            FavoriteTour(user=user, tour=self.jungle) for user in self.users
+        ])
+        Tours.objects.filter(pk=self.ruins.pk).update(favorite_count=5)
+        out = StringIO()
+
+        call_command('reconcile_favorite_counts', batch_size=2, stdout=out)
+
+        self.assertEqual(
+            self.favorite_counts(), {'Reef': 1, 'Ruins': 0, 'Jungle': 3}
+        )
+        self.assertEqual(
+            TourSummary.objects.get(pk=self.jungle.pk).favorite_count, 3
+        )
+        self.assertIn('Repaired 2 of 3 tours.', out.getvalue())
+
+
+class PopularPaginationTests(TestCase):
+    """Test paging through popular tours."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+
+    def test_pages_past_many_ties(self):
+        """Test paging reaches every tour when more than the cursor
+        offset cutoff are tied on their favorite count."""
+        admin = create_superuser()
+        Tours.objects.bulk_create(
+            Tours(user=admin, title=f'Tour {n}', time_minutes=60)
+            for n in range(1250)
+        )
+        Tours.objects.filter(
+            pk__in=Tours.objects.order_by('id').values('pk')[:5]
+        ).update(favorite_count=2)
+        expected = list(
+            Tours.objects.order_by('-favorite_count', '-id')
+            .values_list('id', flat=True)
+        )
+
+        ids, url, params = [], POPULAR_URL, {'page_size': 100}
+        for _ in range(20):
+            res = self.client.get(url, params)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            ids.extend(tour['id'] for tour in res.data['results'])
+            url, params = res.data['next'], None
+            if url is None:
+                break
+
+        self.assertIsNone(url)
+        self.assertEqual(ids, expected)
+
+        res = self.client.get(res.data['previous'])
+        self.assertEqual(
+            [tour['id'] for tour in res.data['results']],
+            expected[1100:1200],
+        )
+
+    def test_invalid_cursor(self):
+        """Test a malformed cursor returns 404."""
+        res = self.client.get(POPULAR_URL, {'cursor': 'bm9wZQ=='})
+
+        self.assertEqual(res.status_code, status.HTTP_404_NOT_FOUND)
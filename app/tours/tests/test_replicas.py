@@ -0,0 +1,175 @@
+"""
+Tests for routing tour API reads to read replicas.
+"""
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import AuthToken, FavoriteTour, Tours, TourSummary
+from core.routers import ReplicaRouter, _read_alias, reads_from_replica
+from tours.tests.test_tour_api import (
+    TOURS_URL,
+    create_superuser,
+    create_tour,
+    detail_url,
+)
+
+
+REPLICA = 'replica_test'
+FAVORITES_URL = reverse('tours:favorite-tours-list')
+FACETS_URL = reverse('tours:tours-facets')
+TOGGLE_URL = reverse('tours:favorite-tours-toggle')
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA])
+class ReplicaRoutingTests(TransactionTestCase):
+    """Test safe requests read from the replica and writes never do.
+
+    The replica is a second connection to the test database, like a
+    DATABASES alias with TEST MIRROR set, so its queries can be told
+    apart from the primary's.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        connections.settings[REPLICA] = dict(
+            connections[DEFAULT_DB_ALIAS].settings_dict
+        )
+
+    @classmethod
+    def tearDownClass(cls):
+        connections[REPLICA].close()
+        del connections[REPLICA]
+        del connections.settings[REPLICA]
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password='testpass123'
+        )
+        self.client.force_authenticate(self.user)
+        self.tour = create_tour(user=create_superuser())
+
+    def queries(self, method, url, data=None):
+        """Make a request and return the status and the query counts
+        on the primary and the replica."""
+        with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as primary, \
+                CaptureQueriesContext(connections[REPLICA]) as replica:
+            res = getattr(self.client, method)(url, data, format='json')
+
+        return res.status_code, len(primary), len(replica)
+
+    def test_router(self):
+        """Test only opted-in reads use the replica."""
+        router = ReplicaRouter()
+
+        self.assertEqual(router.db_for_read(Tours), DEFAULT_DB_ALIAS)
+        with reads_from_replica():
+            self.assertEqual(router.db_for_read(Tours), REPLICA)
+            self.assertEqual(router.db_for_write(Tours), DEFAULT_DB_ALIAS)
+        self.assertFalse(router.allow_migrate(REPLICA, 'core'))
+
+    def test_reads_use_replica(self):
+        """Test uncached reads are served from the replica."""
+        for url in (FACETS_URL, FAVORITES_URL):
+            cache.clear()
+            status_code, primary, replica = self.queries('get', url)
+
+            self.assertEqual(status_code, status.HTTP_200_OK)
+            self.assertEqual(primary, 0, url)
+            self.assertGreater(replica, 0, url)
+
+    def test_cache_filled_from_primary(self):
+        """Test cached responses are only ever built from the primary."""
+        for url in (TOURS_URL, detail_url(self.tour.id)):
+            cache.clear()
+            status_code, primary, replica = self.queries('get', url)
+
+            self.assertEqual(status_code, status.HTTP_200_OK)
+            self.assertGreater(primary, 0, url)
+            self.assertEqual(replica, 0, url)
+
+    def test_lagging_replica_not_cached(self):
+        """Test a lagging replica cannot cache old rows under the
+        version bumped for the new ones."""
+        url = detail_url(self.tour.id)
+        self.client = APIClient()
+        self.client.get(url)
+
+        # A snapshot taken before the write stands in for replica lag.
+        with connections[REPLICA].cursor() as cursor:
+            cursor.execute('BEGIN ISOLATION LEVEL REPEATABLE READ')
+            cursor.execute(f'SELECT 1 FROM {Tours._meta.db_table}')
+            try:
+                self.tour.title = 'New title'
+                self.tour.save()
+
+                for _ in range(2):
+                    res = self.client.get(url)
+                    self.assertEqual(res.data['title'], 'New title')
+            finally:
+                cursor.execute('ROLLBACK')
+
+    def test_writes_use_primary(self):
+        """Test writes, and reads made while writing, use the primary."""
+        status_code, primary, replica = self.queries(
+            'post', TOGGLE_URL, {'tour': self.tour.id}
+        )
+
+        self.assertEqual(status_code, status.HTTP_200_OK)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+        self.assertTrue(FavoriteTour.objects.filter(user=self.user).exists())
+
+    def test_reads_stick_to_primary_after_write(self):
+        """Test a user reads from the primary right after a write."""
+        other = APIClient()
+        self.client.post(TOGGLE_URL, {'tour': self.tour.id})
+
+        status_code, primary, replica = self.queries('get', FAVORITES_URL)
+
+        self.assertEqual(status_code, status.HTTP_200_OK)
+        self.assertGreater(primary, 0)
+        self.assertEqual(replica, 0)
+
+        self.client = other
+        _, primary, replica = self.queries('get', FACETS_URL)
+        self.assertEqual(primary, 0)
+        self.assertGreater(replica, 0)
+
+    def test_replica_scope_closed_on_error(self):
+        """Test an exception escaping a replica read leaves later reads
+        on the primary."""
+        with patch(
+            'tours.views.FavoriteTourViewSet.get_queryset',
+            side_effect=RuntimeError,
+        ):
+            with self.assertRaises(RuntimeError):
+                self.client.get(FAVORITES_URL)
+
+        self.assertIsNone(_read_alias.get())
+        self.assertEqual(ReplicaRouter().db_for_read(Tours), DEFAULT_DB_ALIAS)
+
+    def test_raw_writes_use_primary(self):
+        """Test raw SQL writes go to the primary inside a replica
+        scope."""
+        with CaptureQueriesContext(connections[REPLICA]) as replica, \
+                reads_from_replica():
+            FavoriteTour.objects.favorite(self.user, [self.tour.pk])
+            FavoriteTour.objects.unfavorite(self.user, [self.tour.pk])
+            TourSummary.objects.refresh([self.tour.pk])
+            AuthToken.objects.purge_expired(10)
+
+        self.assertEqual(len(replica), 0)
+        self.assertTrue(TourSummary.objects.filter(id=self.tour.pk).exists())
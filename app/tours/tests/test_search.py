@@ -0,0 +1,127 @@
+"""
+Tests for tour search.
+"""
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import Tag
+from tours.search import trigram_available
+from tours.tests.test_tour_api import (
+    create_superuser,
+    create_tour,
+)
+
+
+SEARCH_URL = reverse('tours:tours-search')
+
+
+def search_titles(client, terms, **params):
+    """Search tours and return the titles of the results."""
+    res = client.get(SEARCH_URL, {'q': terms, **params})
+    return [tour['title'] for tour in res.data['results']]
+
+
+class TourSearchTests(TestCase):
+    """Test searching tours."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = create_superuser()
+
+    def test_search_requires_terms(self):
+        """Test searching without q is rejected."""
+        res = self.client.get(SEARCH_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_title_ranks_above_description(self):
+        """Test title matches outrank description matches."""
+        create_tour(
+            user=self.user,
+            title='Island hopping',
+            description='<p>Visit a hidden cenote.</p>',
+        )
+        create_tour(user=self.user, title='Cenote swim')
+        create_tour(user=self.user, title='Market walk')
+
+        titles = search_titles(self.client, 'cenotes')
+
+        self.assertEqual(titles, ['Cenote swim', 'Island hopping'])
+
+    def test_description_html_is_stripped(self):
+        """Test HTML markup in descriptions is not indexed."""
+        create_tour(
+            user=self.user,
+            title='Reef dive',
+            description='<strong class="lead">Coral</strong> reef.',
+        )
+
+        self.assertEqual(search_titles(self.client, 'strong'), [])
+        self.assertEqual(search_titles(self.client, 'lead'), [])
+        self.assertEqual(search_titles(self.client, 'coral'), ['Reef dive'])
+
+    def test_description_entities_are_decoded(self):
+        """Test character references in descriptions are indexed as the
+        characters they encode."""
+        create_tour(
+            user=self.user,
+            title='Canyon ride',
+            description='<p>Ca&ntilde;&oacute;n&nbsp;rapids, '
+                        'then caf&eacute; &amp; churros&#x21;</p>',
+        )
+
+        self.assertEqual(search_titles(self.client, 'cañón'), ['Canyon ride'])
+        self.assertEqual(search_titles(self.client, 'rapids'), ['Canyon ride'])
+        self.assertEqual(search_titles(self.client, 'café'), ['Canyon ride'])
+        self.assertEqual(search_titles(self.client, 'ntilde'), [])
+        self.assertEqual(search_titles(self.client, 'nbsp'), [])
+
+    def test_results_are_limited(self):
+        """Test page_size caps the number of results."""
+        for number in range(3):
+            create_tour(user=self.user, title=f'Jungle trek {number}')
+
+        titles = search_titles(self.client, 'jungle', page_size=2)
+
+        self.assertEqual(titles, ['Jungle trek 2', 'Jungle trek 1'])
+
+    def test_vector_follows_title_changes(self):
+        """Test saving a tour reindexes it."""
+        tour = create_tour(user=self.user, title='Sunset sail')
+        tour.title = 'Sunrise sail'
+        tour.save()
+
+        self.assertEqual(search_titles(self.client, 'sunset'), [])
+        self.assertEqual(search_titles(self.client, 'sunrise'), [tour.title])
+
+    def test_vector_follows_tags(self):
+        """Test adding, renaming and deleting tags reindexes tours."""
+        tour = create_tour(user=self.user, title='Evening walk')
+        tag = Tag.objects.create(name='Gastronomy')
+
+        tour.tags.add(tag)
+        titles = search_titles(self.client, 'gastronomy')
+        self.assertEqual(titles, [tour.title])
+
+        tag.name = 'Nightlife'
+        tag.save()
+        self.assertEqual(search_titles(self.client, 'gastronomy'), [])
+        self.assertEqual(search_titles(self.client, 'nightlife'), [tour.title])
+
+        tag.delete()
+        self.assertEqual(search_titles(self.client, 'nightlife'), [])
+
+    def test_typo_falls_back_to_trigrams(self):
+        """Test a misspelt search finds tours with similar titles."""
+        if not trigram_available():
+            self.skipTest('pg_trgm is not installed.')
+        create_tour(user=self.user, title='Snorkel adventure')
+
+        titles = search_titles(self.client, 'snorkle adventure')
+
+        self.assertEqual(titles, ['Snorkel adventure'])
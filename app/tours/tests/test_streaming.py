@@ -0,0 +1,137 @@
+"""
+Tests for streamed list responses.
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.test import TestCase
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import (
+    Tours,
+    Tag,
+    TourSummary,
+)
+from tours.tests.test_tour_api import (
+    TOURS_URL,
+    assert_constant_queries,
+    create_full_tour,
+    create_superuser,
+    create_tour,
+)
+from tours.views import TourViewSet
+
+
+TAGS_URL = reverse('tours:tag-list')
+
+
+def stream(client, url, **extra):
+    """Request a streamed listing and return the response and body."""
+    res = client.get(url, {'stream': 'true'}, **extra)
+    body = b''.join(res.streaming_content) if res.streaming else None
+
+    return res, body
+
+
+class StreamingListTests(TestCase):
+    """Test listing with ?stream=true."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = create_superuser()
+
+    def test_stream_matches_buffered_results(self):
+        """Test the streamed body renders every tour like the list."""
+        for number in range(3):
+            create_tour(user=self.user, title=f'Tour {number}')
+
+        res, body = stream(self.client, TOURS_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertEqual(res['Content-Type'], 'application/json')
+        expected = self.client.get(TOURS_URL).data['results']
+        self.assertEqual(json.loads(body), json.loads(json.dumps(expected)))
+
+    def test_stream_is_not_paginated(self):
+        """Test streaming returns all rows, past the page size."""
+        Tag.objects.bulk_create(
+            Tag(name=f'Tag {number:02}') for number in range(25)
+        )
+
+        res, body = stream(self.client, TAGS_URL, page_size=5)
+
+        names = [tag['name'] for tag in json.loads(body)]
+        self.assertEqual(len(names), 25)
+        self.assertEqual(names, sorted(names, reverse=True))
+
+    def test_stream_empty(self):
+        """Test an empty listing streams an empty array."""
+        res, body = stream(self.client, TOURS_URL)
+
+        self.assertEqual(body, b'[]')
+
+    def test_stream_is_not_cached(self):
+        """Test streamed listings bypass the response cache."""
+        create_tour(user=self.user)
+        stream(self.client, TOURS_URL)
+        TourSummary.objects.update(title='Renamed')
+
+        res, body = stream(self.client, TOURS_URL)
+
+        self.assertEqual(json.loads(body)[0]['title'], 'Renamed')
+
+    def test_stream_conditional_get(self):
+        """Test streamed listings still answer If-None-Match with 304."""
+        Tag.objects.create(name='Beach')
+        res, _ = stream(self.client, TAGS_URL)
+
+        res, _ = stream(
+            self.client, TAGS_URL, HTTP_IF_NONE_MATCH=res['ETag']
+        )
+
+        self.assertEqual(res.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_stream_tags_match_serializer(self):
+        """Test streamed tags render like the buffered listing."""
+        Tag.objects.bulk_create(
+            Tag(name=f'Tag {number:02}') for number in range(3)
+        )
+
+        res, body = stream(self.client, TAGS_URL)
+
+        expected = self.client.get(TAGS_URL).data['results']
+        self.assertEqual(json.loads(body), json.loads(json.dumps(expected)))
+
+    async def test_stream_under_asgi(self):
+        """Test ASGI requests get the streamed array as a regular
+        response, built off the event loop."""
+        await sync_to_async(create_tour)(user=self.user, title='Tour')
+
+        # Django 3.2's AsyncClient ignores query data passed separately.
+        res = await self.async_client.get(f'{TOURS_URL}?stream=true')
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.assertFalse(res.streaming)
+        self.assertEqual(json.loads(res.content)[0]['title'], 'Tour')
+
+    def test_stream_chunks_prefetch_related(self):
+        """Test each chunk prefetches relations in constant queries."""
+        view = TourViewSet(action='retrieve')
+        create_full_tour(user=self.user)
+
+        def run():
+            for chunk in view.stream_chunks(Tours.objects.order_by('id')):
+                for tour in chunk:
+                    list(tour.tags.all())
+                    list(tour.pricing_options.all())
+
+        assert_constant_queries(
+            self,
+            run,
+            lambda: [create_full_tour(user=self.user) for _ in range(3)],
+        )
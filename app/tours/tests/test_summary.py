@@ -0,0 +1,114 @@
+"""
+Tests for the tour summaries backing the list endpoint.
+"""
+from decimal import Decimal
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework.test import APIClient
+
+from core.models import (
+    Tours,
+    Tag,
+    PricingOption,
+    FavoriteTour,
+    TourSummary,
+)
+from tours.tests.test_tour_api import (
+    TOURS_URL,
+    create_full_tour,
+    create_superuser,
+    create_tour,
+)
+
+
+class TourSummaryTests(TestCase):
+    """Test tour summaries follow the rows they are built from."""
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.user = create_superuser()
+        self.tour = create_full_tour(user=self.user, title='Reef')
+
+    def summary(self):
+        """Return the current summary of self.tour."""
+        return TourSummary.objects.get(pk=self.tour.pk)
+
+    def test_summary_created_with_tour(self):
+        """Test a new tour gets a summary with its list projection."""
+        summary = self.summary()
+
+        self.assertEqual(summary.title, 'Reef')
+        self.assertEqual(summary.tag_names, ['Beach'])
+        self.assertEqual(summary.min_price, Decimal('100.00'))
+        self.assertEqual(summary.max_price, Decimal('135.00'))
+        self.assertEqual(summary.favorite_count, 0)
+
+    def test_summary_follows_related_rows(self):
+        """Test tags, pricing options and favorites refresh summaries."""
+        tag = Tag.objects.create(name='Aquatic')
+        self.tour.tags.add(tag)
+        self.assertEqual(self.summary().tag_names, ['Aquatic', 'Beach'])
+
+        tag.name = 'Snorkel'
+        tag.save()
+        self.assertEqual(self.summary().tag_names, ['Beach', 'Snorkel'])
+
+        PricingOption.objects.filter(
+            tour=self.tour, option_name='VIP'
+        ).delete()
+        self.assertEqual(self.summary().max_price, Decimal('100.00'))
+
+        favorite = FavoriteTour.objects.create(user=self.user, tour=self.tour)
+        self.assertEqual(self.summary().favorite_count, 1)
+        favorite.delete()
+        self.assertEqual(self.summary().favorite_count, 0)
+
+    def test_summary_deleted_with_tour(self):
+        """Test deleting a tour removes its summary."""
+        self.tour.delete()
+
+        self.assertFalse(TourSummary.objects.exists())
+
+    def test_list_reads_only_summaries(self):
+        """Test listing tours selects rows from the summary table only."""
+        create_tour(user=self.user)
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(TOURS_URL)
+
+        self.assertEqual(len(res.data['results']), 2)
+        self.assertEqual(res.data['results'][1]['tags'], ['Beach'])
+        tables = {
+            table
+            for query in queries.captured_queries
+            for table in (
+                'core_tours', 'core_tag', 'core_pricingoption',
+                'core_favoritetour',
+            )
+            if f'"{table}"' in query['sql']
+        }
+        self.assertEqual(tables, set())
+
+    def test_refresh_command_repairs_drift(self):
+        """Test refresh_tour_summaries rebuilds stale and orphan rows."""
+        Tours.objects.filter(pk=self.tour.pk).update(title='Renamed')
+        TourSummary.objects.create(
+            id=self.tour.pk + 100,
+            title='Gone',
+            time_minutes=1,
+            updated_at=self.summary().updated_at,
+        )
+        out = StringIO()
+
+        call_command('refresh_tour_summaries', stdout=out)
+
+        self.assertEqual(self.summary().title, 'Renamed')
+        self.assertEqual(TourSummary.objects.count(), 1)
+        self.assertIn('Refreshed 1 tours.', out.getvalue())
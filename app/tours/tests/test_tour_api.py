@@ -1,18 +1,33 @@
 """
 Tests for tours APIs.
 """
+from decimal import Decimal
+
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
 from rest_framework import status
 from rest_framework.test import APIClient
 
-from core.models import Tours
+from core.models import (
+    Tours,
+    Tag,
+    PricingOption,
+    TourSummary,
+)
 
+from tours.querysets import (
+    eager_load,
+    related_lookups,
+)
 from tours.serializers import (
     TourSerializer,
-    TourDetailSerializer
+    TourDetailSerializer,
+    TourSummarySerializer,
 )
 
 
@@ -58,10 +73,46 @@ def create_tour(user, **params):
     return Tours.objects.create(**defaults)
 
 
+def create_full_tour(user, **params):
+    """Create and return a tour with pricing options and tags."""
+    tour = create_tour(user=user, **params)
+    PricingOption.objects.create(
+        tour=tour,
+        option_name='Standard',
+        option_price=Decimal('100.00'),
+    )
+    PricingOption.objects.create(
+        tour=tour,
+        option_name='VIP',
+        option_price=Decimal('150.00'),
+        discount_percentage=Decimal('10.00'),
+    )
+    tag, _ = Tag.objects.get_or_create(name='Beach')
+    tour.tags.add(tag)
+
+    return tour
+
+
+def assert_constant_queries(test, run, grow):
+    """Assert run() issues the same number of queries after grow()."""
+    with CaptureQueriesContext(connection) as before:
+        run()
+    grow()
+    with CaptureQueriesContext(connection) as after:
+        run()
+
+    test.assertEqual(
+        len(before.captured_queries),
+        len(after.captured_queries),
+        'Query count grew with the number of rows.',
+    )
+
+
 class PublicToursAPITests(TestCase):
     """Test unauthenticated API requests."""
 
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
 
     def test_retrieve_tours(self):
@@ -71,16 +122,17 @@ class PublicToursAPITests(TestCase):
 
         res = self.client.get(TOURS_URL)
 
-        tours = Tours.objects.all().order_by('-id')
-        serializer = TourSerializer(tours, many=True)
+        summaries = TourSummary.objects.all().order_by('-id')
+        serializer = TourSummarySerializer(summaries, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
 
 class PrivateTourApiTests(TestCase):
     """Test authenticated API requests."""
 
     def setUp(self):
+        cache.clear()
         self.client = APIClient()
         self.superuser = create_superuser()
         self.client.force_authenticate(self.superuser)
@@ -92,10 +144,10 @@ class PrivateTourApiTests(TestCase):
 
         res = self.client.get(TOURS_URL)
 
-        tours = Tours.objects.all().order_by('-id')
-        serializer = TourSerializer(tours, many=True)
+        summaries = TourSummary.objects.all().order_by('-id')
+        serializer = TourSummarySerializer(summaries, many=True)
         self.assertEqual(res.status_code, status.HTTP_200_OK)
-        self.assertEqual(res.data, serializer.data)
+        self.assertEqual(res.data['results'], serializer.data)
 
     def test_get_tour_detail(self):
         """Test get tour detail."""
@@ -106,3 +158,68 @@ class PrivateTourApiTests(TestCase):
 
         serializer = TourDetailSerializer(tour)
         self.assertEqual(res.data, serializer.data)
+
+    def test_list_paginated_by_cursor(self):
+        """Test listing tours walks pages without OFFSET or COUNT."""
+        tours = [create_tour(user=self.superuser) for _ in range(5)]
+
+        with CaptureQueriesContext(connection) as queries:
+            res = self.client.get(TOURS_URL, {'page_size': 2})
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+            self.assertIsNone(res.data['previous'])
+            ids = [tour['id'] for tour in res.data['results']]
+
+            while res.data['next']:
+                # A tour created mid-walk must not shift the later pages.
+                create_tour(user=self.superuser)
+                res = self.client.get(res.data['next'])
+                ids.extend(tour['id'] for tour in res.data['results'])
+
+        self.assertEqual(ids, [tour.id for tour in reversed(tours)])
+        for query in queries.captured_queries:
+            if not query['sql'].startswith('SELECT'):
+                continue
+            self.assertNotIn('COUNT(', query['sql'])
+            self.assertNotIn('OFFSET', query['sql'])
+
+    def test_list_query_count_constant(self):
+        """Test listing tours uses a constant number of queries."""
+        create_full_tour(user=self.superuser)
+
+        def grow():
+            with self.captureOnCommitCallbacks(execute=True):
+                for _ in range(5):
+                    create_full_tour(user=self.superuser)
+
+        assert_constant_queries(
+            self, lambda: self.client.get(TOURS_URL), grow
+        )
+
+
+class TourQuerysetTests(TestCase):
+    """Test the eager loading helpers."""
+
+    def setUp(self):
+        self.superuser = create_superuser()
+
+    def test_related_lookups_from_serializer(self):
+        """Test lookups are derived from the serializer fields."""
+        self.assertEqual(related_lookups(TourSerializer), ((), ()))
+        self.assertEqual(
+            related_lookups(TourDetailSerializer),
+            ((), ('pricing_options', 'tags')),
+        )
+
+    def test_detail_serializer_query_count_constant(self):
+        """Test nested tour data is rendered with constant queries."""
+        create_full_tour(user=self.superuser)
+
+        def run():
+            queryset = eager_load(Tours.objects.all(), TourDetailSerializer)
+            return TourDetailSerializer(queryset, many=True).data
+
+        def grow():
+            for _ in range(5):
+                create_full_tour(user=self.superuser)
+
+        assert_constant_queries(self, run, grow)
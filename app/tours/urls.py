@@ -8,7 +8,7 @@ from django.urls import (
 
 from rest_framework.routers import DefaultRouter
 
-from tours import views
+from tours import async_views, views
 
 
 router = DefaultRouter()
@@ -24,4 +24,19 @@ app_name = 'tours'
 
 urlpatterns = [
     path('', include(router.urls)),
+    path(
+        'async/tours/',
+        async_views.tour_list,
+        name='async-tours-list',
+    ),
+    path(
+        'async/tours/<int:pk>/',
+        async_views.tour_detail,
+        name='async-tours-detail',
+    ),
+    path(
+        'async/tags/',
+        async_views.tag_list,
+        name='async-tag-list',
+    ),
 ]
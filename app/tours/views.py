@@ -1,43 +1,101 @@
 """
 Views for the tour APIs
 """
+import codecs
+
+from django.db import IntegrityError, transaction
+
 from rest_framework import (
     viewsets,
     mixins,
     status,
     permissions
 )
-from rest_framework.authentication import TokenAuthentication
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.permissions import BasePermission
 
 from core.models import (
     Tours,
     Tag,
-    FavoriteTour
+    FavoriteTour,
+    TourSummary,
 )
 from tours import serializers
+from tours.bulk import (
+    FORMATS,
+    TourImportError,
+    export_tours,
+    feed_fingerprint,
+    guess_format,
+    import_tours,
+    read_rows,
+)
+from tours.cache import (
+    CATALOGUE_VERSION_KEY,
+    POPULARITY_VERSION_KEY,
+    TAGS_VERSION_KEY,
+    CatalogueCacheMixin,
+    get_version,
+)
+from tours.conditional import ConditionalGetMixin
+from tours.fast import FastTourReadMixin, summary_chunks
+from tours.filters import TourFilterBackend, facet_counts
+from tours.pagination import (
+    TourPagination,
+    PopularTourPagination,
+    TagPagination,
+    FavoriteTourPagination,
+)
+from tours.querysets import eager_load
+from tours.replicas import ReplicaReadMixin
+from tours.search import search_tours
+from tours.streaming import StreamingListMixin, streaming_response
+from user.authentication import CachedTokenAuthentication
 
 
-class TourViewSet(viewsets.ModelViewSet):
+class TourViewSet(ReplicaReadMixin, CatalogueCacheMixin,
+                  ConditionalGetMixin, StreamingListMixin,
+                  FastTourReadMixin, viewsets.ModelViewSet):
     """View for manage tours APIs."""
+    replica_actions = ('list', 'retrieve', 'search', 'facets', 'popular')
+    # CatalogueCacheMixin already validates lists by catalogue version.
+    conditional_actions = ('retrieve',)
     serializer_class = serializers.TourDetailSerializer
     queryset = Tours.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
+    pagination_class = TourPagination
+    filter_backends = [TourFilterBackend]
+    detail_modified_fields = (
+        'updated_at',
+        'pricing_options__updated_at',
+        'tags__updated_at',
+    )
 
     def get_queryset(self):
         """Retrieve tours for all users."""
-        return self.queryset.all().order_by('-id')
+        if self.action == 'list':
+            return TourSummary.objects.order_by('-id')
+        elif self.action == 'popular':
+            return self.queryset.order_by('-favorite_count', '-id')
+
+        queryset = self.queryset.all().order_by('-id')
+        return eager_load(queryset, self.get_serializer_class())
 
     def get_serializer_class(self):
         """Return the serializer class for request."""
         if self.action == 'list':
-            return serializers.TourSerializer
+            return serializers.TourSummarySerializer
         elif self.action == 'retrieve':
             return serializers.TourDetailSerializer
 
         return self.serializer_class
 
+    def stream_data(self, queryset):
+        """Stream the tour list from summary rows, like list does."""
+        return summary_chunks(queryset, self.stream_chunk_size)
+
     def perform_create(self, serializer):
         """Create a new tour."""
         if not self.request.user.is_superuser:
@@ -49,6 +107,106 @@ class TourViewSet(viewsets.ModelViewSet):
         # Return the created tour
         return tour
 
+    @action(
+        detail=False,
+        methods=['get'],
+        serializer_class=serializers.TourSerializer,
+    )
+    def search(self, request):
+        """Return the tours best matching ?q=, most relevant first."""
+        terms = request.query_params.get('q', '').strip()
+        if not terms:
+            raise ValidationError({'q': ['This field is required.']})
+
+        limit = self.paginator.get_page_size(request)
+        queryset = self.filter_queryset(self.get_queryset())
+        rows = search_tours(queryset, terms, limit)
+
+        return Response({'results': rows})
+
+    @action(
+        detail=False,
+        methods=['get'],
+        serializer_class=serializers.PopularTourSerializer,
+        pagination_class=PopularTourPagination,
+    )
+    def popular(self, request):
+        """Return tours ranked by their stored favorite count."""
+        version = '{}.{}'.format(
+            get_version(CATALOGUE_VERSION_KEY),
+            get_version(POPULARITY_VERSION_KEY),
+        )
+        return self.cached_response(request, version, self.popular_page)
+
+    def popular_page(self, request):
+        """Return a page of popular tours from .values() rows."""
+        fields = self.get_serializer_class().Meta.fields
+        queryset = self.filter_queryset(self.get_queryset()).values(*fields)
+        page = self.paginate_queryset(queryset)
+
+        return self.get_paginated_response(page)
+
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        """Return tour counts per tag and price bucket for the filters."""
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(facet_counts(queryset))
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path='import',
+        permission_classes=[permissions.IsAdminUser],
+        serializer_class=serializers.TourImportSerializer,
+    )
+    def bulk_import(self, request):
+        """Import tours from an uploaded JSON Lines or CSV feed."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        upload = serializer.validated_data['file']
+        file_format = serializer.validated_data.get(
+            'file_format', guess_format(upload.name)
+        )
+        name = serializer.validated_data.get('name', upload.name)
+
+        fingerprint = feed_fingerprint(upload)
+        rows = read_rows(codecs.iterdecode(upload, 'utf-8'), file_format)
+        try:
+            imported = import_tours(
+                rows, request.user, name, fingerprint=fingerprint
+            )
+        except TourImportError as exc:
+            raise ValidationError({'file': [str(exc)]})
+
+        return Response({'name': name, 'imported': imported})
+
+    @action(
+        detail=False,
+        methods=['get'],
+        url_path='export',
+        permission_classes=[permissions.IsAdminUser],
+    )
+    def bulk_export(self, request):
+        """Stream every tour as JSON Lines or CSV."""
+        file_format = request.query_params.get('file_format', 'jsonl')
+        if file_format not in FORMATS:
+            raise ValidationError({'file_format': [
+                f'Must be one of: {", ".join(FORMATS)}.'
+            ]})
+
+        content_type = {
+            'jsonl': 'application/x-ndjson',
+            'csv': 'text/csv',
+        }[file_format]
+        response = streaming_response(
+            request, export_tours(file_format), content_type=content_type
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="tours.{file_format}"'
+        )
+
+        return response
+
 
 class CreateRetrieveTagPermission(BasePermission):
     def has_permission(self, request, view):
@@ -59,14 +217,17 @@ class CreateRetrieveTagPermission(BasePermission):
         return False
 
 
-class TagViewSet(mixins.ListModelMixin, mixins.CreateModelMixin,
+class TagViewSet(ReplicaReadMixin, ConditionalGetMixin, StreamingListMixin,
+                 mixins.ListModelMixin, mixins.CreateModelMixin,
                  mixins.RetrieveModelMixin, mixins.UpdateModelMixin,
                  mixins.DestroyModelMixin, viewsets.GenericViewSet):
     """Manage tags in the database."""
     serializer_class = serializers.TagSerializer
     queryset = Tag.objects.all()
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [CreateRetrieveTagPermission]
+    pagination_class = TagPagination
+    list_version_key = TAGS_VERSION_KEY
 
     def get_queryset(self):
         """Filter queryset to all users."""
@@ -98,17 +259,89 @@ class TagViewSet(mixins.ListModelMixin, mixins.CreateModelMixin,
         return super().destroy(request, *args, **kwargs)
 
 
-class FavoriteTourViewSet(viewsets.ModelViewSet):
+class FavoriteTourViewSet(ReplicaReadMixin, viewsets.ModelViewSet):
+    """Manage the favorite tours of the authenticated user."""
     serializer_class = serializers.FavoriteTourSerializer
-    authentication_classes = [TokenAuthentication]
+    authentication_classes = [CachedTokenAuthentication]
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = FavoriteTourPagination
 
     def get_queryset(self):
-        return FavoriteTour.objects.filter(user=self.request.user)
+        if getattr(self, 'swagger_fake_view', False):
+            # Schema generation has no user; only the model is needed.
+            return FavoriteTour.objects.none()
+
+        queryset = FavoriteTour.objects.filter(user=self.request.user)
+        return eager_load(queryset, self.get_serializer_class())
+
+    def get_serializer_class(self):
+        """Embed the tours when reading with ?expand=tour."""
+        expand = self.request.query_params.get('expand') == 'tour'
+        if expand and self.action in ('list', 'retrieve'):
+            return serializers.FavoriteTourExpandedSerializer
+
+        return self.serializer_class
 
     def perform_create(self, serializer):
-        # Set the user based on the authenticated user
-        serializer.save(user=self.request.user)
+        # Set the user based on the authenticated user; favoriting a tour
+        # twice returns the existing favorite instead of failing.
+        user = self.request.user
+        tour = serializer.validated_data['tour']
+        FavoriteTour.objects.favorite(user, [tour.pk])
+        serializer.instance = FavoriteTour.objects.get(user=user, tour=tour)
+
+    def perform_update(self, serializer):
+        # Pointing a favorite at a tour already favorited would break the
+        # unique (user, tour) constraint; let the database decide, so
+        # concurrent updates are caught too.
+        try:
+            with transaction.atomic():
+                serializer.save()
+        except IntegrityError:
+            raise ValidationError(
+                {'tour': ['This tour is already a favorite.']}
+            )
+
+    @action(
+        detail=False,
+        methods=['post'],
+        serializer_class=serializers.FavoriteToggleSerializer,
+    )
+    def toggle(self, request):
+        """Favorite or unfavorite a tour and return its new state."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        tour = serializer.validated_data['tour']
+        favorite = serializer.validated_data['favorite']
+
+        if favorite is not False:
+            added = FavoriteTour.objects.favorite(request.user, [tour.pk])
+            if added or favorite:
+                return Response({'tour': tour.pk, 'favorite': True})
+
+        FavoriteTour.objects.unfavorite(request.user, [tour.pk])
+        return Response({'tour': tour.pk, 'favorite': False})
+
+    @action(
+        detail=False,
+        methods=['post'],
+        serializer_class=serializers.FavoriteSyncSerializer,
+    )
+    def sync(self, request):
+        """Add and remove favorite tours in one request and return the
+        tours whose state changed."""
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+
+        with transaction.atomic():
+            added = FavoriteTour.objects.favorite(
+                request.user, serializer.validated_data['add']
+            )
+            removed = FavoriteTour.objects.unfavorite(
+                request.user, serializer.validated_data['remove']
+            )
+
+        return Response({'added': added, 'removed': removed})
 
     def perform_destroy(self, instance):
         # Ensure the user making the request is the owner of the favorite tour
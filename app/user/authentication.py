@@ -0,0 +1,168 @@
+"""
+Authentication classes for the APIs.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+
+from core.models import AuthToken
+
+
+class TTLCache:
+    """Thread-safe in-process LRU cache whose entries expire after ttl
+    seconds."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached value for key, or None."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+
+            return value
+
+    def set(self, key, value):
+        """Store value under key, evicting the least recently used."""
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        """Remove key from the cache."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self._data.clear()
+
+
+local_token_cache = TTLCache(
+    maxsize=settings.TOKEN_CACHE_MAXSIZE,
+    ttl=settings.TOKEN_CACHE_TTL,
+)
+
+
+def shared_token_cache():
+    """Return the shared cache tier, or None when it is disabled."""
+    if settings.TOKEN_CACHE_ALIAS is None:
+        return None
+    return caches[settings.TOKEN_CACHE_ALIAS]
+
+
+def shared_cache_key(key):
+    """Return the shared cache key for a token."""
+    # v3 entries hold CACHED_USER_FIELDS by name rather than a pickled
+    # user.
+    return f'auth:token:v3:{key}'
+
+
+# The user fields cached with a token. The rest, password hash included,
+# are deferred and loaded from the database if a view reads them.
+CACHED_USER_FIELDS = ('id', 'is_active', 'is_staff', 'is_superuser')
+
+
+def build_user(db, fields):
+    """Return a user loaded from db with only fields, a {name: value}
+    dict, set and every other field deferred."""
+    model = get_user_model()
+    # from_db takes the values in concrete field order.
+    names = [
+        field.attname for field in model._meta.concrete_fields
+        if field.attname in fields
+    ]
+    return model.from_db(db, names, [fields[name] for name in names])
+
+
+def invalidate_tokens(keys):
+    """Drop tokens from both cache tiers."""
+    shared = shared_token_cache()
+    for key in keys:
+        local_token_cache.delete(key)
+        if shared is not None:
+            shared.delete(shared_cache_key(key))
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """Token authentication that resolves token -> (user fields, expiry)
+    from an in-process LRU cache, then an optional shared cache, before
+    falling back to the database.
+
+    Entries are dropped when a token is deleted or its user is saved
+    (see user.signals). Other processes only see that through the
+    shared tier, so TOKEN_CACHE_TTL bounds how long their local copies
+    can lag behind. Expiry is checked on every request, cached or not,
+    and tokens used after TOKEN_REFRESH_INTERVAL have it pushed back.
+    """
+    model = AuthToken
+
+    def authenticate_credentials(self, key):
+        entry = local_token_cache.get(key)
+        if entry is None:
+            entry = self.lookup(key)
+            local_token_cache.set(key, entry)
+        db, fields, expires = entry
+
+        now = timezone.now()
+        if expires <= now:
+            invalidate_tokens([key])
+            raise exceptions.AuthenticationFailed(_('Token has expired.'))
+
+        refresh_after = timedelta(
+            seconds=settings.TOKEN_TTL - settings.TOKEN_REFRESH_INTERVAL
+        )
+        if expires - now < refresh_after:
+            expires = self.model.objects.refresh(key)
+            invalidate_tokens([key])
+            if expires is None:
+                raise exceptions.AuthenticationFailed(_('Invalid token.'))
+
+        # Each request gets its own instance, as views may modify it.
+        user = build_user(db, fields)
+        return user, self.model(key=key, user=user, expires=expires)
+
+    def lookup(self, key):
+        """Return (database alias, user fields, expires) for key from the
+        shared tier or the database."""
+        shared = shared_token_cache()
+        if shared is not None:
+            entry = shared.get(shared_cache_key(key))
+            if entry is not None:
+                return entry
+
+        user, token = super().authenticate_credentials(key)
+        fields = {name: getattr(user, name) for name in CACHED_USER_FIELDS}
+        entry = (user._state.db, fields, token.expires)
+        if shared is not None:
+            shared.set(
+                shared_cache_key(key),
+                entry,
+                settings.TOKEN_CACHE_SHARED_TTL,
+            )
+
+        return entry
@@ -0,0 +1,140 @@
+"""
+Password hashing for the user API.
+
+The tuned hashers read their costs from settings.PASSWORD_HASHER_COSTS,
+and settings.PASSWORD_HASHER_PROFILE picks which one hashes new
+passwords. Django upgrades a stored hash whenever its algorithm or cost
+differs from the preferred hasher, so changing either is applied on
+each user's next login.
+
+Hashing is CPU bound and releases the GIL, so it runs on a bounded
+per-process pool: a login spike keeps at most PASSWORD_HASH_WORKERS
+cores busy, and once PASSWORD_HASH_BACKLOG requests are waiting more
+logins are turned away with 429 instead of tying up every worker
+thread.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import (
+    Argon2PasswordHasher,
+    BCryptSHA256PasswordHasher,
+    PBKDF2PasswordHasher,
+    check_password,
+    get_hasher,
+    identify_hasher,
+    make_password,
+)
+from django.utils.translation import gettext as _
+
+from rest_framework.exceptions import Throttled
+
+
+def _cost(profile, name):
+    """Return a cost parameter from settings.PASSWORD_HASHER_COSTS."""
+    return settings.PASSWORD_HASHER_COSTS[profile][name]
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """Argon2id with costs from settings."""
+    time_cost = property(lambda self: _cost('argon2', 'time_cost'))
+    memory_cost = property(lambda self: _cost('argon2', 'memory_cost'))
+    parallelism = property(lambda self: _cost('argon2', 'parallelism'))
+
+
+class TunedBCryptSHA256PasswordHasher(BCryptSHA256PasswordHasher):
+    """bcrypt with rounds from settings."""
+    rounds = property(lambda self: _cost('bcrypt', 'rounds'))
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """PBKDF2-SHA256 with iterations from settings."""
+    iterations = property(lambda self: _cost('pbkdf2', 'iterations'))
+
+
+class HashingPool:
+    """Thread pool running password hashes with a bounded backlog."""
+
+    def __init__(self, workers, backlog):
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix='password-hash'
+        )
+        self._slots = threading.BoundedSemaphore(workers + backlog)
+
+    def run(self, func, *args):
+        """Return func(*args) computed on the pool, or raise Throttled
+        when the backlog is full."""
+        if not self._slots.acquire(blocking=False):
+            raise Throttled(
+                wait=1, detail=_('Too many logins in progress, retry soon.')
+            )
+        try:
+            return self._executor.submit(func, *args).result()
+        finally:
+            self._slots.release()
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def hashing_pool():
+    """Return the process-wide hashing pool."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = HashingPool(
+                settings.PASSWORD_HASH_WORKERS,
+                settings.PASSWORD_HASH_BACKLOG,
+            )
+
+    return _pool
+
+
+def needs_rehash(encoded):
+    """Return True if encoded was not made by the preferred hasher with
+    its current costs."""
+    try:
+        hasher = identify_hasher(encoded)
+    except ValueError:
+        return False
+
+    preferred = get_hasher()
+    return hasher.algorithm != preferred.algorithm or \
+        preferred.must_update(encoded)
+
+
+def set_password(user, raw_password):
+    """Hash raw_password onto user on the hashing pool."""
+    user.password = hashing_pool().run(make_password, raw_password)
+    user._password = raw_password
+
+
+def authenticate_user(email, password):
+    """Return the active user with email and password, or None.
+
+    Mirrors ModelBackend.authenticate() with the hashing offloaded, and
+    upgrades the stored hash on success when needed. The database is
+    only used from the calling thread.
+    """
+    user_model = get_user_model()
+    try:
+        user = user_model._default_manager.get_by_natural_key(email)
+    except user_model.DoesNotExist:
+        # Hash anyway so unknown emails take as long as wrong passwords.
+        hashing_pool().run(make_password, password)
+        return None
+
+    pool = hashing_pool()
+    if not pool.run(check_password, password, user.password):
+        return None
+    if not user.is_active:
+        return None
+
+    if needs_rehash(user.password):
+        set_password(user, password)
+        user.save(update_fields=['password'])
+
+    return user
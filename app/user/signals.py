@@ -0,0 +1,32 @@
+"""
+Signal handlers keeping the token authentication cache in sync.
+
+Tokens are forgotten once the write commits; before that, a concurrent
+request would cache the old rows again.
+"""
+from functools import partial
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from core.models import AuthToken
+from user.authentication import invalidate_tokens
+
+
+@receiver(post_delete, sender=AuthToken)
+def token_deleted(sender, instance, **kwargs):
+    """Forget a deleted token."""
+    transaction.on_commit(partial(invalidate_tokens, [instance.key]))
+
+
+@receiver(post_save, sender=get_user_model())
+def user_saved(sender, instance, created, **kwargs):
+    """Forget the tokens of a user whose flags or profile changed."""
+    if created:
+        return
+    keys = list(AuthToken.objects.filter(user_id=instance.pk).values_list(
+        'key', flat=True
+    ))
+    transaction.on_commit(partial(invalidate_tokens, keys))
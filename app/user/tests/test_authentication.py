@@ -0,0 +1,205 @@
+"""
+Tests for the cached token authentication.
+"""
+from datetime import timedelta
+from unittest.mock import patch
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+
+from rest_framework import exceptions
+
+from core.models import AuthToken
+from user.authentication import (
+    CachedTokenAuthentication,
+    TTLCache,
+    local_token_cache,
+    shared_cache_key,
+)
+
+
+class TTLCacheTests(SimpleTestCase):
+    """Test the in-process LRU cache."""
+
+    def test_evicts_least_recently_used(self):
+        """Test the oldest unused entry is evicted when full."""
+        lru = TTLCache(maxsize=2, ttl=60)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+
+        self.assertEqual(lru.get('a'), 1)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.get('c'), 3)
+
+    @patch('user.authentication.time.monotonic')
+    def test_entries_expire(self, patched_monotonic):
+        """Test entries are dropped after the TTL."""
+        patched_monotonic.return_value = 100
+        lru = TTLCache(maxsize=2, ttl=30)
+        lru.set('a', 1)
+
+        patched_monotonic.return_value = 129
+        self.assertEqual(lru.get('a'), 1)
+        patched_monotonic.return_value = 130
+        self.assertIsNone(lru.get('a'))
+
+
+class CachedTokenAuthenticationTests(TestCase):
+    """Test resolving tokens through the cache tiers."""
+
+    def setUp(self):
+        cache.clear()
+        local_token_cache.clear()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com',
+            password='testpass123',
+        )
+        self.token = AuthToken.objects.issue(self.user)
+        self.auth = CachedTokenAuthentication()
+
+    def test_cached_lookup_skips_database(self):
+        """Test a repeated token lookup does not query the database."""
+        user, _ = self.auth.authenticate_credentials(self.token.key)
+
+        with self.assertNumQueries(0):
+            cached, token = self.auth.authenticate_credentials(
+                self.token.key
+            )
+
+        self.assertEqual(cached, user)
+        self.assertIsNot(cached, user)
+        self.assertEqual(token.key, self.token.key)
+
+    def test_shared_tier_used_after_local_miss(self):
+        """Test the shared cache answers when the local tier is cold."""
+        self.auth.authenticate_credentials(self.token.key)
+        local_token_cache.clear()
+
+        with self.assertNumQueries(0):
+            user, _ = self.auth.authenticate_credentials(self.token.key)
+
+        self.assertEqual(user, self.user)
+
+    def test_deleted_token_rejected(self):
+        """Test a deleted token stops authenticating."""
+        self.auth.authenticate_credentials(self.token.key)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.token.delete()
+
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_deactivated_user_rejected(self):
+        """Test deactivating a user invalidates their token."""
+        self.auth.authenticate_credentials(self.token.key)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save()
+
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.auth.authenticate_credentials(self.token.key)
+
+    def test_invalidated_on_commit(self):
+        """Test a user's tokens are forgotten only once the change
+        commits, so no request can cache the old row again."""
+        self.auth.authenticate_credentials(self.token.key)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.user.is_active = False
+                self.user.save()
+                self.assertIsNotNone(local_token_cache.get(self.token.key))
+
+        self.assertIsNone(local_token_cache.get(self.token.key))
+        self.assertIsNone(cache.get(shared_cache_key(self.token.key)))
+
+    def test_password_hash_not_cached(self):
+        """Test only the user's id and flags are cached."""
+        self.auth.authenticate_credentials(self.token.key)
+
+        db, fields, _ = cache.get(shared_cache_key(self.token.key))
+        self.assertEqual(db, 'default')
+        self.assertEqual(fields, {
+            'id': self.user.id,
+            'is_active': True,
+            'is_staff': False,
+            'is_superuser': False,
+        })
+        user, _ = self.auth.authenticate_credentials(self.token.key)
+        self.assertIn('password', user.get_deferred_fields())
+        self.assertEqual(user.email, self.user.email)
+
+    def test_flags_kept_through_cache(self):
+        """Test every flag keeps its own value on cached lookups."""
+        users = {
+            'regular': self.user,
+            'staff': get_user_model().objects.create_user(
+                email='staff@example.com', password='testpass123',
+                is_staff=True,
+            ),
+            'superuser': get_user_model().objects.create_superuser(
+                email='admin@example.com', password='testpass123',
+            ),
+        }
+        for name, expected in users.items():
+            key = AuthToken.objects.issue(expected).key
+            for _ in range(2):
+                user, _ = self.auth.authenticate_credentials(key)
+                with self.subTest(name), self.assertNumQueries(0):
+                    self.assertEqual(
+                        (user.pk, user.is_active, user.is_staff,
+                         user.is_superuser),
+                        (expected.pk, expected.is_active, expected.is_staff,
+                         expected.is_superuser),
+                    )
+
+    def test_superuser_change_visible(self):
+        """Test granting superuser is picked up immediately."""
+        self.auth.authenticate_credentials(self.token.key)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_superuser = True
+            self.user.save()
+
+        user, _ = self.auth.authenticate_credentials(self.token.key)
+        self.assertTrue(user.is_superuser)
+
+    def test_expired_token_rejected(self):
+        """Test a cached token stops authenticating once it expires."""
+        self.auth.authenticate_credentials(self.token.key)
+
+        later = self.token.expires + timedelta(seconds=1)
+        with patch('user.authentication.timezone.now', return_value=later):
+            with self.assertRaises(exceptions.AuthenticationFailed):
+                self.auth.authenticate_credentials(self.token.key)
+
+    def test_use_slides_expiry(self):
+        """Test using a token after the refresh interval extends it."""
+        self.auth.authenticate_credentials(self.token.key)
+        later = timezone.now() + timedelta(hours=2)
+
+        with patch('user.authentication.timezone.now', return_value=later), \
+                patch('core.models.timezone.now', return_value=later):
+            _, token = self.auth.authenticate_credentials(self.token.key)
+
+        self.token.refresh_from_db()
+        self.assertGreater(self.token.expires, later + timedelta(days=6))
+        self.assertEqual(token.expires, self.token.expires)
+
+    def test_recent_use_does_not_write(self):
+        """Test using a token within the refresh interval is read only."""
+        self.auth.authenticate_credentials(self.token.key)
+        expires = self.token.expires
+
+        with self.assertNumQueries(0):
+            self.auth.authenticate_credentials(self.token.key)
+
+        self.token.refresh_from_db()
+        self.assertEqual(self.token.expires, expires)
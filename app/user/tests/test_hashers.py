@@ -0,0 +1,164 @@
+"""
+Tests for password hashing and login throughput controls.
+"""
+from io import StringIO
+from unittest import skipUnless
+from unittest.mock import patch
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import get_hasher
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.urls import reverse
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from user.hashers import HashingPool, authenticate_user, needs_rehash
+
+try:
+    import argon2
+except ImportError:
+    argon2 = None
+
+try:
+    import bcrypt
+except ImportError:
+    bcrypt = None
+
+
+TOKEN_URL = reverse('user:token')
+PASSWORD = 'testpass123'
+
+
+def hasher_settings(profile, **costs):
+    """Return settings preferring profile, with costs overridden."""
+    hashers = settings.TUNED_HASHERS
+    return {
+        'PASSWORD_HASHERS': [
+            hashers[profile],
+            *(path for name, path in hashers.items() if name != profile),
+        ],
+        'PASSWORD_HASHER_COSTS': {
+            **settings.PASSWORD_HASHER_COSTS,
+            profile: {**settings.PASSWORD_HASHER_COSTS[profile], **costs},
+        },
+    }
+
+
+class AuthenticateUserTests(TestCase):
+    """Test logging in through the hashing pool."""
+
+    def setUp(self):
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password=PASSWORD
+        )
+
+    def test_authenticate(self):
+        """Test only an active user with the right password logs in."""
+        self.assertEqual(
+            authenticate_user('user@example.com', PASSWORD), self.user
+        )
+        self.assertIsNone(authenticate_user('user@example.com', 'wrong'))
+        self.assertIsNone(authenticate_user('other@example.com', PASSWORD))
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertIsNone(authenticate_user('user@example.com', PASSWORD))
+
+    def test_tuned_costs_are_used(self):
+        """Test new hashes use the costs from settings."""
+        with self.settings(**hasher_settings('pbkdf2', iterations=1000)):
+            hasher = get_hasher()
+
+            self.assertEqual(hasher.iterations, 1000)
+            self.assertIn('$1000$', hasher.encode(PASSWORD, hasher.salt()))
+
+    def test_login_upgrades_hash(self):
+        """Test a login rehashes a password made with older costs."""
+        old = self.user.password
+
+        with self.settings(**hasher_settings('pbkdf2', iterations=1000)):
+            self.assertTrue(needs_rehash(old))
+            authenticate_user('user@example.com', PASSWORD)
+
+            self.user.refresh_from_db()
+            self.assertNotEqual(self.user.password, old)
+            self.assertIn('$1000$', self.user.password)
+            self.assertFalse(needs_rehash(self.user.password))
+            self.assertTrue(self.user.check_password(PASSWORD))
+
+    def test_login_keeps_current_hash(self):
+        """Test a login leaves an up to date hash alone."""
+        old = self.user.password
+
+        authenticate_user('user@example.com', PASSWORD)
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.password, old)
+
+    @skipUnless(argon2, 'argon2-cffi is not installed.')
+    def test_upgrade_to_argon2(self):
+        """Test switching the profile to argon2 upgrades on login."""
+        with self.settings(**hasher_settings('argon2')):
+            authenticate_user('user@example.com', PASSWORD)
+
+            self.user.refresh_from_db()
+            self.assertTrue(self.user.password.startswith('argon2$'))
+
+    @skipUnless(bcrypt, 'bcrypt is not installed.')
+    def test_upgrade_to_bcrypt(self):
+        """Test switching the profile to bcrypt upgrades on login."""
+        with self.settings(**hasher_settings('bcrypt', rounds=4)):
+            authenticate_user('user@example.com', PASSWORD)
+
+            self.user.refresh_from_db()
+            self.assertTrue(self.user.password.startswith('bcrypt_sha256$'))
+
+
+class LoginThroughputTests(TestCase):
+    """Test the token endpoint sheds load when the pool is full."""
+
+    def setUp(self):
+        self.client = APIClient()
+        get_user_model().objects.create_user(
+            email='user@example.com', password=PASSWORD
+        )
+
+    def test_full_pool_returns_429(self):
+        """Test logins beyond the backlog are turned away."""
+        pool = HashingPool(workers=1, backlog=0)
+        payload = {'email': 'user@example.com', 'password': PASSWORD}
+
+        with patch('user.hashers._pool', pool):
+            res = self.client.post(TOKEN_URL, payload)
+            self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+            pool._slots.acquire()
+            try:
+                res = self.client.post(TOKEN_URL, payload)
+            finally:
+                pool._slots.release()
+
+        self.assertEqual(res.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', res)
+
+
+@override_settings(PASSWORD_HASH_WORKERS=2)
+class BenchmarkHashersTests(SimpleTestCase):
+    """Test the benchmark_hashers command."""
+
+    def test_benchmark(self):
+        """Test every profile is either measured or skipped."""
+        out = StringIO()
+        with self.settings(**hasher_settings('pbkdf2', iterations=1000)):
+            call_command('benchmark_hashers', logins=2, stdout=out)
+
+        output = out.getvalue()
+        self.assertIn('pbkdf2: ', output)
+        self.assertIn('logins/s on 2 threads', output)
+        for profile, library in (('argon2', argon2), ('bcrypt', bcrypt)):
+            self.assertEqual(
+                f'{profile}: skipped' in output, library is None, output
+            )
@@ -0,0 +1,105 @@
+"""
+Tests for expiring API tokens.
+"""
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from core.models import AuthToken
+
+
+TOKEN_URL = reverse('user:token')
+ME_URL = reverse('user:me')
+
+
+def create_tokens(user, count, expires):
+    """Create count tokens for user expiring at expires."""
+    return AuthToken.objects.bulk_create(
+        AuthToken(user=user, expires=expires) for _ in range(count)
+    )
+
+
+class AuthTokenTests(TestCase):
+    """Test issuing, using and purging expiring tokens."""
+
+    def setUp(self):
+        self.client = APIClient()
+        self.user = get_user_model().objects.create_user(
+            email='user@example.com', password='testpass123'
+        )
+
+    def test_login_reuses_active_token(self):
+        """Test logging in again extends the same token."""
+        payload = {'email': 'user@example.com', 'password': 'testpass123'}
+        first = self.client.post(TOKEN_URL, payload)
+        second = self.client.post(TOKEN_URL, payload)
+
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertEqual(first.data['token'], second.data['token'])
+        self.assertGreaterEqual(second.data['expires'], first.data['expires'])
+        self.assertEqual(AuthToken.objects.filter(user=self.user).count(), 1)
+
+    def test_login_replaces_expired_token(self):
+        """Test an expired token is not handed out again."""
+        expired = create_tokens(
+            self.user, 1, timezone.now() - timedelta(seconds=1)
+        )[0]
+
+        token = AuthToken.objects.issue(self.user)
+
+        self.assertNotEqual(token.key, expired.key)
+        self.assertGreater(token.expires, timezone.now())
+
+    def test_expired_token_rejected(self):
+        """Test requests with an expired token are unauthorized."""
+        token = create_tokens(
+            self.user, 1, timezone.now() - timedelta(seconds=1)
+        )[0]
+        self.client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+
+        res = self.client.get(ME_URL)
+
+        self.assertEqual(res.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_purge_expired_tokens(self):
+        """Test the purge deletes only expired tokens, in batches."""
+        now = timezone.now()
+        create_tokens(self.user, 5, now - timedelta(seconds=1))
+        active = create_tokens(self.user, 2, now + timedelta(hours=1))
+        out = StringIO()
+
+        with self.assertNumQueries(3):
+            call_command('purge_expired_tokens', batch_size=2, stdout=out)
+
+        self.assertIn('Purged 5 expired tokens.', out.getvalue())
+        self.assertCountEqual(
+            AuthToken.objects.values_list('key', flat=True),
+            [token.key for token in active],
+        )
+
+    def test_benchmark_tokens(self):
+        """Test the benchmark reports every size and leaves no rows."""
+        out = StringIO()
+
+        call_command(
+            'benchmark_tokens',
+            sizes=[100, 1000],
+            lookups=10,
+            batch_size=10,
+            max_ms=1000,
+            stdout=out,
+        )
+
+        output = out.getvalue()
+        self.assertIn('100 tokens: ', output)
+        self.assertIn('1000 tokens: ', output)
+        self.assertIn('Purging 10 expired tokens', output)
+        self.assertFalse(AuthToken.objects.exists())
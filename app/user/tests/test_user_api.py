@@ -3,15 +3,19 @@ Tests for the user API.
 """
 from django.test import TestCase
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
 from django.urls import reverse
 
 from rest_framework.test import APIClient
 from rest_framework import status
 
+from user.authentication import local_token_cache
+
 
 CREATE_USER_URL = reverse('user:create')
 TOKEN_URL = reverse('user:token')
 ME_URL = reverse('user:me')
+TAGS_URL = reverse('tours:tag-list')
 
 
 def create_user(**params):
@@ -155,3 +159,43 @@ class PrivateUserApiTests(TestCase):
         self.assertEqual(self.user.name, payload['name'])
         self.assertTrue(self.user.check_password(payload['password']))
         self.assertEqual(res.status_code, status.HTTP_200_OK)
+
+
+class TokenUserApiTests(TestCase):
+    """Test requests authenticated with a token from the API."""
+
+    def setUp(self):
+        cache.clear()
+        local_token_cache.clear()
+        self.user = create_user(
+            email='test@example.com',
+            password='testpass123',
+            name='Test Name',
+        )
+        token = self.client.post(TOKEN_URL, {
+            'email': 'test@example.com',
+            'password': 'testpass123',
+        }).data['token']
+        self.client = APIClient(HTTP_AUTHORIZATION=f'Token {token}')
+
+    def test_regular_user_stays_regular(self):
+        """Test a regular user gets no superuser rights on cached
+        requests."""
+        for _ in range(2):
+            res = self.client.post(TAGS_URL, {'name': 'Beach'})
+            self.assertEqual(res.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_update_profile_keeps_flags(self):
+        """Test updating the profile leaves the user's flags alone."""
+        self.client.get(ME_URL)
+
+        res = self.client.patch(ME_URL, {'name': 'Updated name'})
+
+        self.assertEqual(res.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.name, 'Updated name')
+        self.assertEqual(
+            (self.user.is_active, self.user.is_staff, self.user.is_superuser),
+            (True, False, False),
+        )
+        self.assertTrue(self.user.check_password('testpass123'))